@@ -0,0 +1,174 @@
+"""
+后台任务执行器
+
+订阅确认邮件等不影响请求结果的副作用放到有界队列中，由固定数量的工作线程执行，
+HTTP 请求在主要数据写入后即可返回；队列已满时按配置的策略处理：
+
+- reject: 丢弃新任务并计数（默认，保护请求延迟）
+- caller_runs: 在提交任务的线程中直接执行（不丢任务，但请求会变慢）
+"""
+
+import queue
+import threading
+import time
+from datetime import datetime
+
+from config import (
+    BACKGROUND_TASK_WORKERS,
+    BACKGROUND_TASK_QUEUE_SIZE,
+    BACKGROUND_TASK_OVERFLOW,
+)
+
+
+class BackgroundTaskExecutor:
+    """有界队列 + 固定工作线程的后台任务执行器（线程安全）"""
+
+    def __init__(
+        self,
+        max_workers=BACKGROUND_TASK_WORKERS,
+        max_queue_size=BACKGROUND_TASK_QUEUE_SIZE,
+        overflow=BACKGROUND_TASK_OVERFLOW,
+    ):
+        """
+        Args:
+            max_workers: 工作线程数
+            max_queue_size: 等待执行的任务数上限
+            overflow: 队列已满时的策略（reject / caller_runs）
+        """
+        if overflow not in ("reject", "caller_runs"):
+            raise ValueError(f"未知的队列溢出策略: {overflow}")
+        self.max_workers = max(int(max_workers), 1)
+        self.overflow = overflow
+        self._queue = queue.Queue(maxsize=max(int(max_queue_size), 1))
+        self._lock = threading.Lock()
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "caller_runs": 0,
+            "max_queue_depth": 0,
+            "total_wait": 0.0,
+            "total_run": 0.0,
+        }
+        self._workers = []
+        self._shutdown = False
+
+    def _count(self, key, value=1):
+        with self._lock:
+            self._stats[key] += value
+
+    def _ensure_workers(self):
+        """首次提交任务时启动工作线程"""
+        if self._workers:
+            return
+        with self._lock:
+            if self._workers:
+                return
+            for i in range(self.max_workers):
+                worker = threading.Thread(
+                    target=self._worker_loop, name=f"BackgroundTask-{i}", daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+
+    def submit(self, name, func, *args, **kwargs):
+        """
+        提交后台任务
+
+        Args:
+            name: 任务名称（用于日志）
+            func: 要执行的函数
+            *args, **kwargs: 函数参数
+
+        Returns:
+            bool: 任务是否已接受（排队或按 caller_runs 策略直接执行）
+        """
+        if self._shutdown:
+            self._count("rejected")
+            print(f"⚠️ 后台任务执行器已关闭，丢弃任务: {name}")
+            return False
+
+        self._ensure_workers()
+        task = (name, func, args, kwargs, time.monotonic())
+        try:
+            self._queue.put_nowait(task)
+        except queue.Full:
+            if self.overflow == "caller_runs":
+                self._count("caller_runs")
+                self._run(task)
+                return True
+            self._count("rejected")
+            print(f"⚠️ 后台任务队列已满，丢弃任务: {name}")
+            return False
+
+        with self._lock:
+            self._stats["submitted"] += 1
+            depth = self._queue.qsize()
+            if depth > self._stats["max_queue_depth"]:
+                self._stats["max_queue_depth"] = depth
+        return True
+
+    def _worker_loop(self):
+        while True:
+            task = self._queue.get()
+            if task is None:
+                self._queue.task_done()
+                return
+            try:
+                self._run(task)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, task):
+        name, func, args, kwargs, queued_at = task
+        started = time.monotonic()
+        try:
+            func(*args, **kwargs)
+            self._count("completed")
+        except Exception as e:
+            self._count("failed")
+            print(f"[{datetime.now()}] ❌ 后台任务 {name} 执行失败: {str(e)}")
+        finally:
+            with self._lock:
+                self._stats["total_wait"] += started - queued_at
+                self._stats["total_run"] += time.monotonic() - started
+
+    def join(self):
+        """等待队列中的任务全部执行完成"""
+        self._queue.join()
+
+    def shutdown(self, wait=True):
+        """执行完已排队的任务后停止工作线程"""
+        self._shutdown = True
+        for _ in self._workers:
+            self._queue.put(None)
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    def stats(self):
+        """提交、完成、失败、丢弃次数，队列深度和平均等待/执行耗时"""
+        with self._lock:
+            stats = dict(self._stats)
+        finished = stats["completed"] + stats["failed"]
+        stats["queue_depth"] = self._queue.qsize()
+        stats["queue_capacity"] = self._queue.maxsize
+        stats["workers"] = self.max_workers
+        stats["avg_wait"] = stats.pop("total_wait") / finished if finished else 0.0
+        stats["avg_run"] = stats.pop("total_run") / finished if finished else 0.0
+        return stats
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_background_executor():
+    """获取进程内共享的后台任务执行器"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = BackgroundTaskExecutor()
+    return _executor
@@ -22,6 +22,22 @@ ARTICLES_DATABASE_URI = f"sqlite:///{str(DATABASE_DIR)}/articles.sqlite3"
 # 订阅者数据库
 SUBSCRIBERS_DATABASE_URI = f"sqlite:///{str(DATABASE_DIR)}/subscribers.sqlite3"
 
+# SQLite 连接参数（两个数据库共用，每个新连接建立时按顺序设置）：
+#   busy_timeout - 遇到写锁时最多等待的毫秒数，超时才报 database is locked
+#   journal_mode - WAL 模式下读写互不阻塞，网页请求与爬虫线程可同时访问
+#   synchronous  - WAL 模式下 NORMAL 不会损坏数据库，写入比 FULL 快得多
+#   mmap_size    - 内存映射读取的字节数
+#   cache_size   - 每个连接的页缓存，负数表示 KiB
+#   temp_store   - 排序、临时索引等放在内存中
+SQLITE_PRAGMAS = {
+    "busy_timeout": 10000,
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64000,
+    "temp_store": "MEMORY",
+}
+
 # ========== 爬虫配置 ==========
 # 请求头配置
 HEADERS = {
@@ -52,13 +68,117 @@ SLEEP_INTERVAL = {
     "every_200": 5,
 }
 
+# 自适应爬取调度：按历史发布规律调整轮询间隔，首页无变化时不执行完整爬取
+CRAWL_MIN_INTERVAL_MINUTES = 5  # 最短轮询间隔（分钟）
+CRAWL_MAX_INTERVAL_MINUTES = 120  # 最长轮询间隔（分钟）
+CRAWL_TARGET_NEW_ARTICLES = 0.5  # 两次轮询之间预计新增的文章数
+CRAWL_BACKOFF_FACTOR = 1.5  # 首页每连续一次无变化，间隔乘以该系数
+CRAWL_HISTORY_WEEKS = 8  # 统计发布频率使用的历史周数
+CRAWL_FORCE_FULL_HOURS = 6  # 首页一直无变化时，最长多久执行一次完整爬取
+
+# 历史回填（python -m official_document_crawler.crawler.backfill）
+BACKFILL_TOTAL_PAGES = 492  # 列表总页数（与 LIST_URL_TEMPLATE 中的 totalpage 一致）
+BACKFILL_WORKERS = 4  # 并发抓取的页面数
+BACKFILL_RATE_LIMIT = 2  # 所有线程合计每秒最多请求数
+
+# 多进程爬取工作队列（python -m official_document_crawler.crawler.work_queue）
+WORK_QUEUE_LEASE_SECONDS = 120  # 租约时长，工作进程处理期间定期续约，崩溃后到期重新可见
+WORK_QUEUE_MAX_ATTEMPTS = 5  # 最多尝试次数，超过后进入死信（status=dead）
+WORK_QUEUE_RETRY_BASE_SECONDS = 30  # 失败重试的退避基数（秒），按尝试次数指数增长
+WORK_QUEUE_POLL_INTERVAL = 2  # 队列为空时的轮询间隔（秒）
+
+# 爬取任务各阶段的时间预算（秒），超出后该阶段提前结束，已处理的结果保留
+CRAWL_PHASE_BUDGETS = {
+    "fetch": 900,
+    "parse": 900,
+    "stats": 300,
+    "summarize": 900,
+    "notify": 300,
+}
+
+# 爬取运行记录的心跳：运行期间每隔 CRAWL_RUN_HEARTBEAT_SECONDS 秒更新一次，
+# 超过 CRAWL_RUN_STALE_SECONDS 秒未更新的“运行中”记录视为进程已退出，标记为失败
+CRAWL_RUN_HEARTBEAT_SECONDS = 30
+CRAWL_RUN_STALE_SECONDS = 300
+
+# AI 摘要生成配置（爬取后台阶段）
+SUMMARY_MAX_WORKERS = 4  # 同时请求摘要服务的最大并发数
+SUMMARY_BATCH_LIMIT = 100  # 每次爬取最多生成摘要的文章数（从最新的开始）
+
+# 文章访问统计（点击数、附件下载数）刷新配置：
+# [(文章年龄上限（小时）, 刷新间隔（小时）)]，按年龄从小到大排列；
+# 新文章每小时刷新一次，随后逐渐降低频率，超过最后一档的文章不再刷新
+STATS_REFRESH_SCHEDULE = [
+    (24, 1),
+    (24 * 7, 6),
+    (24 * 30, 24),
+]
+STATS_REFRESH_INTERVAL_MINUTES = 60  # 统计刷新任务的执行间隔（分钟）
+STATS_MAX_WORKERS = 8  # 同时请求统计接口的最大并发数
+STATS_REFRESH_BATCH_LIMIT = 500  # 每次最多刷新的文章数
+
+# 热门文章排行：按滚动窗口内的点击增量（附件下载按权重计入）计算热度
+TRENDING_WINDOW_HOURS = 24  # 滚动窗口长度（小时）
+TRENDING_DOWNLOAD_WEIGHT = 2  # 一次附件下载折合的点击数
+TRENDING_SNAPSHOT_RETENTION_DAYS = 45  # 统计快照保留天数
+
+# DLP 脱敏模式：
+#   sidecar - 全部交给安全服务（默认，召回率最高）
+#   hybrid  - 先用本地规则脱敏，仅在存在姓名、住址等需要语义判断的候选时交给安全服务
+#   local   - 只用本地规则，不访问安全服务
+DLP_MODE = "sidecar"
+
+# 批量脱敏阶段配置（解析详情时）
+DLP_MAX_WORKERS = 4  # 同时请求脱敏服务的最大并发数
+DLP_BATCH_SIZE = 16  # 每批提交的文本数量
+
+# DLP 脱敏结果缓存容量（字节），超出后按最近使用时间淘汰
+DLP_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# 命中时只有最近使用时间早于该分钟数的记录才需要更新，更新先缓冲再批量写入，
+# 读缓存不再为每次命中单独开写事务
+DLP_CACHE_TOUCH_INTERVAL_MINUTES = 60
+DLP_CACHE_TOUCH_BATCH_SIZE = 100
+
+# 已推送文章URL的内存缓存容量（持久状态保存在 articles.notified_at 字段）
+NOTIFIED_URL_CACHE_SIZE = 2000
+
+# 已领取但尚未确认写入待推送账本的文章，超过该时间（分钟）后由下一次推送重新领取
+NOTIFY_CLAIM_TIMEOUT_MINUTES = 10
+
+# 推送时还会领取发布日期在该天数内、已解析但尚未推送的文章（如工作队列进程入库的文章）；
+# 更早的未推送文章（历史回填）不推送
+NOTIFY_LOOKBACK_DAYS = 3
+
+# ========== 安全服务（Secure Utils）配置 ==========
+SIDECAR_BASE_URL = "http://localhost:58080"
+
+# 各接口的超时时间（秒）：请求路径上的接口要短，后台摘要生成可以长一些
+SIDECAR_TIMEOUTS = {
+    "dlp": 5,
+    "firewall": 1,
+    "summarizer": 30,
+}
+
+SIDECAR_POOL_SIZE = 10  # 保持的 keep-alive 连接数
+SIDECAR_FAILURE_THRESHOLD = 5  # 连续失败多少次后熔断，熔断期间直接使用降级结果
+SIDECAR_RECOVERY_TIMEOUT = 30  # 熔断后多久放行一次试探请求（秒）
+
 # 禁用代理设置
 os.environ["NO_PROXY"] = "*"
 
 # ========== 邮件配置 ==========
-SMTP_SERVER = "Your smtp server"
-SMTP_PASSWORD = "Your smtp password"
-MY_EMAIL = "Sender email address"
+# 发件账号也可以通过同名环境变量提供（如部署脚本或测试环境）
+SMTP_SERVER = os.environ.get("SMTP_SERVER", "Your smtp server")
+SMTP_PASSWORD = os.environ.get("SMTP_PASSWORD", "Your smtp password")
+MY_EMAIL = os.environ.get("MY_EMAIL", "Sender email address")
+SMTP_PORT = 587  # SMTP 端口
+SMTP_SECURITY = "starttls"  # 连接加密方式：starttls / ssl / none
+SMTP_TIMEOUT = 30  # SMTP 连接超时（秒）
+
+# 邮件发送后端："smtp" 为逐个连接阻塞发送；"async" 为 asyncio 并发会话（需安装 aiosmtplib）
+# async 后端下，定时汇总推送在其事件循环中执行，调度线程不等待推送结束即可继续爬取
+EMAIL_TRANSPORT = "smtp"
+ASYNC_SMTP_MAX_CONNECTIONS = 8  # async 后端同时保持的最大 SMTP 连接数
 
 if (
     SMTP_SERVER == "Your smtp server"
@@ -67,8 +187,34 @@ if (
 ):
     raise ValueError("Please configure your SMTP settings.")
 
+# 待推送文章检查间隔（分钟）：到期订阅者的账本文章在此间隔内汇总发出，与爬取时间无关
+DIGEST_DISPATCH_INTERVAL_MINUTES = 5
+
+# 邮件统计缓冲写入间隔（秒），推送结束时也会立即写入
+EMAIL_STATS_FLUSH_INTERVAL = 60
+
+# 推送结束后批量更新订阅者发送时间的分块大小（每块一次提交）
+LAST_SENT_UPDATE_CHUNK_SIZE = 500
+
+# 待推送账本批量写入/删除时每条语句的行数（写入时每行占 3 个参数，
+# 保持在旧版 SQLite 单条语句 999 个参数的上限以内）
+PENDING_ARTICLES_CHUNK_SIZE = 300
+
 # 订阅者邮箱格式限制
 SUBSCRIBER_MASK = r"^\d+@stumail\.sztu\.edu\.cn$"
 
+# SQL 注入检测前置白名单：完全匹配以下任一格式的输入直接放行，不访问防火墙
+FIREWALL_ALLOWLIST_PATTERNS = [SUBSCRIBER_MASK]
+
+# 防火墙判定结果缓存（服务不可用时的放行结果不缓存）
+FIREWALL_VERDICT_CACHE_SIZE = 10000  # 最多缓存的输入数
+FIREWALL_VERDICT_CACHE_TTL = 600  # 有效期（秒）
+
+# 后台任务执行器（订阅确认邮件等不影响请求结果的副作用）
+BACKGROUND_TASK_WORKERS = 2  # 工作线程数
+BACKGROUND_TASK_QUEUE_SIZE = 200  # 等待执行的任务数上限
+# 队列已满时的策略：reject 丢弃并计数 / caller_runs 由请求线程直接执行
+BACKGROUND_TASK_OVERFLOW = "reject"
+
 # offical ip:host
 OFFICAL_URL = "localhost:5000"
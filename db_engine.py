@@ -0,0 +1,80 @@
+"""
+SQLite 数据库引擎工厂
+
+文章库（DatabaseManager）和订阅者库（EmailSubscriberManager）共用同一套连接参数：
+每个新连接建立时按 SQLITE_PRAGMAS 设置 WAL、同步级别、忙等待超时和缓存等，
+网页请求线程与爬虫线程同时读写时不再因默认的回滚日志模式互相锁库
+"""
+
+import logging
+
+from sqlalchemy import create_engine, event
+
+from config import SQLITE_PRAGMAS
+
+# 以数字返回的 PRAGMA 值 -> 名称，便于日志阅读
+_PRAGMA_VALUE_NAMES = {
+    "synchronous": {0: "OFF", 1: "NORMAL", 2: "FULL", 3: "EXTRA"},
+    "temp_store": {0: "DEFAULT", 1: "FILE", 2: "MEMORY"},
+}
+
+
+def _apply_pragmas(dbapi_connection, pragmas):
+    """在原始 sqlite3 连接上依次执行 PRAGMA，单项失败只记录警告"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            try:
+                cursor.execute(f"PRAGMA {name}={value}")
+            except Exception as e:
+                logging.warning(f"设置 SQLite PRAGMA {name}={value} 失败: {str(e)}")
+    finally:
+        cursor.close()
+
+
+def create_sqlite_engine(url, pragmas=None, **kwargs):
+    """
+    创建应用了统一连接参数的 SQLite 引擎
+
+    Args:
+        url: 数据库地址
+        pragmas: PRAGMA 名 -> 值，默认使用配置中的 SQLITE_PRAGMAS
+        **kwargs: 透传给 create_engine 的其他参数
+
+    Returns:
+        Engine: SQLAlchemy 引擎
+    """
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+    engine = create_engine(url, **kwargs)
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        _apply_pragmas(dbapi_connection, pragmas)
+
+    return engine
+
+
+def read_sqlite_settings(engine, names=None):
+    """
+    读取连接上实际生效的设置（如内存数据库不支持 WAL 时 journal_mode 为 memory）
+
+    Args:
+        engine: SQLAlchemy 引擎
+        names: 要读取的 PRAGMA 名，默认为配置中的全部项
+
+    Returns:
+        dict: PRAGMA 名 -> 生效值
+    """
+    names = list(SQLITE_PRAGMAS) if names is None else names
+    settings = {}
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        for name in names:
+            row = cursor.execute(f"PRAGMA {name}").fetchone()
+            value = row[0] if row else None
+            settings[name] = _PRAGMA_VALUE_NAMES.get(name, {}).get(value, value)
+        cursor.close()
+    finally:
+        connection.close()
+    return settings
@@ -6,12 +6,14 @@
 
 from .subscriber_manager import SubscriberService
 from .subscriberDB import EmailSubscriberManager, Platform, EmailSubscriberDB
+from .routing_index import SubscriberRoutingIndex
 
 __all__ = [
     "SubscriberService",
     "EmailSubscriberManager",
     "Platform",
     "EmailSubscriberDB",
+    "SubscriberRoutingIndex",
 ]
 
 __version__ = "1.0.0"
@@ -0,0 +1,218 @@
+"""
+asyncio 邮件发送后端
+
+在一个后台事件循环线程中并发多个 SMTP 会话，连接总数由信号量限制；
+同步代码通过 deliver() 阻塞等待结果，协程代码可直接 await deliver_async()
+
+依赖可选包 aiosmtplib（pip install aiosmtplib），未安装时 SubscriberService 退回阻塞发送
+"""
+
+import asyncio
+import collections
+import logging
+import threading
+
+try:
+    import aiosmtplib
+except ImportError:  # 可选依赖
+    aiosmtplib = None
+
+from .config import (
+    SMTP_SERVER,
+    SMTP_PORT,
+    SMTP_SECURITY,
+    SMTP_TIMEOUT,
+    SMTP_PASSWORD,
+    MY_EMAIL,
+    ASYNC_SMTP_MAX_CONNECTIONS,
+)
+
+
+def async_transport_available():
+    """是否已安装 aiosmtplib"""
+    return aiosmtplib is not None
+
+
+class AsyncSMTPTransport:
+    """基于 aiosmtplib 的并发邮件发送后端（线程安全，可被多个线程共享）"""
+
+    def __init__(
+        self,
+        host=SMTP_SERVER,
+        port=SMTP_PORT,
+        sender=MY_EMAIL,
+        password=SMTP_PASSWORD,
+        security=SMTP_SECURITY,
+        timeout=SMTP_TIMEOUT,
+        max_connections=ASYNC_SMTP_MAX_CONNECTIONS,
+        max_messages_per_connection=100,
+    ):
+        """
+        Args:
+            security: 连接加密方式，starttls / ssl / none
+            password: 为空时跳过登录（如本地测试服务器）
+            max_connections: 所有发送任务合计同时保持的最大连接数
+            max_messages_per_connection: 单个连接发送多少封后主动重建
+        """
+        if aiosmtplib is None:
+            raise RuntimeError("async 邮件后端需要安装 aiosmtplib")
+
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.password = password
+        self.security = security
+        self.timeout = timeout
+        self.max_connections = max(int(max_connections), 1)
+        self.max_messages_per_connection = max_messages_per_connection
+        self.connections_opened = 0
+        self.logger = logging.getLogger("SubscriberService")
+
+        self._loop = None
+        self._thread = None
+        self._slots = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_loop(self):
+        """首次使用时启动后台事件循环线程"""
+        with self._start_lock:
+            if self._loop is not None:
+                return self._loop
+
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                # 信号量需在事件循环内创建
+                self._slots = asyncio.Semaphore(self.max_connections)
+                ready.set()
+                loop.run_forever()
+
+            self._thread = threading.Thread(
+                target=run, name="AsyncSMTPTransport", daemon=True
+            )
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+            return loop
+
+    def submit(self, coro):
+        """
+        在后台事件循环中执行协程
+
+        Returns:
+            concurrent.futures.Future: 可在任意线程中等待的结果
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def deliver(self, message, receivers):
+        """
+        阻塞发送同一封邮件给多位收件人（每位收件人一封）
+
+        Args:
+            message: PreparedMessage 实例
+            receivers: 收件人邮箱列表
+
+        Returns:
+            set: 发送成功的收件人邮箱集合
+        """
+        if not receivers:
+            return set()
+        return self.submit(self._deliver(message, receivers)).result()
+
+    def deliver_async(self, message, receivers):
+        """deliver() 的协程版本，可在任意事件循环中 await，不阻塞调用线程"""
+        return asyncio.wrap_future(self.submit(self._deliver(message, receivers)))
+
+    async def _deliver(self, message, receivers):
+        """在后台事件循环中并发发送"""
+        pending = collections.deque(receivers)
+        delivered = set()
+        workers = min(self.max_connections, len(pending))
+        await asyncio.gather(
+            *(self._worker(pending, message, delivered) for _ in range(workers))
+        )
+        if pending:
+            self.logger.error(f"无法建立 SMTP 连接，{len(pending)} 位收件人未发送")
+        return delivered
+
+    async def _worker(self, pending, message, delivered):
+        """单个 SMTP 会话：持有一个连接，从共享队列中依次取收件人发送"""
+        async with self._slots:
+            client = None
+            sent_on_connection = 0
+            try:
+                while pending:
+                    receiver = pending.popleft()
+                    for attempt in range(2):
+                        if client is None:
+                            try:
+                                client = await self._open()
+                                sent_on_connection = 0
+                            except Exception as e:
+                                # 连接失败时把收件人放回队列，交给其他会话
+                                self.logger.error(f"连接 SMTP 服务器失败: {str(e)}")
+                                pending.appendleft(receiver)
+                                return
+                        try:
+                            await client.sendmail(
+                                self.sender,
+                                [receiver],
+                                message.for_recipient(receiver),
+                            )
+                            delivered.add(receiver)
+                            sent_on_connection += 1
+                            break
+                        except aiosmtplib.SMTPServerDisconnected as e:
+                            # 连接被服务器关闭，重连后重试当前收件人
+                            self.logger.warning(f"SMTP 连接断开，准备重连: {str(e)}")
+                            client = None
+                        except aiosmtplib.SMTPRecipientsRefused as e:
+                            self.logger.error(f"收件人被拒绝 {receiver}: {str(e)}")
+                            break
+                        except Exception as e:
+                            self.logger.error(f"发送邮件给 {receiver} 失败: {str(e)}")
+                            client = await self._close(client)
+                            break
+
+                    if (
+                        client is not None
+                        and sent_on_connection >= self.max_messages_per_connection
+                    ):
+                        client = await self._close(client)
+            finally:
+                await self._close(client)
+
+    async def _open(self):
+        """建立并登录 SMTP 连接"""
+        client = aiosmtplib.SMTP(
+            hostname=self.host,
+            port=self.port,
+            timeout=self.timeout,
+            use_tls=self.security == "ssl",
+            start_tls=self.security == "starttls",
+        )
+        await client.connect()
+        if self.password:
+            await client.login(self.sender, self.password)
+        self.connections_opened += 1
+        return client
+
+    async def _close(self, client):
+        """关闭 SMTP 连接（忽略关闭时的错误），返回 None 便于重置引用"""
+        if client is not None:
+            try:
+                await client.quit()
+            except Exception:
+                client.close()
+        return None
+
+    def close(self):
+        """停止后台事件循环"""
+        with self._start_lock:
+            if self._loop is None:
+                return
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._loop = None
@@ -0,0 +1,270 @@
+"""
+邮件推送性能测试
+
+在临时数据库中生成 N 个模拟订阅者，启动本地 SMTP 测试服务器，
+走一遍与 server.py 相同的推送流程（新文章写入待推送账本，再按到期分组发送汇总邮件），
+输出发送速度、SMTP 连接数和数据库提交次数
+
+用法:
+    python -m email_subscriber.benchmark -n 2000 --articles 5 --latency 0.005
+"""
+
+import argparse
+import asyncio
+import logging
+import pathlib
+import random
+import tempfile
+import time
+from datetime import date
+from types import SimpleNamespace
+
+from sqlalchemy import event, insert, update
+
+from .subscriberDB import (
+    EmailSubscriberManager,
+    EmailSubscriberDB,
+    Platform,
+    subscriber_platform,
+)
+from .subscriber_manager import SubscriberService
+from .smtp_sink import SMTPSink
+from .templates import DigestRenderer
+
+
+def seed_subscribers(db_manager, count, platform_ratio=0.5, seed=0):
+    """
+    批量写入模拟订阅者
+
+    Args:
+        db_manager: 订阅者数据库管理器
+        count: 订阅者数量
+        platform_ratio: 订阅部分平台（而非全部平台）的订阅者比例
+        seed: 随机数种子
+    """
+    rng = random.Random(seed)
+    session = db_manager.get_session()
+    try:
+        platform_ids = [pid for (pid,) in session.query(Platform.id).all()]
+        subscribers = []
+        for i in range(count):
+            subscribers.append(
+                {
+                    "id": i + 1,
+                    "email": f"{20260000000 + i}@stumail.sztu.edu.cn",
+                    "all_platforms": rng.random() >= platform_ratio,
+                    "send_frequency": 24,
+                    "last_email_sent_time": None,
+                }
+            )
+        session.execute(insert(EmailSubscriberDB), subscribers)
+
+        links = []
+        for sub in subscribers:
+            if not sub["all_platforms"]:
+                for pid in rng.sample(platform_ids, min(3, len(platform_ids))):
+                    links.append({"subscriber_id": sub["id"], "platform_id": pid})
+        if links:
+            session.execute(insert(subscriber_platform), links)
+        session.commit()
+    finally:
+        session.close()
+    db_manager.refresh_routing_index()
+
+
+def make_articles(platform, count, first_id=1):
+    """生成模拟文章（ID 从 first_id 开始连续编号）"""
+    today = date.today().isoformat()
+    return [
+        SimpleNamespace(
+            id=first_id + i,
+            title=f"{platform}测试公文 {i + 1}",
+            url=f"https://nbw.sztu.edu.cn/benchmark/{platform}/{i + 1}",
+            date=today,
+            detail_time="09:00",
+            source=platform,
+            ai_summary="",
+        )
+        for i in range(count)
+    ]
+
+
+def render_due_digests(service, renderer, articles_by_id):
+    """
+    取出到期订阅者的分组并渲染汇总邮件（对应 server.prepare_due_digests）
+
+    Returns:
+        list: [(文章ID元组, 订阅者行列表, 邮件主题, 邮件内容)]
+    """
+    digests = []
+    for ids, subscribers in service.get_due_digest_groups():
+        group_articles = [articles_by_id[i] for i in ids]
+        summaries = {article.url: article.ai_summary for article in group_articles}
+        subject, content = renderer.render_digest(group_articles, summaries)
+        digests.append((ids, subscribers, subject, content))
+    return digests
+
+
+def dispatch_due_digests(service, renderer, articles_by_id):
+    """
+    执行一次汇总推送（对应 server.start_digest_dispatch）：
+    async 后端在其事件循环中并发发送各组，否则逐组阻塞发送
+
+    Returns:
+        tuple: (成功发送数量, 到期订阅者数量)
+    """
+    if service.async_transport is None:
+        results = [
+            service.send_digest_group(subject, content, subscribers, ids)
+            for ids, subscribers, subject, content in render_due_digests(
+                service, renderer, articles_by_id
+            )
+        ]
+    else:
+
+        async def dispatch():
+            loop = asyncio.get_running_loop()
+            digests = await loop.run_in_executor(
+                None, render_due_digests, service, renderer, articles_by_id
+            )
+            return await asyncio.gather(
+                *(
+                    service.send_digest_group_async(subject, content, subscribers, ids)
+                    for ids, subscribers, subject, content in digests
+                )
+            )
+
+        results = service.async_transport.submit(dispatch()).result()
+
+    service.flush_stats()
+    return (
+        sum(success for success, _ in results),
+        sum(total for _, total in results),
+    )
+
+
+def run_benchmark(
+    subscribers=1000,
+    articles=5,
+    platforms=3,
+    latency=0.0,
+    failure_rate=0.0,
+    transport="smtp",
+    quiet=True,
+):
+    """
+    执行一次完整的推送性能测试
+
+    Returns:
+        dict: 测试结果
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = pathlib.Path(tmp) / "benchmark_subscribers.db"
+        db_manager = EmailSubscriberManager(db_url=f"sqlite:///{db_path}")
+        seed_subscribers(db_manager, subscribers)
+
+        sink = SMTPSink(port=0, latency=latency, failure_rate=failure_rate, seed=0)
+        port = sink.start()
+        service = SubscriberService(
+            db_manager, "127.0.0.1", port, "none", transport=transport
+        )
+        if quiet:
+            service.logger.setLevel(logging.WARNING)
+
+        commits = {"count": 0}
+
+        def on_commit(conn):
+            commits["count"] += 1
+
+        event.listen(db_manager.engine, "commit", on_commit)
+
+        platform_names = [
+            platform.name for platform in db_manager.get_all_platforms()[:platforms]
+        ]
+        renderer = DigestRenderer()
+        articles_by_id = {}
+        sent = 0
+        due = 0
+        start = time.perf_counter()
+        try:
+            for platform in platform_names:
+                # 每个平台开始前把所有订阅者重置为到期，保证每轮都是完整推送
+                session = db_manager.get_session()
+                session.execute(
+                    update(EmailSubscriberDB).values(last_email_sent_time=None)
+                )
+                session.commit()
+                session.close()
+
+                # 新文章写入订阅者的待推送账本，随后立即推送（与爬取后的推送阶段相同）
+                first_id = len(articles_by_id) + 1
+                new_articles = make_articles(platform, articles, first_id)
+                articles_by_id.update((article.id, article) for article in new_articles)
+                service.enqueue_new_articles(
+                    [(article.id, article.source) for article in new_articles]
+                )
+                success, total = dispatch_due_digests(service, renderer, articles_by_id)
+                sent += success
+                due += total
+        finally:
+            elapsed = time.perf_counter() - start
+            event.remove(db_manager.engine, "commit", on_commit)
+            if service.async_transport is not None:
+                service.async_transport.close()
+            sink.stop()
+            db_manager.engine.dispose()
+
+        sink_stats = sink.snapshot()
+        return {
+            "transport": "async" if service.async_transport else "smtp",
+            "subscribers": subscribers,
+            "platforms": len(platform_names),
+            "due": due,
+            "sent": sent,
+            "sink_messages": sink_stats["messages"],
+            "sink_failures": sink_stats["failures"],
+            "connections": sink_stats["connections"],
+            # 扣除每轮重置发送时间的提交
+            "db_commits": commits["count"] - len(platform_names),
+            "elapsed": elapsed,
+            "messages_per_sec": sent / elapsed if elapsed > 0 else 0.0,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="邮件推送性能测试（使用本地 SMTP 测试服务器）")
+    parser.add_argument("-n", "--subscribers", type=int, default=1000, help="模拟订阅者数量")
+    parser.add_argument("--articles", type=int, default=5, help="每个平台的文章数量")
+    parser.add_argument("--platforms", type=int, default=3, help="推送的平台数量")
+    parser.add_argument("--latency", type=float, default=0.0, help="SMTP 每封邮件的模拟延迟（秒）")
+    parser.add_argument(
+        "--failure-rate", type=float, default=0.0, help="SMTP 每封邮件的模拟失败概率（0-1）"
+    )
+    parser.add_argument(
+        "--transport", choices=["smtp", "async"], default="smtp", help="邮件发送后端"
+    )
+    parser.add_argument("--verbose", "-v", action="store_true", help="输出推送过程日志")
+    args = parser.parse_args()
+
+    result = run_benchmark(
+        args.subscribers,
+        args.articles,
+        args.platforms,
+        args.latency,
+        args.failure_rate,
+        args.transport,
+        quiet=not args.verbose,
+    )
+
+    print("\n📈 邮件推送性能测试结果:")
+    print(f"🚚 发送后端: {result['transport']}")
+    print(f"👥 订阅者: {result['subscribers']}，推送平台: {result['platforms']}")
+    print(f"📬 到期收件人: {result['due']}，发送成功: {result['sent']}")
+    print(f"📮 测试服务器收到: {result['sink_messages']}，模拟失败: {result['sink_failures']}")
+    print(f"🔌 SMTP 连接数: {result['connections']}")
+    print(f"💾 数据库提交次数: {result['db_commits']}")
+    print(f"⏱️ 耗时: {result['elapsed']:.2f} 秒，{result['messages_per_sec']:.1f} 封/秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""
+群发邮件模块
+
+向全部订阅者发送公告类邮件：连接池复用 SMTP 连接，速率和并发可配置，
+投递结果写入 campaign_deliveries 表，中断后重新运行会跳过已发送的收件人
+"""
+
+import hashlib
+import logging
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from rate_limiter import RateLimiter
+
+from .subscriberDB import EmailSubscriberManager
+from .smtp_pool import SMTPConnectionPool
+from .templates import PreparedMessage
+from .config import MY_EMAIL
+
+# 每累积多少条投递结果写一次检查点（单次提交）
+CHECKPOINT_BATCH_SIZE = 50
+
+# 进度输出的最小间隔（秒）
+PROGRESS_INTERVAL = 5
+
+
+def default_campaign_id(name, subject, content):
+    """根据名称和邮件内容生成群发任务标识，相同内容重复运行时即为续发"""
+    digest = hashlib.sha1(f"{subject}\n{content}".encode("utf-8")).hexdigest()
+    return f"{name}-{digest[:12]}"
+
+
+class CampaignSender:
+    """群发邮件发送器"""
+
+    def __init__(
+        self,
+        campaign_id,
+        subject,
+        content,
+        is_html=True,
+        rate=5.0,
+        concurrency=4,
+        dry_run=False,
+        db_manager=None,
+        connect=None,
+    ):
+        """
+        Args:
+            campaign_id: 群发任务标识，用于断点续发
+            subject: 邮件主题
+            content: 邮件内容
+            is_html: 是否为HTML格式内容
+            rate: 每秒最多发送的邮件数（<=0 表示不限速）
+            concurrency: 同时使用的 SMTP 连接数
+            dry_run: 只列出收件人，不实际发送也不写检查点
+            db_manager: 订阅者数据库管理器，默认新建
+            connect: 自定义 SMTP 连接函数（默认使用项目配置）
+        """
+        self.campaign_id = campaign_id
+        self.subject = subject
+        self.is_html = is_html
+        self.concurrency = max(int(concurrency), 1)
+        self.dry_run = dry_run
+        self.db_manager = db_manager or EmailSubscriberManager()
+        self.message = PreparedMessage(MY_EMAIL, subject, content, is_html)
+        self.rate_limiter = RateLimiter(rate)
+        self.pool = SMTPConnectionPool(self.concurrency, connect=connect)
+
+    def pending_receivers(self, receivers=None):
+        """获取本次需要发送的收件人（跳过检查点中已发送的邮箱）"""
+        if receivers is None:
+            receivers = [sub.email for sub in self.db_manager.get_all_subscribers()]
+        already_sent = self.db_manager.get_campaign_sent_emails(self.campaign_id)
+        # 去重并保持原有顺序
+        seen = set()
+        pending = []
+        for email in receivers:
+            if email in already_sent or email in seen:
+                continue
+            seen.add(email)
+            pending.append(email)
+        return pending, len(already_sent)
+
+    def send_single(self, receiver):
+        """
+        发送单封测试邮件（不写检查点）
+
+        Returns:
+            tuple: (邮箱, 状态, 错误信息)
+        """
+        if self.dry_run:
+            return receiver, "dry-run", None
+        try:
+            return self._send_one(receiver)
+        finally:
+            self.pool.close_all()
+
+    def _send_one(self, receiver):
+        """发送单封邮件，返回 (邮箱, 状态, 错误信息)"""
+        self.rate_limiter.acquire()
+        try:
+            with self.pool.connection() as server:
+                server.sendmail(
+                    MY_EMAIL, [receiver], self.message.for_recipient(receiver)
+                )
+            return receiver, "sent", None
+        except smtplib.SMTPServerDisconnected:
+            # 连接被服务器关闭，换一个新连接重试一次
+            try:
+                with self.pool.connection() as server:
+                    server.sendmail(
+                        MY_EMAIL, [receiver], self.message.for_recipient(receiver)
+                    )
+                return receiver, "sent", None
+            except Exception as e:
+                return receiver, "failed", str(e)
+        except Exception as e:
+            return receiver, "failed", str(e)
+
+    def run(self, receivers=None):
+        """
+        执行群发
+
+        Args:
+            receivers: 收件人邮箱列表，默认全部订阅者
+
+        Returns:
+            dict: 发送结果统计
+        """
+        pending, skipped = self.pending_receivers(receivers)
+        total = len(pending)
+        summary = {
+            "campaign_id": self.campaign_id,
+            "total": total,
+            "skipped": skipped,
+            "sent": 0,
+            "failed": 0,
+            "connections": 0,
+            "elapsed": 0.0,
+            "interrupted": False,
+        }
+
+        print(f"📊 群发任务 {self.campaign_id}: 待发送 {total}，已发送跳过 {skipped}")
+        if self.dry_run:
+            for email in pending[:20]:
+                print(f"   [dry-run] {email}")
+            if total > 20:
+                print(f"   [dry-run] ... 其余 {total - 20} 个收件人")
+            return summary
+        if not pending:
+            return summary
+
+        start = time.monotonic()
+        last_progress = start
+        checkpoint = []
+        handled = set()
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        futures = [executor.submit(self._send_one, email) for email in pending]
+
+        try:
+            for done_count, future in enumerate(as_completed(futures), 1):
+                handled.add(future)
+                email, status, error = future.result()
+                checkpoint.append((email, status, error))
+                if status == "sent":
+                    summary["sent"] += 1
+                else:
+                    summary["failed"] += 1
+                    logging.warning(f"发送邮件给 {email} 失败: {error}")
+
+                if len(checkpoint) >= CHECKPOINT_BATCH_SIZE:
+                    self._write_checkpoint(checkpoint)
+                    checkpoint = []
+
+                now = time.monotonic()
+                if now - last_progress >= PROGRESS_INTERVAL or done_count == total:
+                    last_progress = now
+                    self._print_progress(done_count, total, summary, now - start)
+        except KeyboardInterrupt:
+            summary["interrupted"] = True
+            print("\n⚠️ 用户中断，正在保存进度...")
+            for future in futures:
+                future.cancel()
+        finally:
+            executor.shutdown(wait=True)
+            # 中断时已完成但尚未处理的结果也写入检查点
+            for future in futures:
+                if future in handled or future.cancelled() or not future.done():
+                    continue
+                checkpoint.append(future.result())
+                if future.result()[1] == "sent":
+                    summary["sent"] += 1
+                else:
+                    summary["failed"] += 1
+            self._write_checkpoint(checkpoint)
+            self.pool.close_all()
+            self.db_manager.flush_email_stats()
+
+        summary["connections"] = self.pool.connections_opened
+        summary["elapsed"] = time.monotonic() - start
+        return summary
+
+    def _write_checkpoint(self, results):
+        """写入检查点并更新邮件统计"""
+        if not results:
+            return
+        self.db_manager.record_campaign_deliveries(self.campaign_id, results)
+        sent = sum(1 for _, status, _ in results if status == "sent")
+        if sent:
+            self.db_manager.increment_emails_sent(sent)
+
+    def _print_progress(self, done, total, summary, elapsed):
+        """输出进度和预计剩余时间"""
+        speed = done / elapsed if elapsed > 0 else 0
+        eta = (total - done) / speed if speed > 0 else 0
+        print(
+            f"[{done}/{total}] ✅ {summary['sent']} ❌ {summary['failed']} "
+            f"| {speed:.1f} 封/秒 | 预计剩余 {eta:.0f} 秒"
+        )
+
+
+def add_campaign_arguments(parser):
+    """为群发脚本添加通用命令行参数"""
+    parser.add_argument(
+        "--force", "-f", action="store_true", help="直接发送邮件而不确认"
+    )
+    parser.add_argument(
+        "--single", "-s", type=str, help="向单个邮箱地址发送测试邮件，而不是所有订阅者"
+    )
+    parser.add_argument(
+        "--rate", type=float, default=5.0, help="每秒最多发送的邮件数（默认 5）"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=4, help="同时使用的 SMTP 连接数（默认 4）"
+    )
+    parser.add_argument(
+        "--campaign-id", type=str, help="群发任务标识（默认根据邮件内容生成，用于断点续发）"
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="只列出待发送的收件人，不实际发送"
+    )
+
+
+def run_campaign_from_args(args, name, subject, content, test_subject=None):
+    """
+    根据命令行参数执行群发或单封测试发送
+
+    Args:
+        args: add_campaign_arguments 解析出的参数
+        name: 群发任务名称（用于生成默认任务标识）
+        subject: 邮件主题
+        content: 邮件内容
+        test_subject: 单封测试邮件的主题，默认与 subject 相同
+
+    Returns:
+        dict: 发送结果统计；用户取消时返回 None
+    """
+    if args.single:
+        print(f"🚀 开始发送测试邮件到: {args.single}")
+        sender = CampaignSender(
+            f"{name}-test",
+            test_subject or subject,
+            content,
+            rate=0,
+            concurrency=1,
+            dry_run=args.dry_run,
+        )
+        _, status, error = sender.send_single(args.single)
+        print(f"结果: {status}" + (f"（{error}）" if error else ""))
+        return {"sent": int(status == "sent"), "failed": int(status == "failed")}
+
+    campaign_id = args.campaign_id or default_campaign_id(name, subject, content)
+    sender = CampaignSender(
+        campaign_id,
+        subject,
+        content,
+        rate=args.rate,
+        concurrency=args.concurrency,
+        dry_run=args.dry_run,
+    )
+
+    if not args.force and not args.dry_run:
+        pending, skipped = sender.pending_receivers()
+        if not pending:
+            print("✅ 没有需要发送的收件人（可能已全部发送）")
+            return None
+        response = input(
+            f"确认发送给 {len(pending)} 位订阅者（已发送 {skipped} 位将跳过）? (y/n): "
+        )
+        if response.lower() != "y":
+            print("⚠️ 操作已取消")
+            return None
+
+    summary = sender.run()
+    print("\n📈 发送结果统计:")
+    print(f"✅ 成功: {summary['sent']}")
+    print(f"❌ 失败: {summary['failed']}")
+    print(f"⏭️ 已跳过: {summary['skipped']}")
+    print(f"🔌 SMTP 连接数: {summary['connections']}")
+    print(f"⏱️ 耗时: {summary['elapsed']:.1f} 秒")
+    if summary["interrupted"] or summary["failed"]:
+        print(f"💡 使用相同参数重新运行即可从断点继续（任务标识: {campaign_id}）")
+    return summary
@@ -14,9 +14,18 @@ from config import (
     DATABASE_DIR,
     SUBSCRIBERS_DATABASE_URI as DB_URL,
     SMTP_SERVER,
+    SMTP_PORT,
+    SMTP_SECURITY,
+    SMTP_TIMEOUT,
+    EMAIL_TRANSPORT,
+    ASYNC_SMTP_MAX_CONNECTIONS,
     SMTP_PASSWORD,
     MY_EMAIL,
     SUBSCRIBER_MASK,
+    OFFICAL_URL,
+    EMAIL_STATS_FLUSH_INTERVAL,
+    LAST_SENT_UPDATE_CHUNK_SIZE,
+    PENDING_ARTICLES_CHUNK_SIZE,
 )
 
 # 保持向后兼容
@@ -0,0 +1,133 @@
+"""
+订阅路由索引模块
+
+在内存中维护 平台名称 -> 平台ID -> 订阅者ID集合 的映射，
+文章推送时通过集合运算确定收件人，无需加载 ORM 对象
+"""
+
+import threading
+
+
+class SubscriberRoutingIndex:
+    """平台到订阅者的内存路由索引（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._platform_ids = {}  # 平台名称 -> 平台ID
+        self._platform_names = {}  # 平台ID -> 平台名称
+        self._platform_subscribers = {}  # 平台ID -> 订阅者ID集合
+        self._all_platform_subscribers = set()  # 订阅全部平台的订阅者ID集合
+        self._subscriber_platforms = {}  # 订阅者ID -> 平台ID集合（用于增量更新）
+
+    def load(self, platform_rows, subscriber_rows, link_rows):
+        """
+        从数据库行全量构建索引
+
+        Args:
+            platform_rows: (平台ID, 平台名称) 序列
+            subscriber_rows: (订阅者ID, 是否订阅全部平台) 序列
+            link_rows: subscriber_platform 表的 (订阅者ID, 平台ID) 序列
+        """
+        platform_ids = {}
+        platform_names = {}
+        platform_subscribers = {}
+        for platform_id, name in platform_rows:
+            platform_ids[name] = platform_id
+            platform_names[platform_id] = name
+            platform_subscribers[platform_id] = set()
+
+        all_platform_subscribers = set()
+        subscriber_platforms = {}
+        for subscriber_id, all_platforms in subscriber_rows:
+            subscriber_platforms[subscriber_id] = set()
+            if all_platforms:
+                all_platform_subscribers.add(subscriber_id)
+
+        for subscriber_id, platform_id in link_rows:
+            # 全平台订阅者的遗留关联记录不参与路由
+            if subscriber_id in all_platform_subscribers:
+                continue
+            if subscriber_id not in subscriber_platforms:
+                continue
+            subscriber_platforms[subscriber_id].add(platform_id)
+            platform_subscribers.setdefault(platform_id, set()).add(subscriber_id)
+
+        with self._lock:
+            self._platform_ids = platform_ids
+            self._platform_names = platform_names
+            self._platform_subscribers = platform_subscribers
+            self._all_platform_subscribers = all_platform_subscribers
+            self._subscriber_platforms = subscriber_platforms
+
+    def set_subscription(self, subscriber_id, all_platforms, platform_ids=None):
+        """新增或更新单个订阅者的订阅设置"""
+        with self._lock:
+            self._detach(subscriber_id)
+            self._subscriber_platforms[subscriber_id] = set()
+            if all_platforms:
+                self._all_platform_subscribers.add(subscriber_id)
+                return
+            for platform_id in platform_ids or []:
+                self._subscriber_platforms[subscriber_id].add(platform_id)
+                self._platform_subscribers.setdefault(platform_id, set()).add(
+                    subscriber_id
+                )
+
+    def remove_subscriber(self, subscriber_id):
+        """从索引中移除订阅者"""
+        with self._lock:
+            self._detach(subscriber_id)
+
+    def _detach(self, subscriber_id):
+        """解除订阅者与所有平台的关联（调用方需持有锁）"""
+        self._all_platform_subscribers.discard(subscriber_id)
+        for platform_id in self._subscriber_platforms.pop(subscriber_id, ()):
+            subscribers = self._platform_subscribers.get(platform_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber_id)
+
+    def get_platform_id(self, platform_name):
+        """根据平台名称获取平台ID，不存在返回 None"""
+        with self._lock:
+            return self._platform_ids.get(platform_name)
+
+    def get_platform_name(self, platform_id):
+        """根据平台ID获取平台名称，不存在返回 None"""
+        with self._lock:
+            return self._platform_names.get(platform_id)
+
+    def subscribers_for_platform_id(self, platform_id):
+        """获取应接收该平台文章的订阅者ID集合（含全平台订阅者）"""
+        with self._lock:
+            return self._all_platform_subscribers | self._platform_subscribers.get(
+                platform_id, set()
+            )
+
+    def subscribers_for_platforms(self, platform_names):
+        """
+        获取一批平台文章的全部收件人ID（集合并运算）
+
+        Args:
+            platform_names: 平台名称可迭代对象
+
+        Returns:
+            set: 订阅者ID集合；没有任何已知平台时返回空集合
+        """
+        with self._lock:
+            recipients = set()
+            matched = False
+            for name in platform_names:
+                platform_id = self._platform_ids.get(name)
+                if platform_id is None:
+                    continue
+                matched = True
+                recipients |= self._platform_subscribers.get(platform_id, set())
+            if matched:
+                recipients |= self._all_platform_subscribers
+            return recipients
+
+    @property
+    def subscriber_count(self):
+        """索引中的订阅者总数"""
+        with self._lock:
+            return len(self._subscriber_platforms)
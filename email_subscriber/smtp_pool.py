@@ -0,0 +1,111 @@
+"""
+SMTP 连接模块
+
+提供统一的 SMTP 连接创建和连接池（发送限速见根目录 rate_limiter.py）
+"""
+
+import queue
+import smtplib
+import threading
+from contextlib import contextmanager
+
+from .config import (
+    SMTP_SERVER,
+    SMTP_PORT,
+    SMTP_SECURITY,
+    SMTP_TIMEOUT,
+    SMTP_PASSWORD,
+    MY_EMAIL,
+)
+
+
+def create_smtp_connection(
+    host=SMTP_SERVER,
+    port=SMTP_PORT,
+    sender=MY_EMAIL,
+    password=SMTP_PASSWORD,
+    security=SMTP_SECURITY,
+    timeout=SMTP_TIMEOUT,
+):
+    """
+    建立并登录 SMTP 连接
+
+    Args:
+        security: 连接加密方式，starttls / ssl / none
+        password: 为空时跳过登录（如本地测试服务器）
+    """
+    if security == "ssl":
+        server = smtplib.SMTP_SSL(host, port, timeout=timeout)
+    else:
+        server = smtplib.SMTP(host, port, timeout=timeout)
+        if security == "starttls":
+            server.starttls()
+    if password:
+        server.login(sender, password)
+    return server
+
+
+def close_smtp_connection(server):
+    """关闭 SMTP 连接（忽略关闭时的错误），返回 None 便于重置引用"""
+    if server is not None:
+        try:
+            server.quit()
+        except Exception:
+            pass
+    return None
+
+
+class SMTPConnectionPool:
+    """
+    SMTP 连接池
+
+    最多同时持有 size 个连接；连接在发送 max_messages_per_connection 封后主动关闭重建，
+    发送出错的连接直接丢弃（收件人被拒绝除外，此时连接仍可继续使用）
+    """
+
+    def __init__(self, size=4, connect=None, max_messages_per_connection=100):
+        self.size = size
+        self.max_messages_per_connection = max_messages_per_connection
+        self._connect = connect or create_smtp_connection
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+
+    @contextmanager
+    def connection(self):
+        """借出一个连接，用完自动归还"""
+        self._slots.acquire()
+        try:
+            try:
+                server, used = self._idle.get_nowait()
+            except queue.Empty:
+                server, used = self._connect(), 0
+                with self._lock:
+                    self.connections_opened += 1
+
+            try:
+                yield server
+            except smtplib.SMTPRecipientsRefused:
+                self._idle.put((server, used))
+                raise
+            except Exception:
+                close_smtp_connection(server)
+                raise
+            else:
+                used += 1
+                if used >= self.max_messages_per_connection:
+                    close_smtp_connection(server)
+                else:
+                    self._idle.put((server, used))
+        finally:
+            self._slots.release()
+
+    def close_all(self):
+        """关闭所有空闲连接"""
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            close_smtp_connection(server)
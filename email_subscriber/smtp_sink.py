@@ -0,0 +1,204 @@
+"""
+本地 SMTP 测试服务器
+
+接收并丢弃所有邮件，可模拟每封邮件的处理延迟和随机失败，
+用于在不打扰真实邮箱的情况下测量邮件发送性能
+
+用法:
+    python -m email_subscriber.smtp_sink --port 8025 --latency 0.02 --failure-rate 0.01
+"""
+
+import argparse
+import asyncio
+import random
+import threading
+import time
+
+
+class SMTPSink:
+    """基于 asyncio 的最小 SMTP 服务器（接受任意认证，不支持 STARTTLS）"""
+
+    def __init__(
+        self, host="127.0.0.1", port=8025, latency=0.0, failure_rate=0.0, seed=None
+    ):
+        """
+        Args:
+            host: 监听地址
+            port: 监听端口，0 表示随机分配
+            latency: 每封邮件在 DATA 结束后的模拟处理延迟（秒）
+            failure_rate: 每封邮件返回 451 临时失败的概率（0-1）
+            seed: 随机数种子，便于复现
+        """
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self.stats = {
+            "connections": 0,
+            "messages": 0,
+            "recipients": 0,
+            "failures": 0,
+            "bytes": 0,
+        }
+
+    def _count(self, key, value=1):
+        with self._lock:
+            self.stats[key] += value
+
+    def snapshot(self):
+        """获取当前统计数据的副本"""
+        with self._lock:
+            return dict(self.stats)
+
+    async def _handle(self, reader, writer):
+        """处理单个 SMTP 会话"""
+        self._count("connections")
+
+        def reply(line):
+            writer.write(f"{line}\r\n".encode("ascii"))
+
+        reply("220 goldenmouse-sink ESMTP")
+        recipients = []
+        try:
+            while True:
+                await writer.drain()
+                raw = await reader.readline()
+                if not raw:
+                    break
+                command = raw.decode("utf-8", "replace").strip()
+                verb = command[:4].upper()
+
+                if verb == "EHLO":
+                    reply("250-goldenmouse-sink")
+                    reply("250-AUTH PLAIN LOGIN")
+                    reply("250-8BITMIME")
+                    reply("250 SIZE 52428800")
+                elif verb == "HELO":
+                    reply("250 goldenmouse-sink")
+                elif verb == "AUTH":
+                    await self._handle_auth(command.split(), reader, writer, reply)
+                elif verb == "MAIL":
+                    recipients = []
+                    reply("250 2.1.0 OK")
+                elif verb == "RCPT":
+                    recipients.append(command)
+                    reply("250 2.1.5 OK")
+                elif verb == "DATA":
+                    reply("354 End data with <CR><LF>.<CR><LF>")
+                    await writer.drain()
+                    size = 0
+                    while True:
+                        line = await reader.readline()
+                        if not line or line == b".\r\n":
+                            break
+                        size += len(line)
+                    if self.latency > 0:
+                        await asyncio.sleep(self.latency)
+                    if self.failure_rate > 0 and self._random.random() < self.failure_rate:
+                        self._count("failures")
+                        reply("451 4.3.0 Simulated temporary failure")
+                    else:
+                        self._count("messages")
+                        self._count("recipients", len(recipients))
+                        self._count("bytes", size)
+                        reply("250 2.0.0 OK: queued")
+                    recipients = []
+                elif verb == "RSET":
+                    recipients = []
+                    reply("250 2.0.0 OK")
+                elif verb == "NOOP":
+                    reply("250 2.0.0 OK")
+                elif verb == "QUIT":
+                    reply("221 2.0.0 Bye")
+                    await writer.drain()
+                    break
+                elif verb == "STAR":
+                    reply("454 4.7.0 TLS not available")
+                else:
+                    reply("502 5.5.2 Command not recognized")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_auth(self, parts, reader, writer, reply):
+        """接受任意 AUTH PLAIN / LOGIN 认证"""
+        mechanism = parts[1].upper() if len(parts) > 1 else ""
+        if mechanism == "PLAIN" and len(parts) < 3:
+            reply("334 ")
+            await writer.drain()
+            await reader.readline()
+        elif mechanism == "LOGIN":
+            if len(parts) < 3:
+                reply("334 VXNlcm5hbWU6")
+                await writer.drain()
+                await reader.readline()
+            reply("334 UGFzc3dvcmQ6")
+            await writer.drain()
+            await reader.readline()
+        reply("235 2.7.0 Authentication successful")
+
+    def start(self):
+        """在后台线程中启动服务器，返回实际监听端口"""
+        ready = threading.Event()
+        self._loop = asyncio.new_event_loop()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port)
+            )
+            self.port = self._server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="SMTPSink", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self.port
+
+    def stop(self):
+        """停止服务器"""
+        if self._loop is None:
+            return
+
+        async def shutdown():
+            self._server.close()
+            await self._server.wait_closed()
+            self._loop.stop()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop)
+        self._thread.join(timeout=5)
+        self._loop = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 SMTP 测试服务器（丢弃所有邮件）")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8025, help="监听端口")
+    parser.add_argument("--latency", type=float, default=0.0, help="每封邮件的模拟延迟（秒）")
+    parser.add_argument(
+        "--failure-rate", type=float, default=0.0, help="每封邮件的模拟失败概率（0-1）"
+    )
+    args = parser.parse_args()
+
+    sink = SMTPSink(args.host, args.port, args.latency, args.failure_rate)
+    port = sink.start()
+    print(f"📮 SMTP 测试服务器已启动: {args.host}:{port}")
+    print("   在 config.py 中设置 SMTP_SERVER/SMTP_PORT 指向此地址，SMTP_SECURITY = \"none\"")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"📊 {sink.snapshot()}")
+    except KeyboardInterrupt:
+        sink.stop()
+        print(f"\n📊 最终统计: {sink.snapshot()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+邮件统计计数器模块
+
+在进程内累积已发送邮件数，按时间间隔或在一次推送结束时批量写入数据库；
+订阅者数量同样在内存中维护，按时间间隔重新统计
+"""
+
+import logging
+import threading
+import time
+
+
+class EmailStatsCounter:
+    """已发送邮件数的缓冲计数器（线程安全）"""
+
+    def __init__(self, persist, flush_interval=60):
+        """
+        Args:
+            persist: 持久化回调，接收待写入的增量，返回数据库中的最新总数
+            flush_interval: 自动写入数据库的最小间隔（秒）
+        """
+        self._persist = persist
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._persisted_total = 0
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def load(self, persisted_total):
+        """设置数据库中已持久化的总数"""
+        with self._lock:
+            self._persisted_total = persisted_total or 0
+
+    def add(self, count=1):
+        """
+        累加已发送邮件数，距上次写入超过间隔时自动写入
+
+        Returns:
+            int: 当前总数（含未写入部分）
+        """
+        with self._lock:
+            self._pending += count
+            total = self._persisted_total + self._pending
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+
+        if due:
+            self.flush()
+        return total
+
+    def flush(self):
+        """
+        将累积的增量写入数据库
+
+        Returns:
+            int: 本次写入的增量；写入失败时增量保留到下次
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending = self._pending
+                self._pending = 0
+                self._last_flush = time.monotonic()
+
+            if pending == 0:
+                return 0
+
+            persisted_total = self._persist(pending)
+            with self._lock:
+                if persisted_total is None:
+                    # 写入失败，增量放回缓冲区
+                    self._pending += pending
+                    logging.warning(f"邮件统计写入失败，保留 {pending} 封待下次写入")
+                    return 0
+                self._persisted_total = persisted_total
+            return pending
+
+    @property
+    def total(self):
+        """当前总数（含未写入部分）"""
+        with self._lock:
+            return self._persisted_total + self._pending
+
+    @property
+    def pending(self):
+        """尚未写入数据库的增量"""
+        with self._lock:
+            return self._pending
+
+
+class SubscriberCounter:
+    """订阅者数量计数器（线程安全）"""
+
+    def __init__(self, load, refresh_interval=60):
+        """
+        Args:
+            load: 统计回调，返回数据库中的订阅者数量，失败时返回 None
+            refresh_interval: 重新统计的最小间隔（秒），用于计入其他进程的增删
+        """
+        self._load = load
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._count = 0
+        self._loaded_at = None
+
+    def refresh(self):
+        """从数据库重新统计，返回当前数量"""
+        count = self._load()
+        with self._lock:
+            self._loaded_at = time.monotonic()
+            if count is not None:
+                self._count = count
+            return self._count
+
+    def add(self, delta=1):
+        """本进程增删订阅者后调整数量"""
+        with self._lock:
+            self._count = max(self._count + delta, 0)
+
+    @property
+    def value(self):
+        """当前数量，距上次统计超过间隔时先重新统计"""
+        with self._lock:
+            due = (
+                self._loaded_at is None
+                or time.monotonic() - self._loaded_at >= self.refresh_interval
+            )
+            if not due:
+                return self._count
+        return self.refresh()
@@ -1,5 +1,4 @@
 from sqlalchemy import (
-    create_engine,
     Column,
     Integer,
     String,
@@ -7,14 +6,28 @@ from sqlalchemy import (
     ForeignKey,
     Boolean,
     DateTime,
+    UniqueConstraint,
+    func,
+    or_,
     text,  # 添加 text 导入
 )
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import sessionmaker, declarative_base, relationship
 from sqlalchemy.exc import IntegrityError
+import atexit
 import logging
 import pathlib
 from datetime import datetime
-from .config import DB_DIR, DB_URL
+from .config import (
+    DB_DIR,
+    DB_URL,
+    EMAIL_STATS_FLUSH_INTERVAL,
+    LAST_SENT_UPDATE_CHUNK_SIZE,
+    PENDING_ARTICLES_CHUNK_SIZE,
+)
+from db_engine import create_sqlite_engine, read_sqlite_settings
+from .routing_index import SubscriberRoutingIndex
+from .stats_counter import EmailStatsCounter, SubscriberCounter
 
 # 创建 Base 类
 Base = declarative_base()
@@ -74,18 +87,58 @@ class EmailStats(Base):
         return f"EmailStats(id={self.id}, total_emails_sent={self.total_emails_sent})"
 
 
+class CampaignDelivery(Base):
+    """群发任务投递记录（断点续发的检查点）"""
+
+    __tablename__ = "campaign_deliveries"
+    __table_args__ = (UniqueConstraint("campaign_id", "email"),)
+
+    id = Column(Integer, primary_key=True)
+    campaign_id = Column(String, index=True)  # 群发任务标识
+    email = Column(String)  # 收件人邮箱
+    status = Column(String)  # sent / failed
+    attempts = Column(Integer, default=1)  # 尝试次数
+    error = Column(String, nullable=True)  # 最近一次失败原因
+    updated_at = Column(DateTime)  # 最近一次尝试时间
+
+    def __repr__(self):
+        return f"CampaignDelivery(campaign_id='{self.campaign_id}', email='{self.email}', status='{self.status}')"
+
+
+class PendingArticle(Base):
+    """待推送文章账本：文章入库时为每个收件人记录一条，推送成功后删除"""
+
+    __tablename__ = "pending_articles"
+
+    # 复合主键 (subscriber_id, article_id) 的索引以 subscriber_id 开头，按订阅者查找账本时使用
+    subscriber_id = Column(
+        Integer, ForeignKey("email_subscribers.id"), primary_key=True
+    )
+    article_id = Column(Integer, primary_key=True)  # 公文数据库中的文章ID
+    created_at = Column(DateTime, default=datetime.now)  # 入账时间
+
+    def __repr__(self):
+        return f"PendingArticle(subscriber_id={self.subscriber_id}, article_id={self.article_id})"
+
+
 class EmailSubscriberManager:
     """邮箱订阅者管理类"""
 
-    def __init__(self):
-        """初始化数据库连接"""
+    def __init__(self, db_url=None):
+        """
+        初始化数据库连接
+
+        Args:
+            db_url: 数据库地址，默认使用配置中的订阅者数据库（基准测试时可指定临时数据库）
+        """
         # 确保数据库目录存在
         DB_DIR.mkdir(parents=True, exist_ok=True)
 
-        self.url = DB_URL
-        self.engine = create_engine(DB_URL)
+        self.url = db_url or DB_URL
+        self.engine = create_sqlite_engine(self.url)
         print(f"数据库目录已存在: {DB_DIR.exists()}")
-        print(f"连接数据库: {DB_URL}")
+        print(f"连接数据库: {self.url}")
+        print(f"SQLite 设置: {read_sqlite_settings(self.engine)}")
 
         # 创建或更新所有表
         Base.metadata.create_all(self.engine)
@@ -100,8 +153,51 @@ class EmailSubscriberManager:
         # 检查数据库兼容性并处理老用户
         self._ensure_database_compatibility()
 
+        # 构建平台 -> 订阅者路由索引
+        self.routing_index = SubscriberRoutingIndex()
+        self.refresh_routing_index()
+
+        # 邮件统计缓冲计数器，进程退出时写入剩余增量
+        self.stats_counter = EmailStatsCounter(
+            self._persist_emails_sent, EMAIL_STATS_FLUSH_INTERVAL
+        )
+        self.stats_counter.load(self._load_emails_sent())
+        atexit.register(self.flush_email_stats)
+
+        # 订阅者数量：启动时统计一次，增删订阅者时调整，按统计写入间隔重新统计
+        self.subscriber_counter = SubscriberCounter(
+            self._count_subscribers, EMAIL_STATS_FLUSH_INTERVAL
+        )
+        self.subscriber_counter.refresh()
+
         print("数据库初始化完成")
 
+    def refresh_routing_index(self):
+        """
+        从 subscriber_platform 表全量重建路由索引
+
+        索引只在本进程内维护：其他进程写入的订阅变更需要重新调用本方法才能看到。
+        构建失败时抛出异常，不会留下空的或半成品索引让平台筛选静默地没有收件人
+        """
+        session = self.get_session()
+        try:
+            platform_rows = session.query(Platform.id, Platform.name).all()
+            subscriber_rows = session.query(
+                EmailSubscriberDB.id, EmailSubscriberDB.all_platforms
+            ).all()
+            link_rows = session.query(
+                subscriber_platform.c.subscriber_id, subscriber_platform.c.platform_id
+            ).all()
+            self.routing_index.load(platform_rows, subscriber_rows, link_rows)
+            logging.info(
+                f"路由索引构建完成: {len(platform_rows)} 个平台, {len(subscriber_rows)} 个订阅者"
+            )
+        except Exception as e:
+            logging.error(f"构建路由索引失败: {str(e)}")
+            raise
+        finally:
+            session.close()
+
     def _upgrade_database_structure(self):
         """升级数据库结构，添加缺失的字段"""
         try:
@@ -238,7 +334,11 @@ class EmailSubscriberManager:
             session.close()
 
     def get_platform_id_by_name(self, platform_name):
-        """根据平台名称获取平台ID"""
+        """根据平台名称获取平台ID（优先使用内存路由索引）"""
+        platform_id = self.routing_index.get_platform_id(platform_name)
+        if platform_id is not None:
+            return platform_id
+
         session = self.get_session()
         try:
             platform = (
@@ -299,6 +399,11 @@ class EmailSubscriberManager:
                     existing.all_platforms = True
 
                 session.commit()
+                self.routing_index.set_subscription(
+                    existing.id,
+                    existing.all_platforms,
+                    [p.id for p in existing.platforms],
+                )
                 logging.info(f"更新订阅者订阅平台: {email}")
                 print(f"成功更新 {email} 的订阅设置")
                 return True, is_new_subscriber
@@ -323,6 +428,12 @@ class EmailSubscriberManager:
 
                 session.add(subscriber)
                 session.commit()
+                self.routing_index.set_subscription(
+                    subscriber.id,
+                    subscriber.all_platforms,
+                    [p.id for p in subscriber.platforms],
+                )
+                self.subscriber_counter.add(1)
                 logging.info(f"添加订阅者成功: {email}")
                 print(f"成功添加新订阅者: {email}")
                 return True, is_new_subscriber
@@ -352,8 +463,14 @@ class EmailSubscriberManager:
                 logging.warning(f"订阅者不存在，邮箱: {email}")
                 return False
 
+            subscriber_id = subscriber.id
+            session.query(PendingArticle).filter(
+                PendingArticle.subscriber_id == subscriber_id
+            ).delete(synchronize_session=False)
             session.delete(subscriber)
             session.commit()
+            self.routing_index.remove_subscriber(subscriber_id)
+            self.subscriber_counter.add(-1)
             logging.info(f"删除订阅者成功，邮箱: {email}")
             return True
         except Exception as e:
@@ -409,26 +526,65 @@ class EmailSubscriberManager:
             session.close()
 
     def get_stats(self):
-        """获取统计数据"""
+        """
+        获取统计数据（由内存计数器提供，不按请求查询数据库）
+
+        订阅者数量在本进程增删时即时更新，其他进程的增删在超过
+        EMAIL_STATS_FLUSH_INTERVAL 后的下一次读取时重新统计计入；
+        已发送邮件总数为上次写入时数据库中的总数加本进程尚未写入的增量
+        """
+        return {
+            "subscriber_count": self.subscriber_counter.value,
+            "total_emails_sent": self.stats_counter.total,
+        }
+
+    def _count_subscribers(self):
+        """统计数据库中的订阅者数量，失败返回 None"""
         session = self.get_session()
         try:
-            stats = session.query(EmailStats).first()
-            subscriber_count = session.query(EmailSubscriberDB).count()
+            return session.query(func.count(EmailSubscriberDB.id)).scalar()
+        except Exception as e:
+            logging.error(f"统计订阅者数量失败: {str(e)}")
+            return None
+        finally:
+            session.close()
+
+    def increment_emails_sent(self, count=1):
+        """增加已发送邮件计数（缓冲累积，按间隔批量写入数据库）"""
+        return self.stats_counter.add(count)
+
+    def flush_email_stats(self):
+        """将缓冲的邮件计数立即写入数据库"""
+        try:
+            return self.stats_counter.flush()
+        except Exception as e:
+            logging.error(f"写入邮件统计失败: {str(e)}")
+            return 0
 
+    def _load_emails_sent(self):
+        """读取数据库中的已发送邮件总数，不存在统计记录时创建"""
+        session = self.get_session()
+        try:
+            stats = session.query(EmailStats).first()
             if not stats:
                 stats = EmailStats(total_emails_sent=0)
                 session.add(stats)
                 session.commit()
-
-            return {
-                "subscriber_count": subscriber_count,
-                "total_emails_sent": stats.total_emails_sent,
-            }
+            return stats.total_emails_sent or 0
+        except Exception as e:
+            session.rollback()
+            logging.error(f"读取邮件统计失败: {str(e)}")
+            return 0
         finally:
             session.close()
 
-    def increment_emails_sent(self, count=1):
-        """增加已发送邮件计数"""
+    def _persist_emails_sent(self, count):
+        """
+        将已发送邮件增量写入数据库
+
+        Returns:
+            int: 写入后的总数（包含其他进程的写入）；失败返回 None
+        """
         session = self.get_session()
         try:
             stats = session.query(EmailStats).first()
@@ -436,14 +592,17 @@ class EmailSubscriberManager:
                 stats = EmailStats(total_emails_sent=count)
                 session.add(stats)
             else:
-                stats.total_emails_sent += count
+                # 使用 SQL 表达式自增，避免覆盖其他进程的写入
+                stats.total_emails_sent = EmailStats.total_emails_sent + count
 
             session.commit()
+            session.refresh(stats)
+            logging.info(f"邮件统计已写入数据库，增加 {count} 封")
             return stats.total_emails_sent
         except Exception as e:
             session.rollback()
             logging.error(f"更新邮件统计失败: {str(e)}")
-            return 0
+            return None
         finally:
             session.close()
 
@@ -454,19 +613,13 @@ class EmailSubscriberManager:
 
         session = self.get_session()
         try:
-            from sqlalchemy.orm import joinedload
-
             # 查询条件：
             # 1. 从未发送过邮件的用户（last_email_sent_time为NULL） - 包括版本升级前的老用户
             # 2. 距离上次发送时间已超过设定频率的用户
             subscribers = []
 
-            # 获取所有订阅者
-            all_subscribers = (
-                session.query(EmailSubscriberDB)
-                .options(joinedload(EmailSubscriberDB.platforms))
-                .all()
-            )
+            # 获取所有订阅者（平台筛选由路由索引完成，无需预加载 platforms 关系）
+            all_subscribers = session.query(EmailSubscriberDB).all()
 
             for subscriber in all_subscribers:
                 should_send = False
@@ -544,26 +697,254 @@ class EmailSubscriberManager:
         finally:
             session.close()
 
-    def batch_update_last_email_sent_time(self, subscriber_ids, sent_time=None):
-        """批量更新订阅者的最后邮件发送时间"""
+    def batch_update_last_email_sent_time(
+        self, subscriber_ids, sent_time=None, chunk_size=LAST_SENT_UPDATE_CHUNK_SIZE
+    ):
+        """
+        批量更新订阅者的最后邮件发送时间
+
+        按 chunk_size 分块，每块一条 UPDATE 语句、一次提交。
+        某一块提交失败时只回滚该块：这些订阅者的发送时间保持不变，
+        下次仍会被视为到期；其余块的更新不受影响。
+
+        Args:
+            subscriber_ids: 订阅者ID列表
+            sent_time: 发送时间，默认当前时间
+            chunk_size: 每次提交的订阅者数量
+
+        Returns:
+            int: 成功更新的订阅者数量
+        """
         if sent_time is None:
             sent_time = datetime.now()
 
+        subscriber_ids = list(subscriber_ids)
+        if not subscriber_ids:
+            return 0
+
+        updated_count = 0
+        failed_ids = []
         session = self.get_session()
         try:
-            updated_count = (
-                session.query(EmailSubscriberDB)
-                .filter(EmailSubscriberDB.id.in_(subscriber_ids))
-                .update({"last_email_sent_time": sent_time}, synchronize_session=False)
+            for i in range(0, len(subscriber_ids), chunk_size):
+                chunk = subscriber_ids[i : i + chunk_size]
+                try:
+                    updated_count += (
+                        session.query(EmailSubscriberDB)
+                        .filter(EmailSubscriberDB.id.in_(chunk))
+                        .update(
+                            {"last_email_sent_time": sent_time},
+                            synchronize_session=False,
+                        )
+                    )
+                    session.commit()
+                except Exception as e:
+                    session.rollback()
+                    failed_ids.extend(chunk)
+                    logging.error(f"批量更新发送时间失败（{len(chunk)} 个订阅者）: {str(e)}")
+        finally:
+            session.close()
+
+        logging.info(f"批量更新了 {updated_count} 个订阅者的发送时间为 {sent_time}")
+        if failed_ids:
+            logging.warning(
+                f"{len(failed_ids)} 个订阅者的发送时间未能更新，下次推送时仍会被视为到期: {failed_ids}"
+            )
+        return updated_count
+
+    def get_campaign_sent_emails(self, campaign_id):
+        """获取群发任务中已成功投递的邮箱集合"""
+        session = self.get_session()
+        try:
+            rows = (
+                session.query(CampaignDelivery.email)
+                .filter(CampaignDelivery.campaign_id == campaign_id)
+                .filter(CampaignDelivery.status == "sent")
+                .all()
             )
+            return {row.email for row in rows}
+        finally:
+            session.close()
+
+    def record_campaign_deliveries(self, campaign_id, results, attempt_time=None):
+        """
+        批量记录群发任务的投递结果（一次提交）
+
+        Args:
+            campaign_id: 群发任务标识
+            results: (邮箱, 状态, 错误信息) 序列，状态为 sent 或 failed
+            attempt_time: 尝试时间，默认当前时间
+
+        Returns:
+            bool: 是否写入成功
+        """
+        if not results:
+            return True
+        if attempt_time is None:
+            attempt_time = datetime.now()
+
+        rows = [
+            {
+                "campaign_id": campaign_id,
+                "email": email,
+                "status": status,
+                "attempts": 1,
+                "error": error,
+                "updated_at": attempt_time,
+            }
+            for email, status, error in results
+        ]
+        statement = sqlite_insert(CampaignDelivery).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=["campaign_id", "email"],
+            set_={
+                "status": statement.excluded.status,
+                "attempts": CampaignDelivery.attempts + 1,
+                "error": statement.excluded.error,
+                "updated_at": statement.excluded.updated_at,
+            },
+        )
 
+        session = self.get_session()
+        try:
+            session.execute(statement)
             session.commit()
-            logging.info(f"批量更新了 {updated_count} 个订阅者的发送时间为 {sent_time}")
-            return updated_count
+            return True
+        except Exception as e:
+            session.rollback()
+            logging.error(f"记录群发投递结果失败: {str(e)}")
+            return False
+        finally:
+            session.close()
+
+    def enqueue_pending_articles(self, entries, chunk_size=PENDING_ARTICLES_CHUNK_SIZE):
+        """
+        将 (订阅者ID, 文章ID) 写入待推送账本（已存在的记录忽略，一次提交）
+
+        Args:
+            entries: (订阅者ID, 文章ID) 序列
+            chunk_size: 每条 INSERT 语句的行数
+
+        Returns:
+            int: 写入的记录数；写入失败时抛出异常，调用方不会把文章标记为已推送
+        """
+        created_at = datetime.now()
+        rows = [
+            {
+                "subscriber_id": subscriber_id,
+                "article_id": article_id,
+                "created_at": created_at,
+            }
+            for subscriber_id, article_id in entries
+        ]
+        if not rows:
+            return 0
 
+        session = self.get_session()
+        try:
+            inserted = 0
+            for i in range(0, len(rows), chunk_size):
+                statement = (
+                    sqlite_insert(PendingArticle)
+                    .values(rows[i : i + chunk_size])
+                    .on_conflict_do_nothing()
+                )
+                inserted += session.execute(statement).rowcount
+            session.commit()
+            logging.info(f"待推送账本新增 {inserted} 条记录")
+            return inserted
+        except Exception as e:
+            session.rollback()
+            logging.error(f"写入待推送账本失败: {str(e)}")
+            raise
+        finally:
+            session.close()
+
+    def get_due_pending_articles(self, current_time=None):
+        """
+        获取到期订阅者的待推送文章
+
+        到期判断（从未发送过，或距上次发送已满 send_frequency 小时）在 SQL 中完成，
+        只取出有待推送文章且已到期的订阅者，账本按复合主键中的 subscriber_id 查找
+
+        Returns:
+            dict: 订阅者ID -> (订阅者行, [文章ID...])；
+                  订阅者行包含 id、email、send_frequency、last_email_sent_time
+        """
+        if current_time is None:
+            current_time = datetime.now()
+
+        hours_since_last = (
+            func.julianday(current_time.strftime("%Y-%m-%d %H:%M:%S.%f"))
+            - func.julianday(EmailSubscriberDB.last_email_sent_time)
+        ) * 24
+        due = or_(
+            EmailSubscriberDB.last_email_sent_time.is_(None),
+            hours_since_last >= func.coalesce(EmailSubscriberDB.send_frequency, 24),
+        )
+
+        session = self.get_session()
+        try:
+            rows = (
+                session.query(
+                    EmailSubscriberDB.id,
+                    EmailSubscriberDB.email,
+                    EmailSubscriberDB.send_frequency,
+                    EmailSubscriberDB.last_email_sent_time,
+                    PendingArticle.article_id,
+                )
+                .join(
+                    PendingArticle, PendingArticle.subscriber_id == EmailSubscriberDB.id
+                )
+                .filter(due)
+                .order_by(EmailSubscriberDB.id, PendingArticle.article_id)
+                .all()
+            )
+        finally:
+            session.close()
+
+        pending = {}
+        for row in rows:
+            pending.setdefault(row.id, (row, []))[1].append(row.article_id)
+        return pending
+
+    def clear_pending_articles(
+        self, subscriber_ids, article_ids, chunk_size=PENDING_ARTICLES_CHUNK_SIZE
+    ):
+        """
+        从账本中删除已推送的记录（一次提交）
+
+        Args:
+            subscriber_ids: 订阅者ID列表
+            article_ids: 已推送给这些订阅者的文章ID列表
+
+        Returns:
+            int: 删除的记录数
+        """
+        subscriber_ids = list(subscriber_ids)
+        article_ids = list(article_ids)
+        if not subscriber_ids or not article_ids:
+            return 0
+
+        session = self.get_session()
+        try:
+            deleted = 0
+            for i in range(0, len(subscriber_ids), chunk_size):
+                deleted += (
+                    session.query(PendingArticle)
+                    .filter(
+                        PendingArticle.subscriber_id.in_(
+                            subscriber_ids[i : i + chunk_size]
+                        )
+                    )
+                    .filter(PendingArticle.article_id.in_(article_ids))
+                    .delete(synchronize_session=False)
+                )
+            session.commit()
+            return deleted
         except Exception as e:
             session.rollback()
-            logging.error(f"批量更新发送时间失败: {str(e)}")
+            logging.error(f"清理待推送账本失败: {str(e)}")
             return 0
         finally:
             session.close()
@@ -5,35 +5,75 @@
 """
 
 import re
+import asyncio
 import smtplib
 import logging
-import requests
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.header import Header
 from datetime import datetime, timedelta
 
 from .subscriberDB import EmailSubscriberManager
-from .config import SMTP_SERVER, SMTP_PASSWORD, MY_EMAIL, SUBSCRIBER_MASK
+from .templates import PreparedMessage
+from .smtp_pool import create_smtp_connection, close_smtp_connection
+from .async_transport import AsyncSMTPTransport, async_transport_available
+from .config import (
+    SMTP_SERVER,
+    SMTP_PORT,
+    SMTP_SECURITY,
+    EMAIL_TRANSPORT,
+    SMTP_PASSWORD,
+    MY_EMAIL,
+    SUBSCRIBER_MASK,
+)
 
 
 class SubscriberService:
     """邮件订阅服务类，提供订阅管理和邮件发送功能"""
 
-    def __init__(self):
-        """初始化数据库管理器和日志配置"""
+    def __init__(
+        self,
+        db_manager=None,
+        smtp_server=SMTP_SERVER,
+        smtp_port=SMTP_PORT,
+        smtp_security=SMTP_SECURITY,
+        transport=EMAIL_TRANSPORT,
+    ):
+        """
+        初始化数据库管理器和日志配置
+
+        Args:
+            db_manager: 订阅者数据库管理器，默认新建（基准测试时可注入临时数据库）
+            smtp_server: SMTP 服务器地址
+            smtp_port: SMTP 端口
+            smtp_security: 连接加密方式，starttls / ssl / none
+            transport: 邮件发送后端，smtp（阻塞）或 async（asyncio 并发会话）
+        """
         self._setup_logging()
         self.logger.info("开始初始化邮件订阅服务")
 
         # 初始化数据库管理器
-        self.db_manager = EmailSubscriberManager()
+        self.db_manager = db_manager or EmailSubscriberManager()
 
-        self.smtp_server = SMTP_SERVER
-        self.smtp_port = 587  # 默认使用TLS端口
+        self.smtp_server = smtp_server
+        self.smtp_port = smtp_port
+        self.smtp_security = smtp_security
         self.sender_email = MY_EMAIL
         self.sender_password = SMTP_PASSWORD
         self.subscriber_pattern = re.compile(SUBSCRIBER_MASK)
 
+        # 可选的 asyncio 发送后端，逐个发送时并发多个 SMTP 会话
+        self.async_transport = None
+        if transport == "async":
+            if async_transport_available():
+                self.async_transport = AsyncSMTPTransport(
+                    smtp_server,
+                    smtp_port,
+                    self.sender_email,
+                    self.sender_password,
+                    smtp_security,
+                )
+                self.logger.info("邮件发送后端: async")
+            else:
+                self.logger.warning("未安装 aiosmtplib，邮件发送后端退回 smtp")
+
         self.logger.info("邮件订阅服务初始化完成")
 
     def _setup_logging(self):
@@ -192,40 +232,14 @@ class SubscriberService:
         self.logger.info(f"开始筛选订阅者，来源平台: {source_platform}")
         self.logger.info(f"总订阅者数量: {len(subscribers)}")
 
-        # 如果指定了来源平台，筛选订订阅了该平台的用户
+        # 如果指定了来源平台，筛选订阅了该平台的用户
         if source_platform:
-            # 先根据平台名称获取平台ID
-            platform_id = self.db_manager.get_platform_id_by_name(source_platform)
-            if platform_id is None:
-                self.logger.warning(f"未找到平台: {source_platform}")
+            subscribers = self._filter_subscribers_by_platform(
+                subscribers, source_platform
+            )
+            if subscribers is None:
                 return 0, 0
 
-            self.logger.info(f"平台 {source_platform} 的ID: {platform_id}")
-
-            filtered_subscribers = []
-            for sub in subscribers:
-                if sub.all_platforms:
-                    # 订阅所有平台的用户
-                    filtered_subscribers.append(sub)
-                    self.logger.debug(
-                        f"用户 {sub.email} 订阅所有平台，包含在发送列表中"
-                    )
-                else:
-                    # 检查用户是否订阅了该平台（使用平台ID匹配）
-                    subscribed_platform_ids = [p.id for p in sub.platforms]
-                    if platform_id in subscribed_platform_ids:
-                        filtered_subscribers.append(sub)
-                        self.logger.debug(
-                            f"用户 {sub.email} 订阅了平台 {source_platform}，包含在发送列表中"
-                        )
-                    else:
-                        self.logger.debug(
-                            f"用户 {sub.email} 未订阅平台 {source_platform}，跳过"
-                        )
-
-            subscribers = filtered_subscribers
-            self.logger.info(f"筛选后的订阅者数量: {len(subscribers)}")
-
         # 获取所有订阅者邮箱
         receiver_emails = [sub.email for sub in subscribers]
 
@@ -267,35 +281,12 @@ class SubscriberService:
 
         # 如果指定了来源平台，筛选订阅了该平台的用户
         if source_platform:
-            platform_id = self.db_manager.get_platform_id_by_name(source_platform)
-            if platform_id is None:
-                self.logger.warning(f"未找到平台: {source_platform}")
+            subscribers = self._filter_subscribers_by_platform(
+                subscribers, source_platform
+            )
+            if subscribers is None:
                 return 0, 0
 
-            self.logger.info(f"平台 {source_platform} 的ID: {platform_id}")
-
-            filtered_subscribers = []
-            for sub in subscribers:
-                if sub.all_platforms:
-                    filtered_subscribers.append(sub)
-                    self.logger.debug(
-                        f"用户 {sub.email} 订阅所有平台，包含在发送列表中"
-                    )
-                else:
-                    subscribed_platform_ids = [p.id for p in sub.platforms]
-                    if platform_id in subscribed_platform_ids:
-                        filtered_subscribers.append(sub)
-                        self.logger.debug(
-                            f"用户 {sub.email} 订阅了平台 {source_platform}，包含在发送列表中"
-                        )
-                    else:
-                        self.logger.debug(
-                            f"用户 {sub.email} 未订阅平台 {source_platform}，跳过"
-                        )
-
-            subscribers = filtered_subscribers
-            self.logger.info(f"筛选后的订阅者数量: {len(subscribers)}")
-
         # 获取所有订阅者邮箱
         receiver_emails = [sub.email for sub in subscribers]
 
@@ -324,14 +315,152 @@ class SubscriberService:
         Returns:
             tuple: (成功发送数量, 总符合条件订阅者数量)
         """
-        from datetime import datetime
+        due_subscribers = self._get_due_subscribers(source_platform)
+        if not due_subscribers:
+            return 0, 0
+
+        # 按用户逐个发送邮件（确保每个用户的发送时间都能正确记录）
+        # 邮件正文只序列化一次，并复用同一个 SMTP 连接
+        current_time = datetime.now()
+
+        delivered = self._send_individual_emails(
+            subject=subject,
+            content=content,
+            receivers=[subscriber.email for subscriber in due_subscribers],
+            is_html=html,
+        )
+        return self._record_individual_results(due_subscribers, delivered, current_time)
+
+    def enqueue_new_articles(self, articles):
+        """
+        新文章入库时按路由索引写入每个收件人的待推送账本
+
+        Args:
+            articles: (文章ID, 来源平台名称) 序列
+
+        Returns:
+            int: 写入账本的记录数
+        """
+        entries = []
+        for article_id, platform in articles:
+            for subscriber_id in self.get_recipient_ids_for_platforms([platform]):
+                entries.append((subscriber_id, article_id))
+
+        if not entries:
+            self.logger.info("新文章没有对应的订阅者，无需入账")
+            return 0
+        return self.db_manager.enqueue_pending_articles(entries)
+
+    def get_due_digest_groups(self, current_time=None):
+        """
+        获取到期订阅者的待推送文章，并按相同的文章集合分组
+
+        同一组的订阅者收到内容完全相同的汇总邮件，只需渲染一次
+
+        Returns:
+            list: [(文章ID元组, [订阅者行...])]
+        """
+        pending = self.db_manager.get_due_pending_articles(current_time)
+        groups = {}
+        for subscriber, article_ids in pending.values():
+            groups.setdefault(tuple(article_ids), []).append(subscriber)
+
+        if groups:
+            self.logger.info(
+                f"{len(pending)} 个到期订阅者有待推送文章，分为 {len(groups)} 组"
+            )
+        return list(groups.items())
+
+    def send_digest_group(self, subject, content, subscribers, article_ids, html=True):
+        """
+        向一组订阅者发送同一封汇总邮件，成功后更新发送时间并清理账本
+
+        Args:
+            subject: 邮件主题
+            content: 邮件内容
+            subscribers: 订阅者行列表（get_due_digest_groups 的返回值）
+            article_ids: 本邮件包含的文章ID
+            html: 是否为HTML格式内容
+
+        Returns:
+            tuple: (成功发送数量, 订阅者数量)
+        """
+        current_time = datetime.now()
+        delivered = self._send_individual_emails(
+            subject=subject,
+            content=content,
+            receivers=[subscriber.email for subscriber in subscribers],
+            is_html=html,
+        )
+        return self._record_digest_results(
+            subscribers, article_ids, delivered, current_time
+        )
+
+    async def send_digest_group_async(
+        self, subject, content, subscribers, article_ids, html=True
+    ):
+        """
+        send_digest_group 的协程版本
+
+        使用 async 后端时邮件由其事件循环并发发送，数据库操作在线程池中执行，
+        调用方 await 期间不占用爬虫或网页线程；未启用 async 后端时在线程池中阻塞发送
+
+        Returns:
+            tuple: (成功发送数量, 订阅者数量)
+        """
+        loop = asyncio.get_running_loop()
+        current_time = datetime.now()
+        receivers = [subscriber.email for subscriber in subscribers]
+
+        if self.async_transport is not None:
+            message = PreparedMessage(self.sender_email, subject, content, html)
+            delivered = await self.async_transport.deliver_async(message, receivers)
+            await loop.run_in_executor(
+                None, self._finish_individual_send, delivered, receivers
+            )
+        else:
+            delivered = await loop.run_in_executor(
+                None, self._send_individual_emails, subject, content, receivers, html
+            )
+
+        return await loop.run_in_executor(
+            None,
+            self._record_digest_results,
+            subscribers,
+            article_ids,
+            delivered,
+            current_time,
+        )
+
+    def _record_digest_results(self, subscribers, article_ids, delivered, current_time):
+        """更新发送成功者的发送时间并清理其账本记录"""
+        result = self._record_individual_results(subscribers, delivered, current_time)
+
+        # 发送失败的订阅者保留账本记录，下次到期时重试
+        self.db_manager.clear_pending_articles(
+            [sub.id for sub in subscribers if sub.email in delivered], article_ids
+        )
+        return result
+
+    def discard_pending_articles(self, subscribers, article_ids):
+        """清理已无法推送（如文章已删除）的账本记录"""
+        return self.db_manager.clear_pending_articles(
+            [sub.id for sub in subscribers], article_ids
+        )
+
+    def _get_due_subscribers(self, source_platform=None):
+        """
+        获取当前到期且订阅了来源平台的订阅者
 
+        Returns:
+            list: 订阅者对象列表（可能为空）
+        """
         # 获取当前应该接收邮件的订阅者
         due_subscribers = self.db_manager.get_subscribers_due_for_email()
 
         if not due_subscribers:
             self.logger.info("当前没有需要推送的订阅者")
-            return 0, 0
+            return []
 
         self.logger.info(f"找到 {len(due_subscribers)} 个需要推送的订阅者")
 
@@ -346,86 +475,94 @@ class SubscriberService:
 
         # 如果指定了来源平台，筛选订阅了该平台的用户
         if source_platform:
-            platform_id = self.db_manager.get_platform_id_by_name(source_platform)
-            if platform_id is None:
-                self.logger.warning(f"未找到平台: {source_platform}")
-                return 0, 0
-
-            self.logger.info(f"平台 {source_platform} 的ID: {platform_id}")
-
-            filtered_subscribers = []
-            for sub in due_subscribers:
-                if sub.all_platforms:
-                    filtered_subscribers.append(sub)
-                    self.logger.debug(
-                        f"用户 {sub.email} 订阅所有平台，包含在发送列表中"
-                    )
-                else:
-                    subscribed_platform_ids = [p.id for p in sub.platforms]
-                    if platform_id in subscribed_platform_ids:
-                        filtered_subscribers.append(sub)
-                        self.logger.debug(
-                            f"用户 {sub.email} 订阅了平台 {source_platform}，包含在发送列表中"
-                        )
-                    else:
-                        self.logger.debug(
-                            f"用户 {sub.email} 未订阅平台 {source_platform}，跳过"
-                        )
-
-            due_subscribers = filtered_subscribers
-            self.logger.info(f"筛选后的订阅者数量: {len(due_subscribers)}")
+            due_subscribers = self._filter_subscribers_by_platform(
+                due_subscribers, source_platform
+            )
+            if due_subscribers is None:
+                return []
 
         if not due_subscribers:
             self.logger.info("筛选后没有需要推送的订阅者")
-            return 0, 0
+            return []
 
-        # 按用户逐个发送邮件（确保每个用户的发送时间都能正确记录）
-        success_count = 0
-        current_time = datetime.now()
+        return due_subscribers
 
-        for subscriber in due_subscribers:
-            try:
-                # 记录是否为首次发送（用于日志）
-                is_first_time = subscriber.last_email_sent_time is None
-
-                # 为单个用户发送邮件
-                individual_success = self._send_batch_email(
-                    subject=subject,
-                    content=content,
-                    receivers=[subscriber.email],
-                    is_html=html,
-                )
+    def _record_individual_results(self, due_subscribers, delivered, current_time):
+        """
+        记录逐个发送的结果，分块批量更新发送成功者的发送时间
 
-                if individual_success > 0:
-                    # 发送成功，更新该用户的最后发送时间
-                    self.db_manager.update_last_email_sent_time(
-                        subscriber.id, current_time
-                    )
-                    success_count += 1
+        Returns:
+            tuple: (成功发送数量, 总符合条件订阅者数量)
+        """
+        successful_ids = []
+        for subscriber in due_subscribers:
+            if subscriber.email not in delivered:
+                self.logger.warning(f"发送邮件给 {subscriber.email} 失败")
+                continue
 
-                    if is_first_time:
-                        self.logger.info(
-                            f"成功发送邮件给 {subscriber.email}（首次推送），推送频率: {subscriber.send_frequency}小时"
-                        )
-                    else:
-                        self.logger.info(
-                            f"成功发送邮件给 {subscriber.email}，推送频率: {subscriber.send_frequency}小时"
-                        )
-                else:
-                    self.logger.warning(f"发送邮件给 {subscriber.email} 失败")
+            successful_ids.append(subscriber.id)
+            if subscriber.last_email_sent_time is None:
+                self.logger.info(
+                    f"成功发送邮件给 {subscriber.email}（首次推送），推送频率: {subscriber.send_frequency}小时"
+                )
+            else:
+                self.logger.info(
+                    f"成功发送邮件给 {subscriber.email}，推送频率: {subscriber.send_frequency}小时"
+                )
 
-            except Exception as e:
-                self.logger.error(f"发送邮件给 {subscriber.email} 时出错: {str(e)}")
+        success_count = len(successful_ids)
+        self.db_manager.batch_update_last_email_sent_time(successful_ids, current_time)
 
         self.logger.info(
             f"个性化频率邮件发送完成，成功: {success_count}/{len(due_subscribers)}"
         )
         return success_count, len(due_subscribers)
 
+    def get_recipient_ids_for_platforms(self, platform_names):
+        """
+        获取一批平台文章的全部收件人ID（基于内存路由索引，不加载 ORM 对象）
+
+        Args:
+            platform_names: 平台名称可迭代对象
+
+        Returns:
+            set: 订阅者ID集合
+        """
+        return self.db_manager.routing_index.subscribers_for_platforms(platform_names)
+
+    def _filter_subscribers_by_platform(self, subscribers, source_platform):
+        """
+        按来源平台筛选订阅者
+
+        Args:
+            subscribers: 订阅者对象列表
+            source_platform: 文章来源平台名称
+
+        Returns:
+            list: 订阅了该平台（或全部平台）的订阅者；平台不存在时返回 None
+        """
+        platform_id = self.db_manager.get_platform_id_by_name(source_platform)
+        if platform_id is None:
+            self.logger.warning(f"未找到平台: {source_platform}")
+            return None
+
+        self.logger.info(f"平台 {source_platform} 的ID: {platform_id}")
+
+        recipient_ids = self.db_manager.routing_index.subscribers_for_platform_id(
+            platform_id
+        )
+        filtered_subscribers = [sub for sub in subscribers if sub.id in recipient_ids]
+        self.logger.info(f"筛选后的订阅者数量: {len(filtered_subscribers)}")
+        return filtered_subscribers
+
     def get_stats(self):
         """获取统计数据"""
         return self.db_manager.get_stats()
 
+    def flush_stats(self):
+        """推送结束时将缓冲的邮件统计写入数据库"""
+        return self.db_manager.flush_email_stats()
+
     def _is_valid_email(self, email):
         """检查邮箱格式是否有效"""
         # 简单的邮箱格式验证
@@ -436,53 +573,34 @@ class SubscriberService:
         """检查邮箱是否符合订阅掩码规则"""
         return bool(self.subscriber_pattern.match(email))
 
-    def _get_ai_summary(self, content):
-        """调用 AI 摘要服务"""
-        try:
-            # 限制内容长度，避免 token 超限
-            truncated_content = content[:2000] if len(content) > 2000 else content
-            resp = requests.post(
-                "http://localhost:58080/api/v1/summarizer/generate",
-                json={"content": truncated_content},
-                timeout=30,
-            )
-            if resp.status_code == 200:
-                data = resp.json().get("data", {})
-                return data.get("summary", ""), data.get("title", "")
-        except Exception as e:
-            self.logger.warning(f"摘要服务调用失败: {e}")
-        return "", ""
+    def _connect_smtp(self):
+        """建立并登录 SMTP 连接"""
+        return create_smtp_connection(
+            self.smtp_server,
+            self.smtp_port,
+            self.sender_email,
+            self.sender_password,
+            self.smtp_security,
+        )
 
     def _send_batch_email(self, subject, content, receivers, is_html=False):
         """
-        批量发送邮件
+        批量发送邮件（一封邮件，所有收件人同在 To 头中）
         """
-        # [Security] 如果是 HTML 邮件且包含文章内容，尝试注入摘要（注意：此处简单演示，实际应在构建 HTML 时调用）
-        # 由于 _send_batch_email 接收的是已构建好的 content，我们最好在构建 content 的地方调用
-        # 这里仅保留原逻辑，摘要调用应在 send_email_to_subscribers_by_individual_frequency 中修改 HTML 构建逻辑
-        # 为了演示，我们在日志中记录“准备发送带有 AI 摘要的邮件”
-
         if not receivers:
             return 0
 
         try:
             # 创建邮件
-            message = MIMEMultipart()
-            message["From"] = self.sender_email
-            message["To"] = ";".join(receivers)
-            message["Subject"] = Header(subject, "utf-8")
-
-            # 邮件正文
-            content_type = "html" if is_html else "plain"
-            message.attach(MIMEText(content, content_type, "utf-8"))
+            message = PreparedMessage(self.sender_email, subject, content, is_html)
 
             # 连接SMTP服务器
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()
-            server.login(self.sender_email, self.sender_password)
+            server = self._connect_smtp()
 
             # 发送邮件
-            server.sendmail(self.sender_email, receivers, message.as_string())
+            server.sendmail(
+                self.sender_email, receivers, message.for_recipients(receivers)
+            )
             self.logger.info(f"邮件已发送给{len(receivers)}位订阅者")
 
             # 更新邮件发送统计
@@ -497,3 +615,78 @@ class SubscriberService:
         except Exception as e:
             self.logger.error(f"发送邮件失败: {str(e)}")
             return 0
+
+    def _send_individual_emails(self, subject, content, receivers, is_html=False):
+        """
+        逐个收件人发送同一封邮件
+
+        MIME 正文只序列化一次，每位收件人只替换 To 头；
+        所有收件人共用一个 SMTP 连接，连接断开时重连一次后继续；
+        使用 async 后端时由后台事件循环并发多个 SMTP 会话
+
+        Args:
+            subject: 邮件主题
+            content: 邮件内容
+            receivers: 收件人邮箱列表
+            is_html: 是否为HTML格式内容
+
+        Returns:
+            set: 发送成功的收件人邮箱集合
+        """
+        delivered = set()
+        if not receivers:
+            return delivered
+
+        message = PreparedMessage(self.sender_email, subject, content, is_html)
+        if self.async_transport is not None:
+            delivered = self.async_transport.deliver(message, receivers)
+            return self._finish_individual_send(delivered, receivers)
+
+        server = None
+
+        try:
+            for receiver in receivers:
+                for attempt in range(2):
+                    if server is None:
+                        try:
+                            server = self._connect_smtp()
+                        except Exception as e:
+                            # 无法建立连接时放弃剩余收件人，避免逐个重试
+                            self.logger.error(f"连接 SMTP 服务器失败: {str(e)}")
+                            return self._finish_individual_send(delivered, receivers)
+                    try:
+                        server.sendmail(
+                            self.sender_email,
+                            [receiver],
+                            message.for_recipient(receiver),
+                        )
+                        delivered.add(receiver)
+                        break
+                    except smtplib.SMTPServerDisconnected as e:
+                        # 连接被服务器关闭，重连后重试当前收件人
+                        self.logger.warning(f"SMTP 连接断开，准备重连: {str(e)}")
+                        server = None
+                    except smtplib.SMTPRecipientsRefused as e:
+                        self.logger.error(f"收件人被拒绝 {receiver}: {str(e)}")
+                        break
+                    except Exception as e:
+                        self.logger.error(f"发送邮件给 {receiver} 失败: {str(e)}")
+                        server = self._close_smtp(server)
+                        break
+        finally:
+            self._close_smtp(server)
+
+        return self._finish_individual_send(delivered, receivers)
+
+    def _finish_individual_send(self, delivered, receivers):
+        """记录逐个发送的结果并更新邮件统计"""
+        if delivered:
+            self.db_manager.increment_emails_sent(len(delivered))
+            self.logger.info(f"邮件统计已更新，增加 {len(delivered)} 封")
+
+        self.logger.info(f"邮件已逐个发送，成功 {len(delivered)}/{len(receivers)}")
+        return delivered
+
+    def _close_smtp(self, server):
+        """关闭 SMTP 连接，返回 None 便于重置引用"""
+        return close_smtp_connection(server)
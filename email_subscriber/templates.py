@@ -0,0 +1,339 @@
+"""
+邮件模板模块
+
+预编译邮件 HTML 布局，文章卡片在一次推送中只渲染一次；
+MIME 正文只序列化一次，逐个收件人发送时仅替换 To 头
+"""
+
+from string import Template
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from email.header import Header
+
+from .config import OFFICAL_URL
+
+# ========== 样式 ==========
+DIGEST_STYLE = """
+    body {
+        font-family: 'PingFang SC', 'Helvetica Neue', Helvetica, Arial, sans-serif;
+        background-color: #f5f5f5;
+        color: #333;
+        padding: 20px;
+        max-width: 600px;
+        margin: 0 auto;
+    }
+    .header {
+        text-align: center;
+        margin-bottom: 20px;
+        padding-bottom: 15px;
+        border-bottom: 2px solid #007bff;
+    }
+    .summary {
+        background-color: #e7f3ff;
+        padding: 15px;
+        border-radius: 8px;
+        margin-bottom: 20px;
+        text-align: center;
+    }
+    .article-card {
+        background-color: white;
+        border-radius: 8px;
+        box-shadow: 0 2px 8px rgba(0,0,0,0.1);
+        padding: 15px;
+        margin-bottom: 15px;
+        border-left: 4px solid #007bff;
+    }
+    .title {
+        font-size: 18px;
+        font-weight: bold;
+        margin-bottom: 8px;
+        color: #003366;
+    }
+    .title a {
+        color: #003366;
+        text-decoration: none;
+    }
+    .title a:hover {
+        text-decoration: underline;
+    }
+    .meta {
+        display: flex;
+        justify-content: space-between;
+        color: #666;
+        font-size: 14px;
+        margin-top: 5px;
+    }
+    .platform {
+        font-weight: bold;
+        color: #0055a4;
+    }
+    .date {
+        color: #777;
+    }
+    .footer {
+        text-align: center;
+        margin-top: 25px;
+        font-size: 12px;
+        color: #888;
+        padding-top: 15px;
+        border-top: 1px solid #eee;
+    }
+"""
+
+NOTICE_STYLE = """
+    body {
+        font-family: 'PingFang SC', 'Helvetica Neue', Helvetica, Arial, sans-serif;
+        background-color: #f5f5f5;
+        color: #333;
+        padding: 20px;
+        max-width: 600px;
+        margin: 0 auto;
+    }
+    .container {
+        background-color: white;
+        border-radius: 10px;
+        box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+        padding: 25px;
+    }
+    .header {
+        text-align: center;
+        margin-bottom: 20px;
+        padding-bottom: 15px;
+        border-bottom: 1px solid #eee;
+    }
+    .content {
+        line-height: 1.6;
+        margin-bottom: 20px;
+    }
+    .highlight {
+        background-color: #f0f7ff;
+        padding: 10px;
+        border-radius: 5px;
+        margin: 15px 0;
+    }
+    .footer {
+        text-align: center;
+        margin-top: 20px;
+        font-size: 12px;
+        color: #888;
+        padding-top: 15px;
+        border-top: 1px solid #eee;
+    }
+"""
+
+# ========== 预编译布局 ==========
+DIGEST_LAYOUT = Template(
+    """
+<html>
+<head>
+    <style>$style</style>
+</head>
+<body>
+    <div class="header">
+        <h2>📝 深圳技术大学公文通更新</h2>
+    </div>
+    <div class="summary">
+        <h3>📊 本次推送汇总</h3>
+        $summary_lines
+        <p>推送模式：个性化频率推送</p>
+    </div>
+$cards
+    <div class="footer">
+        <p>您的邮件根据个人设置的推送频率发送</p>
+        <p>感谢您的订阅！如需调整订阅设置，请访问 <a href="http://$site/subscribe">订阅页面</a>。</p>
+        <p>© 2023 深圳技术大学GoldenMouse - 让校园信息触手可及 🐭</p>
+    </div>
+</body>
+</html>
+"""
+)
+
+SUMMARY_LINE = Template(
+    "<p><strong>$platform</strong> 平台有 <strong>$count</strong> 条新通知</p>"
+)
+
+ARTICLE_CARD = Template(
+    """
+    <div class="article-card">
+        <div class="title">
+            <span style="color: #999; font-size: 14px;">#$index</span>
+            $card_body
+"""
+)
+
+ARTICLE_CARD_BODY = Template(
+    """<a href="$url" target="_blank">$title</a>
+            $summary_html
+        </div>
+        <div class="meta">
+            <span class="platform">📣 $source</span>
+            <span class="date">🕒 $date_display</span>
+        </div>
+    </div>
+"""
+)
+
+AI_SUMMARY_BLOCK = Template(
+    """
+            <div style="background-color: #fcebd1; padding: 10px; margin-top: 5px; border-radius: 4px; font-size: 13px; color: #8a6d3b;">
+                <strong>🤖 AI 摘要:</strong> $summary
+            </div>
+"""
+)
+
+CONFIRMATION_LAYOUT = Template(
+    """
+<html>
+<head>
+    <style>$style</style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h2>🎉 订阅成功 🎉</h2>
+        </div>
+        <div class="content">
+            <p>您好！</p>
+            <p>感谢您订阅深圳技术大学公文通更新通知。您已成功订阅来自<b>$platform_description</b>的最新公告。</p>
+
+            <div class="highlight">
+                <p>📧 订阅邮箱：$email</p>
+                <p>🔄 推送频率：每${send_frequency}小时推送一次</p>
+            </div>
+
+            <p>从现在开始，您将按照设定的频率收到所有符合您订阅要求的最新公文通通知。</p>
+            <p>如需调整订阅设置或取消订阅，请随时访问我们的 <a href="http://$site/subscribe">订阅管理页面</a>。</p>
+        </div>
+        <div class="footer">
+            <p>© 2023 深圳技术大学GoldenMouse - 让校园信息触手可及 🐭</p>
+        </div>
+    </div>
+</body>
+</html>
+"""
+)
+
+
+class DigestRenderer:
+    """
+    推送邮件渲染器
+
+    一次推送（dispatch）内复用同一个实例，每篇文章的卡片只渲染一次
+    """
+
+    def __init__(self):
+        self._card_cache = {}  # 文章URL -> 卡片正文HTML
+
+    def render_card(self, article, index, ai_summary=""):
+        """渲染单篇文章卡片（卡片正文按文章URL缓存）"""
+        card_body = self._card_cache.get(article.url)
+        if card_body is None:
+            date_display = (
+                f"{article.date} {article.detail_time}"
+                if article.detail_time
+                else article.date
+            )
+            summary_html = (
+                AI_SUMMARY_BLOCK.substitute(summary=ai_summary) if ai_summary else ""
+            )
+            card_body = ARTICLE_CARD_BODY.substitute(
+                url=article.url,
+                title=article.title,
+                summary_html=summary_html,
+                source=article.source,
+                date_display=date_display,
+            )
+            self._card_cache[article.url] = card_body
+        return ARTICLE_CARD.substitute(index=index, card_body=card_body)
+
+    def render_platform_digest(self, platform, articles, summaries=None):
+        """
+        渲染单个平台的新文章推送邮件
+
+        Args:
+            platform: 平台名称
+            articles: 该平台的文章列表
+            summaries: 文章URL -> AI 摘要 的字典（可选）
+
+        Returns:
+            tuple: (邮件主题, HTML 内容)
+        """
+        summary_lines = SUMMARY_LINE.substitute(platform=platform, count=len(articles))
+        return self._render(summary_lines, articles, summaries)
+
+    def render_digest(self, articles, summaries=None):
+        """
+        渲染多平台汇总推送邮件（按平台分行统计）
+
+        Args:
+            articles: 文章列表（已按展示顺序排序）
+            summaries: 文章URL -> AI 摘要 的字典（可选）
+
+        Returns:
+            tuple: (邮件主题, HTML 内容)
+        """
+        counts = {}
+        for article in articles:
+            counts[article.source] = counts.get(article.source, 0) + 1
+        summary_lines = "".join(
+            SUMMARY_LINE.substitute(platform=platform, count=count)
+            for platform, count in counts.items()
+        )
+        return self._render(summary_lines, articles, summaries)
+
+    def _render(self, summary_lines, articles, summaries):
+        """组装推送邮件"""
+        summaries = summaries or {}
+        cards = "".join(
+            self.render_card(article, i, summaries.get(article.url, ""))
+            for i, article in enumerate(articles, 1)
+        )
+        html_content = DIGEST_LAYOUT.substitute(
+            style=DIGEST_STYLE,
+            summary_lines=summary_lines,
+            cards=cards,
+            site=OFFICAL_URL,
+        )
+        subject = f"【GM】{len(articles)}条新公文通"
+        return subject, html_content
+
+
+def render_subscription_confirmation(email, platform_description, send_frequency):
+    """渲染订阅成功确认邮件"""
+    return CONFIRMATION_LAYOUT.substitute(
+        style=NOTICE_STYLE,
+        platform_description=platform_description,
+        email=email,
+        send_frequency=send_frequency,
+        site=OFFICAL_URL,
+    )
+
+
+class PreparedMessage:
+    """
+    预序列化的邮件
+
+    MIME 正文只构建和序列化一次，发送给不同收件人时只在头部前加上 To 头
+    """
+
+    def __init__(self, sender, subject, content, is_html=True):
+        message = MIMEMultipart()
+        message["From"] = sender
+        message["Subject"] = Header(subject, "utf-8")
+
+        content_type = "html" if is_html else "plain"
+        message.attach(MIMEText(content, content_type, "utf-8"))
+
+        # 统一使用 CRLF 并编码为字节，smtplib 发送时无需再次转换
+        self._payload = message.as_bytes().replace(b"\r\n", b"\n").replace(
+            b"\n", b"\r\n"
+        )
+
+    def for_recipients(self, receivers):
+        """生成发送给指定收件人的完整邮件字节串"""
+        to_header = ";".join(receivers).encode("utf-8")
+        return b"To: " + to_header + b"\r\n" + self._payload
+
+    def for_recipient(self, receiver):
+        """生成发送给单个收件人的完整邮件字节串"""
+        return self.for_recipients([receiver])
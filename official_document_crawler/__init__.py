@@ -5,13 +5,14 @@
 """
 
 from .main_crawler import main_crawler
-from .crawler.database import DatabaseManager, Article
+from .crawler.database import DatabaseManager, Article, get_database_manager
 from .crawler.fetcher import fetch_articles_batch
 from .crawler.parser import process_article_details
 
 __all__ = [
     "main_crawler",
     "DatabaseManager",
+    "get_database_manager",
     "Article",
     "fetch_articles_batch",
     "process_article_details",
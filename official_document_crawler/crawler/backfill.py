@@ -0,0 +1,226 @@
+"""
+历史回填模块
+
+按页抓取全部历史列表页，多个线程并发处理，所有请求共享全局限速；
+每页完成后在 backfill_pages 表记录进度，中断后重新运行会跳过已完成的页面
+
+用法:
+    python -m official_document_crawler.crawler.backfill
+    python -m official_document_crawler.crawler.backfill --start 1 --end 100 --workers 8 --rate 4
+    python -m official_document_crawler.crawler.backfill --parse   # 回填后解析文章详情
+"""
+
+import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+from .database import BackfillPage, DatabaseManager
+from .fetcher import fetch_article_list, fetch_article_content
+from .utils import set_rate_limit, setup_logging
+from .config import BACKFILL_TOTAL_PAGES, BACKFILL_WORKERS, BACKFILL_RATE_LIMIT
+
+
+def pending_pages(db_manager, start_page, end_page):
+    """获取范围内尚未完成的页码（含失败的页面）"""
+    session = db_manager.get_session()
+    try:
+        done = {
+            row.page
+            for row in session.query(BackfillPage.page)
+            .filter(BackfillPage.page.between(start_page, end_page))
+            .filter(BackfillPage.status == "done")
+        }
+    finally:
+        session.close()
+    return [page for page in range(start_page, end_page + 1) if page not in done]
+
+
+def reset_progress(db_manager, start_page, end_page):
+    """清除范围内的回填进度"""
+    session = db_manager.get_session()
+    try:
+        session.query(BackfillPage).filter(
+            BackfillPage.page.between(start_page, end_page)
+        ).delete(synchronize_session=False)
+        session.commit()
+    finally:
+        session.close()
+
+
+def _record_page(db_manager, page, status, articles=0, new_articles=0, error=None):
+    """记录单页的回填结果"""
+    session = db_manager.get_session()
+    try:
+        record = session.get(BackfillPage, page) or BackfillPage(page=page, attempts=0)
+        record.status = status
+        record.articles = articles
+        record.new_articles = new_articles
+        record.attempts = (record.attempts or 0) + 1
+        record.error = error
+        record.updated_at = datetime.now()
+        session.merge(record)
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        logging.error(f"记录回填进度失败，页面 {page}: {str(e)}")
+    finally:
+        session.close()
+
+
+def backfill_page(db_manager, page):
+    """
+    回填单个列表页：只抓取尚未入库的文章
+
+    Returns:
+        tuple: (是否完成, 文章数, 新入库文章数)
+    """
+    articles = fetch_article_list(page)
+    if not articles:
+        _record_page(db_manager, page, "failed", error="列表页抓取失败")
+        return False, 0, 0
+
+    existing = db_manager.get_existing_urls(article["url"] for article in articles)
+    new_count = 0
+    failed = 0
+    for article in articles:
+        if article["url"] in existing:
+            continue
+        raw_data = fetch_article_content(article["url"])
+        if not raw_data:
+            failed += 1
+            logging.error(f"文章内容抓取失败: {article['url']}")
+            continue
+        article["raw_data"] = raw_data
+        if db_manager.add_article(article):
+            new_count += 1
+
+    if failed:
+        _record_page(
+            db_manager,
+            page,
+            "failed",
+            len(articles),
+            new_count,
+            f"{failed} 篇文章内容抓取失败",
+        )
+        return False, len(articles), new_count
+
+    _record_page(db_manager, page, "done", len(articles), new_count)
+    return True, len(articles), new_count
+
+
+def run_backfill(
+    db_manager,
+    start_page=1,
+    end_page=BACKFILL_TOTAL_PAGES,
+    workers=BACKFILL_WORKERS,
+    rate=BACKFILL_RATE_LIMIT,
+):
+    """
+    并发回填指定范围的列表页，跳过已完成的页面
+
+    Args:
+        db_manager: 数据库管理器实例
+        start_page: 起始页码（含）
+        end_page: 结束页码（含）
+        workers: 并发处理的页面数
+        rate: 所有线程合计每秒最多请求数（列表页和文章页）
+
+    Returns:
+        dict: 完成页数、失败页数、新入库文章数和耗时
+    """
+    pages = pending_pages(db_manager, start_page, end_page)
+    total = end_page - start_page + 1
+    logging.info(
+        f"回填范围 {start_page}-{end_page} 共 {total} 页，"
+        f"已完成 {total - len(pages)} 页，待处理 {len(pages)} 页"
+    )
+    result = {"done": 0, "failed": 0, "new_articles": 0, "elapsed": 0.0}
+    if not pages:
+        return result
+
+    set_rate_limit(rate)
+    started = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="Backfill")
+    futures = {executor.submit(backfill_page, db_manager, page): page for page in pages}
+    try:
+        for finished, future in enumerate(as_completed(futures), 1):
+            page = futures[future]
+            try:
+                ok, _, new_count = future.result()
+            except Exception as e:
+                ok, new_count = False, 0
+                logging.error(f"回填页面 {page} 失败: {str(e)}")
+                _record_page(db_manager, page, "failed", error=str(e))
+            result["done" if ok else "failed"] += 1
+            result["new_articles"] += new_count
+
+            elapsed = time.monotonic() - started
+            pages_per_min = finished / elapsed * 60 if elapsed > 0 else 0.0
+            eta = None
+            if pages_per_min > 0:
+                remaining = len(pages) - finished
+                eta = timedelta(seconds=int(remaining / pages_per_min * 60))
+            logging.info(
+                f"回填进度 {finished}/{len(pages)}"
+                f"（页面 {page} {'完成' if ok else '失败'}），"
+                f"{pages_per_min:.1f} 页/分钟，新文章 {result['new_articles']} 篇，"
+                f"预计剩余 {eta}"
+            )
+    except KeyboardInterrupt:
+        logging.info("回填被中断，已完成的页面已记录，重新运行将从断点继续")
+        for future in futures:
+            future.cancel()
+        raise
+    finally:
+        executor.shutdown(wait=True)
+        set_rate_limit(None)
+        result["elapsed"] = time.monotonic() - started
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="公文通历史文章回填（可断点续传）")
+    parser.add_argument("--start", type=int, default=1, help="起始页码（含）")
+    parser.add_argument(
+        "--end", type=int, default=BACKFILL_TOTAL_PAGES, help="结束页码（含）"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=BACKFILL_WORKERS, help="并发处理的页面数"
+    )
+    parser.add_argument(
+        "--rate", type=float, default=BACKFILL_RATE_LIMIT, help="每秒最多请求数"
+    )
+    parser.add_argument("--reset", action="store_true", help="清除范围内的进度后重新回填")
+    parser.add_argument("--parse", action="store_true", help="回填完成后解析文章详情")
+    args = parser.parse_args()
+
+    setup_logging()
+    db_manager = DatabaseManager()
+    if args.reset:
+        reset_progress(db_manager, args.start, args.end)
+
+    try:
+        result = run_backfill(db_manager, args.start, args.end, args.workers, args.rate)
+    except KeyboardInterrupt:
+        return
+
+    print(
+        f"\n📚 回填结束：完成 {result['done']} 页，失败 {result['failed']} 页，"
+        f"新文章 {result['new_articles']} 篇，耗时 {result['elapsed']:.0f} 秒"
+    )
+    if result["failed"]:
+        print("   失败的页面会在下次运行时重试")
+
+    if args.parse:
+        from .parser import process_article_details
+
+        count = process_article_details(db_manager)
+        print(f"📝 文章详情解析完成，成功处理 {count} 篇文章")
+
+
+if __name__ == "__main__":
+    main()
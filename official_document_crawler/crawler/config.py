@@ -21,4 +21,37 @@ from config import (
     MAX_RETRIES,
     REQUEST_TIMEOUT,
     SLEEP_INTERVAL,
+    SUMMARY_MAX_WORKERS,
+    SUMMARY_BATCH_LIMIT,
+    NOTIFIED_URL_CACHE_SIZE,
+    NOTIFY_CLAIM_TIMEOUT_MINUTES,
+    NOTIFY_LOOKBACK_DAYS,
+    DLP_CACHE_MAX_BYTES,
+    DLP_CACHE_TOUCH_INTERVAL_MINUTES,
+    DLP_CACHE_TOUCH_BATCH_SIZE,
+    DLP_MODE,
+    DLP_MAX_WORKERS,
+    DLP_BATCH_SIZE,
+    STATS_REFRESH_SCHEDULE,
+    STATS_MAX_WORKERS,
+    STATS_REFRESH_BATCH_LIMIT,
+    TRENDING_WINDOW_HOURS,
+    TRENDING_DOWNLOAD_WEIGHT,
+    TRENDING_SNAPSHOT_RETENTION_DAYS,
+    CRAWL_MIN_INTERVAL_MINUTES,
+    CRAWL_MAX_INTERVAL_MINUTES,
+    CRAWL_TARGET_NEW_ARTICLES,
+    CRAWL_BACKOFF_FACTOR,
+    CRAWL_HISTORY_WEEKS,
+    CRAWL_FORCE_FULL_HOURS,
+    CRAWL_PHASE_BUDGETS,
+    CRAWL_RUN_HEARTBEAT_SECONDS,
+    CRAWL_RUN_STALE_SECONDS,
+    BACKFILL_TOTAL_PAGES,
+    BACKFILL_WORKERS,
+    BACKFILL_RATE_LIMIT,
+    WORK_QUEUE_LEASE_SECONDS,
+    WORK_QUEUE_MAX_ATTEMPTS,
+    WORK_QUEUE_RETRY_BASE_SECONDS,
+    WORK_QUEUE_POLL_INTERVAL,
 )
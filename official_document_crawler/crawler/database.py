@@ -4,13 +4,37 @@
 定义数据库模型和操作函数
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, text
+from sqlalchemy import (
+    Column,
+    Integer,
+    Float,
+    String,
+    DateTime,
+    Index,
+    UniqueConstraint,
+    and_,
+    or_,
+    text,
+    update,
+)
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.exc import IntegrityError
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import json
 import logging
 import pathlib
+import sqlite3
+import threading
 
-from .config import DATABASE_URI, DATABASE_DIR
+from .config import (
+    DATABASE_URI,
+    DATABASE_DIR,
+    NOTIFIED_URL_CACHE_SIZE,
+    NOTIFY_CLAIM_TIMEOUT_MINUTES,
+    NOTIFY_LOOKBACK_DAYS,
+)
+from db_engine import create_sqlite_engine, read_sqlite_settings
 
 # 创建 Base 类
 Base = declarative_base()
@@ -33,6 +57,14 @@ class Article(Base):
     fujians = Column(String)
     fujian_down_num = Column(Integer)
     raw_data = Column(String)
+    ai_summary = Column(String)  # AI 摘要（爬取时生成）
+    ai_title = Column(String)  # AI 生成的标题
+    summary_hash = Column(String, index=True)  # 生成摘要时所用内容的哈希
+    notified_at = Column(DateTime, index=True)  # 推送给订阅者的时间，NULL 表示尚未推送
+    notify_claimed_at = Column(DateTime)  # 领取推送的时间，写入账本并确认后才设置 notified_at
+    click_params = Column(String)  # 点击数统计接口参数（解析时记录，供统计刷新使用）
+    download_params = Column(String)  # 附件下载数统计接口参数
+    stats_refreshed_at = Column(DateTime, index=True)  # 最近一次刷新访问统计的时间
 
     def __repr__(self):
         return (
@@ -41,18 +73,181 @@ class Article(Base):
         )
 
 
+class DLPCacheEntry(Base):
+    """DLP 脱敏结果缓存（按输入文本哈希）"""
+
+    __tablename__ = "dlp_cache"
+
+    text_hash = Column(String, primary_key=True)  # 输入文本的 sha256
+    masked_text = Column(String)  # 脱敏结果
+    size = Column(Integer)  # 脱敏结果的字节数，用于按容量淘汰
+    created_at = Column(DateTime)
+    last_used_at = Column(DateTime, index=True)  # 最近命中时间，淘汰时先删最久未用的
+
+    def __repr__(self):
+        return f"DLPCacheEntry(text_hash='{self.text_hash[:12]}', size={self.size})"
+
+
+class ArticleStatsSnapshot(Base):
+    """文章访问统计快照（只追加），每次刷新统计时写入一行"""
+
+    __tablename__ = "article_stats_snapshots"
+
+    article_id = Column(Integer, primary_key=True)
+    ts = Column(Integer, primary_key=True)  # 采集时间（Unix 秒）
+    clicks = Column(Integer)
+    downloads = Column(Integer)
+
+    def __repr__(self):
+        return (
+            f"ArticleStatsSnapshot(article_id={self.article_id}, ts={self.ts}, "
+            f"clicks={self.clicks})"
+        )
+
+
+class TrendingScore(Base):
+    """文章热度（滚动窗口内的访问增量），由统计刷新任务预先计算"""
+
+    __tablename__ = "trending_scores"
+
+    article_id = Column(Integer, primary_key=True)
+    score = Column(Float, index=True)  # 热度分数，排行按此字段倒序读取
+    clicks_delta = Column(Integer)  # 窗口内新增点击数
+    downloads_delta = Column(Integer)  # 窗口内新增下载数
+    updated_at = Column(DateTime)
+
+    def __repr__(self):
+        return f"TrendingScore(article_id={self.article_id}, score={self.score})"
+
+
+class CrawlRun(Base):
+    """爬取任务运行记录"""
+
+    __tablename__ = "crawl_runs"
+
+    id = Column(Integer, primary_key=True)
+    started_at = Column(DateTime, index=True)
+    finished_at = Column(DateTime)
+    status = Column(String)  # running / success / failed / timeout / cancelled
+    trigger = Column(String)  # 触发来源：scheduled / manual 等
+    pages = Column(Integer)  # 抓取的列表页数
+    new_articles = Column(Integer)  # 发现的新文章数
+    errors = Column(String)  # 错误信息（多条以换行分隔）
+    phase_durations = Column(String)  # 各阶段耗时（秒），JSON
+    owner = Column(String)  # 执行爬取的进程（主机名:进程号）
+    heartbeat_at = Column(DateTime)  # 运行期间定期更新，长时间未更新说明进程已退出
+
+    def to_dict(self):
+        duration = None
+        if self.started_at and self.finished_at:
+            duration = round((self.finished_at - self.started_at).total_seconds(), 3)
+        return {
+            "id": self.id,
+            "started_at": (
+                self.started_at.isoformat(timespec="seconds")
+                if self.started_at
+                else None
+            ),
+            "finished_at": (
+                self.finished_at.isoformat(timespec="seconds")
+                if self.finished_at
+                else None
+            ),
+            "duration": duration,
+            "status": self.status,
+            "trigger": self.trigger,
+            "owner": self.owner,
+            "pages": self.pages,
+            "new_articles": self.new_articles,
+            "errors": self.errors.split("\n") if self.errors else [],
+            "phase_durations": (
+                json.loads(self.phase_durations) if self.phase_durations else {}
+            ),
+        }
+
+    def __repr__(self):
+        return f"CrawlRun(id={self.id}, status='{self.status}')"
+
+
+class ListPageState(Base):
+    """列表页状态：条件请求的验证信息和已处理内容的指纹"""
+
+    __tablename__ = "list_page_state"
+
+    page = Column(Integer, primary_key=True)
+    etag = Column(String)  # 响应的 ETag，下次请求时作为 If-None-Match
+    last_modified = Column(String)  # 响应的 Last-Modified，下次作为 If-Modified-Since
+    fingerprint = Column(String)  # 页面中 (URL, 标题) 列表的哈希
+    updated_at = Column(DateTime)
+
+    def __repr__(self):
+        return f"ListPageState(page={self.page}, fingerprint='{self.fingerprint}')"
+
+
+class BackfillPage(Base):
+    """历史回填进度：每个列表页一行"""
+
+    __tablename__ = "backfill_pages"
+
+    page = Column(Integer, primary_key=True)
+    status = Column(String, index=True)  # done / failed
+    articles = Column(Integer)  # 页面中的文章数
+    new_articles = Column(Integer)  # 本页新入库的文章数
+    attempts = Column(Integer, default=0)
+    error = Column(String)
+    updated_at = Column(DateTime)
+
+    def __repr__(self):
+        return f"BackfillPage(page={self.page}, status='{self.status}')"
+
+
+class CrawlTask(Base):
+    """爬取工作队列中的任务（列表页或文章），多个进程通过租约领取"""
+
+    __tablename__ = "crawl_tasks"
+    __table_args__ = (
+        UniqueConstraint("kind", "key", name="uq_crawl_tasks_kind_key"),
+        Index("ix_crawl_tasks_status_available_at", "status", "available_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String)  # list_page / article
+    key = Column(String)  # 页码或文章URL，同类任务中唯一
+    payload = Column(String)  # 任务参数，JSON
+    status = Column(String)  # pending / leased / done / dead
+    attempts = Column(Integer, default=0)  # 已领取次数
+    available_at = Column(DateTime)  # 重试退避期间不可领取
+    lease_owner = Column(String)  # 持有租约的工作进程
+    lease_expires_at = Column(DateTime)  # 租约到期后任务重新可见
+    last_error = Column(String)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+
+    def __repr__(self):
+        return (
+            f"CrawlTask(id={self.id}, kind='{self.kind}', key='{self.key}', "
+            f"status='{self.status}')"
+        )
+
+
 class DatabaseManager:
     """数据库管理类"""
 
-    def __init__(self):
-        """初始化数据库连接"""
+    def __init__(self, db_url=None):
+        """
+        初始化数据库连接
+
+        Args:
+            db_url: 数据库地址，默认使用配置中的文章数据库（测试时可指定临时数据库）
+        """
         # 确保数据库目录存在
         DATABASE_DIR.mkdir(parents=True, exist_ok=True)
 
-        self.url = DATABASE_URI
-        self.engine = create_engine(DATABASE_URI)
+        self.url = db_url or DATABASE_URI
+        self.engine = create_sqlite_engine(self.url)
         print(f"数据库目录已存在: {DATABASE_DIR.exists()}")
-        print(f"连接数据库: {DATABASE_URI}")
+        print(f"连接数据库: {self.url}")
+        print(f"SQLite 设置: {read_sqlite_settings(self.engine)}")
 
         # 创建或更新所有表
         Base.metadata.create_all(self.engine)
@@ -61,11 +256,72 @@ class DatabaseManager:
         # 检查并升级数据库结构（如有需要）
         self._upgrade_database_structure()
 
+        # 已推送URL的 LRU 缓存（只缓存“已推送”这一不会失效的事实）
+        self._notified_cache = OrderedDict()
+        self._notified_cache_lock = threading.Lock()
+
+    # 后续版本新增的字段：字段名 -> SQLite 列定义
+    UPGRADE_COLUMNS = {
+        "ai_summary": "VARCHAR",
+        "ai_title": "VARCHAR",
+        "summary_hash": "VARCHAR",
+        "notified_at": "DATETIME",
+        "notify_claimed_at": "DATETIME",
+        "click_params": "VARCHAR",
+        "download_params": "VARCHAR",
+        "stats_refreshed_at": "DATETIME",
+    }
+
+    # 其他表后续版本新增的字段：表名 -> {字段名 -> SQLite 列定义}
+    UPGRADE_TABLE_COLUMNS = {
+        "crawl_runs": {
+            "owner": "VARCHAR",
+            "heartbeat_at": "DATETIME",
+        },
+    }
+
+    # 新增字段后需要回填的数据：字段名 -> 更新语句
+    UPGRADE_BACKFILL = {
+        # 升级前的文章均已由旧版本推送过，标记为已推送，避免升级后重复发送
+        "notified_at": "UPDATE articles SET notified_at = CURRENT_TIMESTAMP",
+    }
+
+    # 后续版本新增的索引：索引名 -> 建索引语句
+    UPGRADE_INDEXES = {
+        "ix_articles_summary_hash": "CREATE INDEX IF NOT EXISTS ix_articles_summary_hash ON articles (summary_hash)",
+        "ix_articles_notified_at": "CREATE INDEX IF NOT EXISTS ix_articles_notified_at ON articles (notified_at)",
+        "ix_articles_stats_refreshed_at": "CREATE INDEX IF NOT EXISTS ix_articles_stats_refreshed_at ON articles (stats_refreshed_at)",
+    }
+
     def _upgrade_database_structure(self):
-        """升级数据库结构，预留用于未来的结构变更"""
+        """升级数据库结构，添加缺失的字段和索引"""
         try:
-            # 当前文章数据库结构比较稳定，暂时不需要升级
-            # 此方法为未来可能的结构变更预留
+            with self.engine.connect() as conn:
+                upgrades = {
+                    "articles": self.UPGRADE_COLUMNS,
+                    **self.UPGRADE_TABLE_COLUMNS,
+                }
+                for table, upgrade_columns in upgrades.items():
+                    result = conn.execute(text(f"PRAGMA table_info({table})"))
+                    columns = [row[1] for row in result.fetchall()]
+
+                    for column, column_type in upgrade_columns.items():
+                        if column in columns:
+                            continue
+                        print(f"检测到文章数据库结构需要升级：{table} 添加 {column} 字段")
+                        conn.execute(
+                            text(
+                                f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"
+                            )
+                        )
+                        logging.info(f"文章数据库结构升级：{table} 添加了 {column} 字段")
+                        if table == "articles" and column in self.UPGRADE_BACKFILL:
+                            conn.execute(text(self.UPGRADE_BACKFILL[column]))
+
+                for statement in self.UPGRADE_INDEXES.values():
+                    conn.execute(text(statement))
+
+                conn.commit()
             print("文章数据库结构检查完成")
         except Exception as e:
             print(f"文章数据库结构检查失败: {str(e)}")
@@ -104,7 +360,7 @@ class DatabaseManager:
             session.close()
 
     def update_article_details(self, article_id, details):
-        """更新文章详情"""
+        """更新文章详情（正文变化时清除摘要哈希，下次生成摘要时重新生成）"""
         session = self.get_session()
         try:
             article = session.query(Article).filter(Article.id == article_id).first()
@@ -112,6 +368,12 @@ class DatabaseManager:
                 logging.warning(f"文章不存在，ID: {article_id}")
                 return False
 
+            content_changed = (
+                "content" in details and details["content"] != article.content
+            )
+            if content_changed and "summary_hash" not in details:
+                article.summary_hash = None
+
             for key, value in details.items():
                 if hasattr(article, key):
                     setattr(article, key, value)
@@ -126,6 +388,217 @@ class DatabaseManager:
         finally:
             session.close()
 
+    def claim_unnotified_urls(
+        self,
+        urls,
+        claim_timeout=NOTIFY_CLAIM_TIMEOUT_MINUTES,
+        lookback_days=NOTIFY_LOOKBACK_DAYS,
+    ):
+        """
+        领取尚未推送的文章URL（只记录领取时间，写入待推送账本后再调用 mark_notified）
+
+        先用内存 LRU 过滤，再用一条 UPDATE ... RETURNING 原子地领取剩余URL；
+        多个进程同时领取同一URL时只有一个会成功。此外还会一并领取：
+        领取后超过 claim_timeout 分钟仍未确认的文章（写账本失败或进程在两步之间退出），
+        以及发布日期在 lookback_days 天内、已解析但不在 urls 中的文章
+        （工作队列等其他进程入库的文章）
+
+        Args:
+            urls: 文章URL列表（本进程爬取到的新文章，可为空）
+            claim_timeout: 领取超时（分钟）
+            lookback_days: 领取其他进程入库文章的发布日期范围（天）
+
+        Returns:
+            list: 本次领取成功的URL（输入的URL在前并保持顺序，其余的在后）
+        """
+        candidates = []
+        with self._notified_cache_lock:
+            for url in dict.fromkeys(urls):
+                if url in self._notified_cache:
+                    self._notified_cache.move_to_end(url)
+                else:
+                    candidates.append(url)
+
+        now = datetime.now()
+        claimable = and_(
+            Article.notified_at.is_(None),
+            or_(
+                Article.notify_claimed_at.is_(None),
+                Article.notify_claimed_at < now - timedelta(minutes=claim_timeout),
+            ),
+        )
+        oldest_date = (now - timedelta(days=lookback_days)).strftime("%Y-%m-%d")
+        session = self.get_session()
+        try:
+            claimed = []
+            for i in range(0, len(candidates), 500):
+                chunk = Article.url.in_(candidates[i : i + 500])
+                claimed.extend(self._claim_urls(session, and_(chunk, claimable), now))
+
+            # 之前领取后一直没有确认的文章，以及其他进程入库的近期文章
+            others = self._claim_urls(
+                session,
+                and_(
+                    or_(
+                        Article.notify_claimed_at.isnot(None),
+                        and_(
+                            Article.date >= oldest_date,
+                            Article.detail_time.isnot(None),
+                        ),
+                    ),
+                    claimable,
+                ),
+                now,
+            )
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logging.error(f"领取待推送文章失败: {str(e)}")
+            return []
+        finally:
+            session.close()
+
+        claimed = set(claimed)
+        others = [url for url in others if url not in claimed]
+        if others:
+            logging.info(f"另外领取 {len(others)} 篇未确认或由其他进程入库的文章")
+        return [url for url in candidates if url in claimed] + others
+
+    @staticmethod
+    def _claim_urls(session, condition, now):
+        """把满足条件的文章标记为已领取，返回领取到的URL"""
+        statement = update(Article).where(condition).values(notify_claimed_at=now)
+        if sqlite3.sqlite_version_info >= (3, 35):
+            result = session.execute(statement.returning(Article.url))
+            return [row.url for row in result]
+        # 旧版 SQLite 不支持 RETURNING：先查后改（单进程下等价）
+        urls = [row.url for row in session.query(Article.url).filter(condition)]
+        session.execute(statement)
+        return urls
+
+    def mark_notified(self, urls):
+        """
+        确认文章已写入待推送账本，标记为已推送
+
+        Args:
+            urls: claim_unnotified_urls 返回的URL列表
+
+        Returns:
+            bool: 是否标记成功（失败时领取超时后会被重新领取）
+        """
+        if not urls:
+            return True
+        session = self.get_session()
+        try:
+            now = datetime.now()
+            for i in range(0, len(urls), 500):
+                session.execute(
+                    update(Article)
+                    .where(Article.url.in_(urls[i : i + 500]))
+                    .where(Article.notified_at.is_(None))
+                    .values(notified_at=now)
+                )
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logging.error(f"标记已推送文章失败: {str(e)}")
+            return False
+        finally:
+            session.close()
+
+        self._remember_notified(urls)
+        return True
+
+    def _remember_notified(self, urls):
+        """写入已推送URL缓存，超出容量时淘汰最久未使用的"""
+        with self._notified_cache_lock:
+            for url in urls:
+                self._notified_cache[url] = True
+            while len(self._notified_cache) > NOTIFIED_URL_CACHE_SIZE:
+                self._notified_cache.popitem(last=False)
+
+    def get_existing_urls(self, urls):
+        """
+        查询已入库的文章URL
+
+        Args:
+            urls: 文章URL列表
+
+        Returns:
+            set: 其中已存在的URL
+        """
+        urls = list(urls)
+        session = self.get_session()
+        try:
+            existing = set()
+            for i in range(0, len(urls), 500):
+                rows = session.query(Article.url).filter(
+                    Article.url.in_(urls[i : i + 500])
+                )
+                existing.update(row.url for row in rows)
+            return existing
+        finally:
+            session.close()
+
+    def get_list_page_state(self, page):
+        """获取列表页状态，没有记录时返回 None"""
+        session = self.get_session()
+        try:
+            state = session.get(ListPageState, page)
+            if state is not None:
+                session.expunge(state)
+            return state
+        finally:
+            session.close()
+
+    def save_list_page_state(self, page, etag, last_modified, fingerprint):
+        """保存列表页状态（页面中的文章全部处理成功后，或只有验证信息变化时调用）"""
+        session = self.get_session()
+        try:
+            session.merge(
+                ListPageState(
+                    page=page,
+                    etag=etag,
+                    last_modified=last_modified,
+                    fingerprint=fingerprint,
+                    updated_at=datetime.now(),
+                )
+            )
+            session.commit()
+            return True
+        except Exception as e:
+            session.rollback()
+            logging.error(f"保存列表页状态失败: {str(e)}")
+            return False
+        finally:
+            session.close()
+
+    def has_unparsed_articles(self):
+        """是否有尚未解析详情的文章（新入库或上次解析被中断的文章）"""
+        session = self.get_session()
+        try:
+            query = session.query(Article.id).filter(
+                or_(
+                    Article.detail_time.is_(None),
+                    Article.content.is_(None),
+                    Article.content == "",
+                )
+            )
+            return session.query(query.exists()).scalar()
+        finally:
+            session.close()
+
+    def has_unsummarized_articles(self):
+        """是否有已解析但尚未生成摘要的文章（含上次摘要服务不可用时留下的文章）"""
+        session = self.get_session()
+        try:
+            query = session.query(Article.id).filter(
+                Article.detail_time.isnot(None), Article.summary_hash.is_(None)
+            )
+            return session.query(query.exists()).scalar()
+        finally:
+            session.close()
+
     def get_all_articles(self):
         """获取所有文章"""
         session = self.get_session()
@@ -135,6 +608,25 @@ class DatabaseManager:
             session.close()
 
 
+_database_manager = None
+_database_manager_lock = threading.Lock()
+
+
+def get_database_manager():
+    """
+    获取进程内共享的文章数据库管理器
+
+    引擎、连接池和表结构检查只在第一次调用时创建和执行，
+    之后每次爬取都复用同一个实例
+    """
+    global _database_manager
+    if _database_manager is None:
+        with _database_manager_lock:
+            if _database_manager is None:
+                _database_manager = DatabaseManager()
+    return _database_manager
+
+
 # 自定义异常类
 class CustomError(Exception):
     """自定义异常类，用于处理爬虫过程中的特定错误"""
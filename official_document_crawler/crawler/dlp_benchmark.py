@@ -0,0 +1,203 @@
+"""
+DLP 脱敏性能测试
+
+在文章正文中随机插入已知的模拟敏感信息，分别用 sidecar / hybrid / local 三种模式脱敏，
+对比处理速度（篇/秒）、各类敏感信息的召回率以及交给安全服务的比例
+
+用法:
+    python -m official_document_crawler.crawler.dlp_benchmark -n 200
+    python -m official_document_crawler.crawler.dlp_benchmark --modes hybrid local
+"""
+
+import argparse
+import random
+import time
+
+from .database import Article, DatabaseManager
+from .local_dlp import local_dlp_engine
+from .masking import mask_sensitive_data
+from sidecar_client import get_sidecar_client
+
+# 文章库为空时使用的样例正文
+SAMPLE_TEXTS = [
+    "关于开展2025年度学生综合测评工作的通知。各学院：为做好本年度综合测评工作，"
+    "请各学院于规定时间内完成材料收集与初审，并将汇总表报送学生部。",
+    "图书馆关于寒假期间开放时间调整的通知。寒假期间图书馆一楼自习区正常开放，"
+    "其余楼层暂停开放，请读者合理安排时间。",
+    "关于举办校园招聘双选会的通知。本次双选会共有120家用人单位参加，"
+    "请有意向的同学携带简历按时参加。",
+]
+
+NAMES = ["张伟", "王芳", "李娜", "刘洋", "陈静", "杨磊", "赵敏", "黄强"]
+
+_ID_WEIGHTS = [7, 9, 10, 5, 8, 4, 2, 1, 6, 3, 7, 9, 10, 5, 8, 4, 2]
+_ID_CHECK = "10X98765432"
+
+
+def _digits(rng, count):
+    return "".join(rng.choice("0123456789") for _ in range(count))
+
+
+def _id_card(rng):
+    body = (
+        "440305"
+        + str(rng.randint(1985, 2005))
+        + f"{rng.randint(1, 12):02d}"
+        + f"{rng.randint(1, 28):02d}"
+        + _digits(rng, 3)
+    )
+    checksum = sum(int(ch) * w for ch, w in zip(body, _ID_WEIGHTS)) % 11
+    return body + _ID_CHECK[checksum]
+
+
+def _bank_card(rng):
+    body = "6222" + _digits(rng, 11)
+    total = 0
+    for i, ch in enumerate(reversed(body)):
+        digit = int(ch)
+        if i % 2 == 0:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    number = body + str((10 - total % 10) % 10)
+    return " ".join(number[i : i + 4] for i in range(0, 16, 4))
+
+
+# 敏感信息类型 -> (生成函数, 插入文本模板)
+SECRET_TYPES = {
+    "手机号": (lambda rng: "1" + rng.choice("3456789") + _digits(rng, 9), "联系电话：{}。"),
+    "身份证号": (_id_card, "身份证号码 {} 。"),
+    "学号": (lambda rng: "20" + _digits(rng, 10), "学号{}的同学请注意。"),
+    "邮箱": (lambda rng: f"user{_digits(rng, 5)}@example.com", "材料发送至{}。"),
+    "银行卡号": (_bank_card, "收款账户 {} 。"),
+    "姓名": (lambda rng: rng.choice(NAMES), "姓名：{}。"),
+}
+
+
+def load_corpus(count):
+    """从文章库读取正文，不足时用样例正文补齐"""
+    texts = []
+    try:
+        db_manager = DatabaseManager()
+        session = db_manager.get_session()
+        try:
+            rows = (
+                session.query(Article.content)
+                .filter(Article.content.isnot(None))
+                .filter(Article.content != "")
+                .limit(count)
+                .all()
+            )
+            texts = [row.content[:2000] for row in rows]
+        finally:
+            session.close()
+    except Exception as e:
+        print(f"⚠️ 读取文章库失败，使用样例正文: {e}")
+
+    while len(texts) < count:
+        texts.append(SAMPLE_TEXTS[len(texts) % len(SAMPLE_TEXTS)])
+    return texts
+
+
+def inject_secrets(texts, per_text=3, seed=0):
+    """
+    在每篇正文中随机插入敏感信息
+
+    Returns:
+        list: [(插入后的正文, [(类型, 值)...])]
+    """
+    rng = random.Random(seed)
+    samples = []
+    for text in texts:
+        secrets = []
+        pieces = [text]
+        for label in rng.sample(list(SECRET_TYPES), per_text):
+            generate, template = SECRET_TYPES[label]
+            value = generate(rng)
+            secrets.append((label, value))
+            pieces.insert(rng.randint(0, len(pieces)), template.format(value))
+        samples.append(("".join(pieces), secrets))
+    return samples
+
+
+def run_mode(samples, mode):
+    """
+    用指定模式脱敏全部样本
+
+    Returns:
+        dict: 速度、召回率和安全服务使用情况
+    """
+    client = get_sidecar_client()
+    errors_before = client.stats()["dlp"]["errors"]
+    escalated_before = local_dlp_engine.stats()["escalated"]
+
+    found = {}
+    total = {}
+    start = time.perf_counter()
+    for text, secrets in samples:
+        masked = mask_sensitive_data(text, None, mode)
+        for label, value in secrets:
+            total[label] = total.get(label, 0) + 1
+            if value not in masked:
+                found[label] = found.get(label, 0) + 1
+    elapsed = time.perf_counter() - start
+
+    all_total = sum(total.values())
+    all_found = sum(found.values())
+    return {
+        "mode": mode,
+        "articles": len(samples),
+        "elapsed": elapsed,
+        "articles_per_sec": len(samples) / elapsed if elapsed > 0 else 0.0,
+        "recall": all_found / all_total if all_total else 0.0,
+        "recall_by_type": {
+            label: found.get(label, 0) / count for label, count in total.items()
+        },
+        "escalated": local_dlp_engine.stats()["escalated"] - escalated_before,
+        "sidecar_errors": client.stats()["dlp"]["errors"] - errors_before,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DLP 脱敏性能与召回率对比")
+    parser.add_argument("-n", "--articles", type=int, default=200, help="测试文章数量")
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        choices=["sidecar", "hybrid", "local"],
+        default=["sidecar", "hybrid", "local"],
+        help="要对比的脱敏模式",
+    )
+    parser.add_argument("--per-article", type=int, default=3, help="每篇插入的敏感信息数")
+    parser.add_argument("--seed", type=int, default=0, help="随机数种子")
+    args = parser.parse_args()
+
+    samples = inject_secrets(
+        load_corpus(args.articles), min(args.per_article, len(SECRET_TYPES)), args.seed
+    )
+
+    print("\n📈 DLP 脱敏对比结果:")
+    for mode in args.modes:
+        result = run_mode(samples, mode)
+        print(
+            f"\n[{mode}] {result['articles']} 篇，耗时 {result['elapsed']:.2f} 秒，"
+            f"{result['articles_per_sec']:.1f} 篇/秒，总召回率 {result['recall']:.1%}"
+        )
+        print(
+            "   " + "，".join(
+                f"{label} {recall:.0%}"
+                for label, recall in sorted(result["recall_by_type"].items())
+            )
+        )
+        if mode == "hybrid":
+            print(f"   交给安全服务: {result['escalated']} 篇")
+        if mode != "local" and result["sidecar_errors"]:
+            print(
+                f"   ⚠️ 安全服务调用失败 {result['sidecar_errors']} 次，"
+                "这些文本按降级结果计入召回率"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+DLP 缓存模块
+
+按输入文本的哈希持久化 DLP 脱敏结果（文章数据库 dlp_cache 表），
+相同文本只调用一次脱敏服务，重新解析历史文章时无需访问安全服务；
+总容量超过上限时按最近使用时间淘汰。命中时的最近使用时间按间隔粗粒度更新，
+先在内存中缓冲，攒够一批或写入缓存时再一次提交
+"""
+
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, func, update
+
+from .database import DLPCacheEntry
+from .config import (
+    DLP_CACHE_MAX_BYTES,
+    DLP_CACHE_TOUCH_INTERVAL_MINUTES,
+    DLP_CACHE_TOUCH_BATCH_SIZE,
+)
+
+# 进程内的缓存统计
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(key, value=1):
+    with _stats_lock:
+        _stats[key] += value
+
+
+def dlp_cache_stats():
+    """获取 DLP 缓存的命中、未命中、写入和淘汰次数"""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
+
+
+def compute_text_hash(text):
+    """计算文本哈希，用作缓存键"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class DLPCache:
+    """DLP 脱敏结果缓存（线程安全）"""
+
+    def __init__(
+        self,
+        db_manager,
+        max_bytes=DLP_CACHE_MAX_BYTES,
+        touch_interval=DLP_CACHE_TOUCH_INTERVAL_MINUTES,
+        touch_batch_size=DLP_CACHE_TOUCH_BATCH_SIZE,
+    ):
+        """
+        Args:
+            db_manager: 文章数据库管理器
+            max_bytes: 缓存的脱敏结果总字节数上限
+            touch_interval: 命中记录的最近使用时间早于该分钟数时才更新
+            touch_batch_size: 缓冲的最近使用时间更新达到该数量时批量写入
+        """
+        self.db_manager = db_manager
+        self.max_bytes = max_bytes
+        self.touch_interval = timedelta(minutes=touch_interval)
+        self.touch_batch_size = touch_batch_size
+        self._lock = threading.Lock()
+        self._total_bytes = None  # 首次写入时从数据库统计
+        self._touches = {}  # 文本哈希 -> 待写入的最近使用时间
+        self._touches_lock = threading.Lock()
+
+    def get(self, text):
+        """
+        查询缓存（只读，最近使用时间的更新缓冲后批量写入）
+
+        Returns:
+            str: 脱敏结果；未命中时返回 None
+        """
+        text_hash = compute_text_hash(text)
+        session = self.db_manager.get_session()
+        try:
+            entry = (
+                session.query(DLPCacheEntry.masked_text, DLPCacheEntry.last_used_at)
+                .filter(DLPCacheEntry.text_hash == text_hash)
+                .first()
+            )
+        except Exception as e:
+            logging.warning(f"读取 DLP 缓存失败: {str(e)}")
+            entry = None
+        finally:
+            session.close()
+
+        if entry is None:
+            _count("misses")
+            return None
+        _count("hits")
+
+        now = datetime.now()
+        last_used_at = entry.last_used_at
+        if last_used_at is None or now - last_used_at >= self.touch_interval:
+            with self._touches_lock:
+                self._touches[text_hash] = now
+                full = len(self._touches) >= self.touch_batch_size
+            if full:
+                self.flush()
+        return entry.masked_text
+
+    def _write_touches(self, session):
+        """在给定会话中写入并清空缓冲的最近使用时间（期间被淘汰的记录直接忽略）"""
+        with self._touches_lock:
+            touches, self._touches = self._touches, {}
+        if touches:
+            table = DLPCacheEntry.__table__
+            session.execute(
+                update(table)
+                .where(table.c.text_hash == bindparam("touched_hash"))
+                .values(last_used_at=bindparam("touched_at")),
+                [
+                    {"touched_hash": text_hash, "touched_at": used_at}
+                    for text_hash, used_at in touches.items()
+                ],
+            )
+        return len(touches)
+
+    def flush(self):
+        """
+        把缓冲的最近使用时间一次写入数据库（批量处理结束时调用）
+
+        Returns:
+            int: 写入的记录数
+        """
+        session = self.db_manager.get_session()
+        try:
+            written = self._write_touches(session)
+            session.commit()
+            return written
+        except Exception as e:
+            session.rollback()
+            logging.warning(f"更新 DLP 缓存使用时间失败: {str(e)}")
+            return 0
+        finally:
+            session.close()
+
+    def put(self, text, masked_text):
+        """写入缓存，超出容量时淘汰最久未使用的记录"""
+        text_hash = compute_text_hash(text)
+        size = len(masked_text.encode("utf-8"))
+        now = datetime.now()
+
+        with self._lock:
+            session = self.db_manager.get_session()
+            try:
+                if self._total_bytes is None:
+                    self._total_bytes = (
+                        session.query(func.coalesce(func.sum(DLPCacheEntry.size), 0))
+                        .scalar()
+                    )
+                existing = session.get(DLPCacheEntry, text_hash)
+                if existing is not None:
+                    self._total_bytes -= existing.size or 0
+                    existing.masked_text = masked_text
+                    existing.size = size
+                    existing.last_used_at = now
+                else:
+                    session.add(
+                        DLPCacheEntry(
+                            text_hash=text_hash,
+                            masked_text=masked_text,
+                            size=size,
+                            created_at=now,
+                            last_used_at=now,
+                        )
+                    )
+                self._total_bytes += size
+                # 顺带写入缓冲的最近使用时间，淘汰前保证其已落库
+                self._write_touches(session)
+                session.commit()
+                _count("stores")
+
+                if self._total_bytes > self.max_bytes:
+                    self._evict(session)
+            except Exception as e:
+                session.rollback()
+                self._total_bytes = None  # 下次重新统计
+                logging.warning(f"写入 DLP 缓存失败: {str(e)}")
+            finally:
+                session.close()
+
+    def _evict(self, session):
+        """按最近使用时间淘汰，直到总容量降到上限的 90%"""
+        target = self.max_bytes * 0.9
+        evicted = 0
+        while self._total_bytes > target:
+            rows = (
+                session.query(DLPCacheEntry.text_hash, DLPCacheEntry.size)
+                .order_by(DLPCacheEntry.last_used_at)
+                .limit(100)
+                .all()
+            )
+            if not rows:
+                break
+            hashes = []
+            for row in rows:
+                hashes.append(row.text_hash)
+                self._total_bytes -= row.size or 0
+                if self._total_bytes <= target:
+                    break
+            session.query(DLPCacheEntry).filter(
+                DLPCacheEntry.text_hash.in_(hashes)
+            ).delete(synchronize_session=False)
+            session.commit()
+            evicted += len(hashes)
+
+        _count("evictions", evicted)
+        logging.info(f"DLP 缓存淘汰 {evicted} 条记录，当前约 {self._total_bytes} 字节")
@@ -6,6 +6,7 @@ URL抓取模块
 
 import re
 import time
+import hashlib
 import logging
 import copy
 from .utils import http_get, sleep_with_progress
@@ -28,8 +29,11 @@ def fetch_article_list(page_number):
     if not response:
         return []
 
-    html_content = response.text
+    return _parse_article_list(response.text, page_number)
 
+
+def _parse_article_list(html_content, page_number):
+    """从列表页HTML中提取文章信息，结构错误时返回空列表"""
     # 使用正则表达式提取内容
     types = re.findall(r'target="_self">(.*?)</a></div>', html_content)
     units = re.findall(r'style="font-size: 14px;">(.*?)</a></div>', html_content)
@@ -67,6 +71,64 @@ def fetch_article_list(page_number):
         return []
 
 
+def list_page_fingerprint(articles):
+    """计算列表页指纹（按文章的 URL 和标题），列表为空时返回 None"""
+    if not articles:
+        return None
+    joined = "\n".join(f"{article['url']}\t{article['title']}" for article in articles)
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()
+
+
+def fetch_list_page(page_number, db_manager):
+    """
+    抓取列表页并判断内容是否变化
+
+    有上次处理成功的记录时发送条件请求（If-None-Match / If-Modified-Since），
+    服务器返回 304 或提取出的 (URL, 标题) 指纹与记录相同时视为没有变化
+
+    Args:
+        page_number: 页码
+        db_manager: 数据库管理器实例
+
+    Returns:
+        tuple: (状态, 文章列表, 页面状态)
+            状态为 changed / unchanged / failed；
+            页面状态为 (ETag, Last-Modified, 指纹)，仅在 changed 时返回，
+            由调用方在页面中的文章全部处理成功后保存
+    """
+    state = db_manager.get_list_page_state(page_number)
+    headers = {}
+    if state is not None and state.fingerprint:
+        if state.etag:
+            headers["If-None-Match"] = state.etag
+        if state.last_modified:
+            headers["If-Modified-Since"] = state.last_modified
+
+    url = LIST_URL_TEMPLATE.format(page=page_number)
+    response = http_get(url, headers=headers or None)
+    if not response:
+        return "failed", [], None
+    if response.status_code == 304:
+        logging.info(f"页面 {page_number} 未修改（304）")
+        return "unchanged", [], None
+
+    articles = _parse_article_list(response.text, page_number)
+    if not articles:
+        return "failed", [], None
+
+    page_state = (
+        response.headers.get("ETag"),
+        response.headers.get("Last-Modified"),
+        list_page_fingerprint(articles),
+    )
+    if state is not None and state.fingerprint == page_state[2]:
+        # 内容没有变化；验证信息变化时更新，以便下次使用条件请求
+        if (state.etag, state.last_modified) != page_state[:2]:
+            db_manager.save_list_page_state(page_number, *page_state)
+        return "unchanged", articles, None
+    return "changed", articles, page_state
+
+
 def fetch_article_content(url):
     """
     抓取文章内容
@@ -90,7 +152,9 @@ def fetch_article_content(url):
         return response.text
 
 
-def fetch_articles_batch(start_page, end_page, db_manager):
+def fetch_articles_batch(
+    start_page, end_page, db_manager, should_stop=None, on_page=None
+):
     """
     批量抓取多个页面的文章
 
@@ -98,22 +162,35 @@ def fetch_articles_batch(start_page, end_page, db_manager):
         start_page: 起始页码
         end_page: 结束页码
         db_manager: 数据库管理器实例
+        should_stop: 返回 True 时提前结束（超时或取消），可选
+        on_page: 每抓取完一页时调用，可选
     """
     new_urls = []
     # 从高到低抓取（通常新文章在前面的页码）
     
     for page in range(end_page, start_page, -1):
+        if should_stop and should_stop():
+            logging.warning("抓取提前结束")
+            break
         logging.info(f"正在抓取第 {page} 页")
 
-        # 抓取文章列表
-        articles = fetch_article_list(page)
-        if not articles:
+        # 抓取文章列表，内容没有变化时不再抓取文章
+        status, articles, page_state = fetch_list_page(page, db_manager)
+        if status == "failed":
             logging.error(f"页面 {page} 抓取失败")
-            success = False
+            continue
+        if status == "unchanged":
+            logging.info(f"页面 {page} 没有变化，跳过")
+            if on_page:
+                on_page(False)
             continue
 
         # 抓取每篇文章的详细内容
+        completed = True
         for article in articles:
+            if should_stop and should_stop():
+                completed = False
+                break
             logging.info(f"抓取文章: {article['title']} - {article['url']}")
             raw_data = fetch_article_content(article["url"])
 
@@ -130,8 +207,15 @@ def fetch_articles_batch(start_page, end_page, db_manager):
                 # 短暂休眠避免请求过快
                 time.sleep(SLEEP_INTERVAL["default"])
             else:
+                completed = False
                 logging.error(f"文章内容抓取失败: {article['url']}")
 
+        # 页面中的文章全部处理成功后才记录指纹，失败的文章下次会重新抓取
+        if completed:
+            db_manager.save_list_page_state(page, *page_state)
+        if on_page:
+            on_page(True)
+
         # 按页码进行适当的休眠
         if page % 10 == 0:
             logging.info(f"休眠 {SLEEP_INTERVAL['every_10']} 秒")
@@ -0,0 +1,149 @@
+"""
+本地 DLP 模块
+
+用预编译的正则规则在进程内脱敏常见的结构化敏感信息（身份证号、手机号、学号、
+邮箱、银行卡号等），替换格式与安全服务一致（[MASKED: 类型]）；
+文本中出现规则无法判断的候选（姓名、住址等语义信息，或未归类的长数字串）时，
+标记为需要交给安全服务进一步处理
+"""
+
+import re
+import threading
+
+# 脱敏规则：(类型, 正则, 校验函数)；按顺序依次替换
+_ID_CARD = re.compile(
+    r"(?<![0-9A-Za-z])[1-9]\d{5}(?:18|19|20)\d{2}(?:0[1-9]|1[0-2])"
+    r"(?:0[1-9]|[12]\d|3[01])\d{3}[\dXx](?![0-9A-Za-z])"
+)
+_BANK_CARD = re.compile(r"(?<![\d-])(?:\d{4}[ -]?){3}\d{4}(?:\d{3})?(?![\d-])")
+_MOBILE = re.compile(r"(?<![\d+])(?:\+?86[- ]?)?1[3-9]\d{9}(?!\d)")
+_STUDENT_ID = re.compile(r"(?<!\d)20\d{10}(?!\d)")
+_EMAIL = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+_IPV4 = re.compile(
+    r"(?<![\d.])(?:(?:25[0-5]|2[0-4]\d|1?\d?\d)\.){3}(?:25[0-5]|2[0-4]\d|1?\d?\d)(?![\d.])"
+)
+_API_KEY = re.compile(r"\b(?:sk|ak|AKIA)[-_]?[A-Za-z0-9]{16,}\b")
+_PASSWORD = re.compile(
+    r"(密码|口令|password|passwd)(\s*(?:[:：]|为|是)\s*[:：]?\s*)([^\s，。；、,;）)]+)",
+    re.IGNORECASE,
+)
+
+# 需要语义判断的关键词（姓名、住址等无法用规则识别），出现时交给安全服务
+_AMBIGUOUS_WORDS = (
+    "姓名",
+    "住址",
+    "家庭地址",
+    "通讯地址",
+    "身份证",
+    "护照",
+    "卡号",
+    "CVV",
+    "账号",
+    "密钥",
+    "token",
+    "联系人",
+)
+_AMBIGUOUS_KEYWORDS = re.compile(
+    "|".join(re.escape(keyword) for keyword in _AMBIGUOUS_WORDS), re.IGNORECASE
+)
+
+# 已脱敏的片段（连同紧挨在前面的字段名，如“身份证号：[MASKED: 身份证号]”），
+# 检查候选前去掉，替换文本和已处理字段中的关键词不再触发安全服务
+_MASKED_SPAN = re.compile(
+    rf"(?:(?:{_AMBIGUOUS_KEYWORDS.pattern})\w{{0,2}}\s*(?:[:：]|为|是)?\s*)?"
+    r"\[MASKED: [^\]]*\]",
+    re.IGNORECASE,
+)
+
+# 规则脱敏后仍残留的长数字串（未归类的证件号、账号等）
+_LONG_DIGITS = re.compile(r"\d{7,}")
+
+# 公告中常见的办公电话，不视为敏感信息，也不触发安全服务
+_LANDLINE = re.compile(r"(?<!\d)0\d{2,3}-\d{7,8}(?!\d)")
+
+
+def _luhn_valid(number):
+    """银行卡号 Luhn 校验"""
+    digits = [int(ch) for ch in number if ch.isdigit()]
+    checksum = 0
+    for i, digit in enumerate(reversed(digits)):
+        if i % 2 == 1:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        checksum += digit
+    return checksum % 10 == 0
+
+
+RULES = [
+    ("身份证号", _ID_CARD, None),
+    ("银行卡号", _BANK_CARD, _luhn_valid),
+    ("手机号", _MOBILE, None),
+    ("学号", _STUDENT_ID, None),
+    ("邮箱", _EMAIL, None),
+    ("IP地址", _IPV4, None),
+    ("API Key", _API_KEY, None),
+]
+
+
+class LocalDLPEngine:
+    """基于规则的本地脱敏引擎（线程安全，除统计外无状态）"""
+
+    def __init__(self, rules=None):
+        self.rules = rules or RULES
+        self._lock = threading.Lock()
+        self._stats = {"texts": 0, "matches": 0, "escalated": 0}
+
+    def mask(self, text):
+        """
+        用规则脱敏文本
+
+        Returns:
+            tuple: (脱敏后的文本, 是否存在需要安全服务判断的候选)
+        """
+        if not text:
+            return text, False
+
+        matches = 0
+        for label, pattern, validate in self.rules:
+            replacement = f"[MASKED: {label}]"
+
+            def replace(match, replacement=replacement, validate=validate):
+                nonlocal matches
+                if validate is not None and not validate(match.group(0)):
+                    return match.group(0)
+                matches += 1
+                return replacement
+
+            text = pattern.sub(replace, text)
+
+        def replace_password(match):
+            nonlocal matches
+            matches += 1
+            return f"{match.group(1)}{match.group(2)}[MASKED: 密码]"
+
+        text = _PASSWORD.sub(replace_password, text)
+
+        remaining = _LANDLINE.sub("", _MASKED_SPAN.sub("", text))
+        ambiguous = bool(
+            _AMBIGUOUS_KEYWORDS.search(remaining) or _LONG_DIGITS.search(remaining)
+        )
+        with self._lock:
+            self._stats["texts"] += 1
+            self._stats["matches"] += matches
+            if ambiguous:
+                self._stats["escalated"] += 1
+        return text, ambiguous
+
+    def stats(self):
+        """处理文本数、规则命中数、需要安全服务处理的文本数"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["escalation_rate"] = (
+            stats["escalated"] / stats["texts"] if stats["texts"] else 0.0
+        )
+        return stats
+
+
+# 进程内共享的本地引擎
+local_dlp_engine = LocalDLPEngine()
@@ -0,0 +1,147 @@
+"""
+脱敏模块
+
+提供单条文本的脱敏函数，以及独立于解析的批量脱敏阶段：
+解析线程只负责提取文本，脱敏请求按批提交给有限并发的线程池，
+结果按提交顺序取回，使解析的 CPU 工作与安全服务的 I/O 相互重叠
+"""
+
+import collections
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from .local_dlp import local_dlp_engine
+from .config import DLP_MODE, DLP_MAX_WORKERS, DLP_BATCH_SIZE
+from sidecar_client import get_sidecar_client
+
+
+def mask_sensitive_data(text, dlp_cache=None, mode=DLP_MODE):
+    """
+    脱敏文本中的敏感信息
+
+    Args:
+        text: 待脱敏文本
+        dlp_cache: DLP 缓存（可选），命中时不调用服务
+        mode: sidecar / hybrid / local，见 config.DLP_MODE
+
+    Returns:
+        str: 脱敏结果；服务不可用时返回原文或本地规则的结果（降级结果不写入缓存）
+    """
+    if not text:
+        return text
+
+    if mode in ("hybrid", "local"):
+        # 先用本地规则处理结构化敏感信息，交给安全服务的文本也因此更少暴露
+        text, ambiguous = local_dlp_engine.mask(text)
+        if mode == "local" or not ambiguous:
+            return text
+
+    if dlp_cache is not None:
+        cached = dlp_cache.get(text)
+        if cached is not None:
+            return cached
+
+    masked = get_sidecar_client().try_mask_text(text)
+    if masked is None:
+        return text
+
+    if dlp_cache is not None:
+        dlp_cache.put(text, masked)
+    return masked
+
+
+class MaskingStage:
+    """
+    批量脱敏阶段
+
+    add() 收集待脱敏文本，凑满一批后提交到线程池并立即返回；
+    已完成的批次按提交顺序返回给调用方，在途批次数超过上限时阻塞等待最早的一批
+    """
+
+    def __init__(
+        self,
+        dlp_cache=None,
+        max_workers=DLP_MAX_WORKERS,
+        batch_size=DLP_BATCH_SIZE,
+        max_pending_batches=2,
+    ):
+        """
+        Args:
+            dlp_cache: DLP 缓存（可选）
+            max_workers: 同时进行的脱敏请求数
+            batch_size: 每批文本数量
+            max_pending_batches: 最多同时在途的批次数（限制内存占用）
+        """
+        self.dlp_cache = dlp_cache
+        self.batch_size = max(int(batch_size), 1)
+        self.max_pending_batches = max(int(max_pending_batches), 1)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(int(max_workers), 1), thread_name_prefix="DLP"
+        )
+        self._batch = []  # [(键, 文本)]
+        self._pending = collections.deque()  # [[(键, 文本, future)]]
+
+    def add(self, key, text):
+        """
+        加入一条待脱敏文本
+
+        Args:
+            key: 调用方用来对应结果的任意对象
+            text: 待脱敏文本
+
+        Returns:
+            list: 已完成的 (键, 脱敏结果)，按加入顺序
+        """
+        self._batch.append((key, text))
+        if len(self._batch) >= self.batch_size:
+            self._submit_batch()
+        return self._collect(block=len(self._pending) > self.max_pending_batches)
+
+    def flush(self):
+        """提交剩余文本并等待全部完成，返回剩余的 (键, 脱敏结果)"""
+        self._submit_batch()
+        return self._collect(block=True, drain=True)
+
+    def close(self):
+        """关闭线程池"""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _submit_batch(self):
+        if not self._batch:
+            return
+        self._pending.append(
+            [
+                (
+                    key,
+                    text,
+                    self._executor.submit(mask_sensitive_data, text, self.dlp_cache),
+                )
+                for key, text in self._batch
+            ]
+        )
+        self._batch = []
+
+    def _collect(self, block=False, drain=False):
+        """按顺序取出已完成的批次；block 时至少等待最早的一批，drain 时等待全部"""
+        results = []
+        while self._pending:
+            batch = self._pending[0]
+            if not (block or all(future.done() for _, _, future in batch)):
+                break
+            self._pending.popleft()
+            for key, text, future in batch:
+                try:
+                    results.append((key, future.result()))
+                except Exception as e:
+                    # 与服务不可用时的降级一致，返回原文
+                    logging.error(f"脱敏失败: {str(e)}")
+                    results.append((key, text))
+            if not drain:
+                block = False
+        return results
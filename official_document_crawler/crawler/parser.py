@@ -6,32 +6,21 @@
 
 import re
 import logging
-import requests
 from bs4 import BeautifulSoup
-from .stats import get_click_count, get_download_count
+from .stats import extract_click_params, extract_download_params
 from .database import CustomError
+from .dlp_cache import DLPCache, dlp_cache_stats
+from .masking import MaskingStage, mask_sensitive_data
 
 
-def mask_sensitive_data(text):
-    """调用 Secure Utils DLP 服务进行脱敏"""
-    try:
-        resp = requests.post(
-            "http://localhost:58080/api/v1/dlp/mask", json={"text": text}, timeout=30
-        )
-        if resp.status_code == 200:
-            return resp.json().get("data", {}).get("masked_text", text)
-        logging.warning(f"DLP 服务调用失败: {resp.status_code}")
-    except Exception as e:
-        logging.warning(f"DLP 服务连接异常: {e}")
-    return text
-
-
-def parse_article_details(html_content):
+def parse_article_details(html_content, dlp_cache=None, mask=True):
     """
     解析文章详情
 
     Args:
         html_content: 文章HTML内容
+        dlp_cache: DLP 缓存（可选）
+        mask: 是否在解析时直接脱敏；批量处理时为 False，由 MaskingStage 统一脱敏
 
     Returns:
         dict: 包含文章详情的字典
@@ -49,7 +38,9 @@ def parse_article_details(html_content):
         total_content = "".join(p.text for p in content_form)
 
         # [Security] 调用 DLP 进行脱敏
-        result["total_content"] = mask_sensitive_data(total_content)
+        if mask:
+            total_content = mask_sensitive_data(total_content, dlp_cache)
+        result["total_content"] = total_content
 
         # 获取发布时间
         time_span = soup.select_one('span:-soup-contains("发布时间")')
@@ -76,37 +67,28 @@ def parse_article_details(html_content):
             logging.warning("未找到内容区块")
             result["content"] = ""
 
-        # 获取点击数
-        count_pattern = r"_showDynClicks(.*?)</script></div>"
-        count_matches = re.findall(count_pattern, html_content)
-        if count_matches and "(" in count_matches[0]:
-            click_num = get_click_count(count_matches[0])
-            result["click_num"] = click_num
-        else:
+        # 记录点击数统计参数，点击数由统计刷新任务获取
+        click_params = extract_click_params(html_content)
+        if not click_params:
             raise CustomError("获取点击数参数错误")
+        result["click_params"] = click_params
 
-        # 获取附件下载数
+        # 获取附件列表，下载数同样由统计刷新任务获取
         fujian_list = soup.select(".fujian")
         # print(fujian_list)
         if fujian_list:
             logging.info("发现附件")
-            total_down_num = 0
             fujian_pattern = r'附件【<a href="[^"]+"[^>]*target="_blank">(.*?)</a>】'
             fujian_matches = re.findall(fujian_pattern, html_content)
             fujians = "\n".join(fujian_matches)
             result["fujians"] = fujians
             # print(fujian_matches)
-            count_pattern = r"getClickTimes(.*?)</script></span>"
-            count_matches = re.findall(count_pattern, html_content)
-
-            if count_matches and "(" in count_matches[0]:
-                down_num = get_download_count(count_matches[0])
-                total_down_num += down_num
+            download_params = extract_download_params(html_content)
+            if download_params:
+                result["download_params"] = download_params
             else:
                 logging.warning("获取附件下载量参数错误")
 
-            result["fujian_down_num"] = total_down_num
-
         return result
 
     except CustomError as e:
@@ -118,57 +100,99 @@ def parse_article_details(html_content):
         raise CustomError(f"解析文章详情失败: {str(e)}")
 
 
-def process_article_details(db_manager):
+def _store_masked_details(db_manager, results):
     """
-    处理所有文章的详情
+    写入已脱敏的文章详情
 
     Args:
         db_manager: 数据库管理器实例
+        results: MaskingStage 返回的 ((文章, 详情), 脱敏正文) 列表
 
     Returns:
-        int: 成功处理的文章数量
+        int: 成功写入的文章数量
     """
-    articles = db_manager.get_all_articles()
-    success_count = 0
-
-    for index, article in enumerate(articles, 1):
+    stored = 0
+    for (article, details), masked in results:
+        details["total_content"] = masked
         try:
-            logging.info(f"正在处理第 {index} 条文章: {article.url}")
+            db_manager.update_article_details(article.id, details)
+            stored += 1
+        except Exception as e:
+            logging.error(f"保存文章 {article.url} 详情时出错: {str(e)}")
+    return stored
 
-            # 跳过已处理的文章
-            if article.detail_time and article.click_num and article.content:
-                logging.info(f"文章已处理，跳过: {article.url}")
-                success_count += 1
-                continue
 
-            # 解析详情
-            html_content = article.raw_data
-            details = parse_article_details(html_content)
+def process_article_details(db_manager, should_stop=None):
+    """
+    处理所有文章的详情
 
-            # 更新数据库
-            db_manager.update_article_details(article.id, details)
-            success_count += 1
+    解析在当前线程进行，正文脱敏交给 MaskingStage 按批并发处理，
+    脱敏完成的文章按原顺序写入数据库
 
-        except CustomError as e:
-            logging.error(f"处理文章 {article.url} 时出错: {str(e)}")
-        except Exception as e:
-            logging.error(f"处理文章 {article.url} 时发生未预期错误: {str(e)}")
-
-        # 按处理数量进行适当休眠
-        from .config import SLEEP_INTERVAL
-        import time
-
-        if index % 10 == 0:
-            logging.info(f"休眠 {SLEEP_INTERVAL['every_10']} 秒")
-            time.sleep(SLEEP_INTERVAL["every_10"])
-        if index % 30 == 0:
-            logging.info(f"休眠 {SLEEP_INTERVAL['every_30']} 秒")
-            time.sleep(SLEEP_INTERVAL["every_30"])
-        if index % 50 == 0:
-            logging.info(f"休眠 {SLEEP_INTERVAL['every_50']} 秒")
-            time.sleep(SLEEP_INTERVAL["every_50"])
-        if index % 200 == 0:
-            logging.info(f"休眠 {SLEEP_INTERVAL['every_200']} 秒")
-            time.sleep(SLEEP_INTERVAL["every_200"])
+    Args:
+        db_manager: 数据库管理器实例
+        should_stop: 返回 True 时提前结束（超时或取消），已解析的文章仍会写入
 
+    Returns:
+        int: 成功处理的文章数量
+    """
+    from .config import SLEEP_INTERVAL
+    import time
+
+    articles = db_manager.get_all_articles()
+    success_count = 0
+    dlp_cache = DLPCache(db_manager)
+
+    with MaskingStage(dlp_cache) as stage:
+        for index, article in enumerate(articles, 1):
+            if should_stop and should_stop():
+                logging.warning("文章详情解析提前结束")
+                break
+            try:
+                logging.info(f"正在处理第 {index} 条文章: {article.url}")
+
+                # 跳过已处理的文章
+                if article.detail_time and article.content:
+                    logging.info(f"文章已处理，跳过: {article.url}")
+                    success_count += 1
+                    continue
+
+                # 解析详情，脱敏交给批量阶段
+                html_content = article.raw_data
+                details = parse_article_details(html_content, mask=False)
+                completed = stage.add((article, details), details["total_content"])
+
+                # 更新数据库
+                success_count += _store_masked_details(db_manager, completed)
+
+            except CustomError as e:
+                logging.error(f"处理文章 {article.url} 时出错: {str(e)}")
+            except Exception as e:
+                logging.error(f"处理文章 {article.url} 时发生未预期错误: {str(e)}")
+
+            # 按处理数量进行适当休眠
+            if index % 10 == 0:
+                logging.info(f"休眠 {SLEEP_INTERVAL['every_10']} 秒")
+                time.sleep(SLEEP_INTERVAL["every_10"])
+            if index % 30 == 0:
+                logging.info(f"休眠 {SLEEP_INTERVAL['every_30']} 秒")
+                time.sleep(SLEEP_INTERVAL["every_30"])
+            if index % 50 == 0:
+                logging.info(f"休眠 {SLEEP_INTERVAL['every_50']} 秒")
+                time.sleep(SLEEP_INTERVAL["every_50"])
+            if index % 200 == 0:
+                logging.info(f"休眠 {SLEEP_INTERVAL['every_200']} 秒")
+                time.sleep(SLEEP_INTERVAL["every_200"])
+
+        # 等待剩余批次脱敏完成
+        success_count += _store_masked_details(db_manager, stage.flush())
+
+    # 写入本次缓冲的缓存使用时间
+    dlp_cache.flush()
+
+    stats = dlp_cache_stats()
+    logging.info(
+        f"DLP 缓存命中 {stats['hits']} 次，未命中 {stats['misses']} 次，"
+        f"命中率 {stats['hit_rate']:.1%}"
+    )
     return success_count
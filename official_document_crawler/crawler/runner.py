@@ -0,0 +1,308 @@
+"""
+爬取任务运行模块
+
+CrawlJobRunner 保证同一时间只有一次爬取在运行（后到的触发直接跳过），
+并把每次运行的起止时间、页数、新文章数、错误和各阶段耗时记录到 crawl_runs 表；
+运行期间定期更新记录的心跳，心跳过期的“运行中”记录才会被当作遗留记录关闭；
+CrawlRunContext 在各阶段之间传递，提供按阶段的时间预算和取消信号，
+各阶段在处理每一页/每一篇文章前检查 should_stop()，超时或取消后尽快结束
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_
+
+from .database import CrawlRun
+from .config import (
+    CRAWL_PHASE_BUDGETS,
+    CRAWL_RUN_HEARTBEAT_SECONDS,
+    CRAWL_RUN_STALE_SECONDS,
+)
+
+
+class CrawlRunContext:
+    """单次爬取的运行上下文（阶段预算、取消信号和统计）"""
+
+    def __init__(self, budgets=None, cancel_event=None):
+        """
+        Args:
+            budgets: 阶段名 -> 时间预算（秒），未配置的阶段不限时
+            cancel_event: 取消信号（threading.Event），为空时不可取消
+        """
+        self.budgets = budgets or {}
+        self.cancel_event = cancel_event or threading.Event()
+        self.current_phase = None
+        self.phase_deadline = None
+        self.phase_durations = {}
+        self.timed_out_phases = []
+        self.errors = []
+        self.pages = 0
+        self.unchanged_pages = 0
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def should_stop(self):
+        """当前阶段是否应当结束（已取消或超出阶段预算）"""
+        if self.cancelled:
+            return True
+        if self.phase_deadline is not None and time.monotonic() >= self.phase_deadline:
+            if self.current_phase not in self.timed_out_phases:
+                self.timed_out_phases.append(self.current_phase)
+                logging.warning(
+                    f"阶段 {self.current_phase} 超出时间预算 "
+                    f"{self.budgets[self.current_phase]} 秒，提前结束"
+                )
+            return True
+        return False
+
+    @contextmanager
+    def phase(self, name):
+        """执行一个阶段，记录耗时并设置该阶段的时间预算"""
+        started = time.monotonic()
+        budget = self.budgets.get(name)
+        self.current_phase = name
+        self.phase_deadline = started + budget if budget else None
+        try:
+            yield
+        finally:
+            self.phase_durations[name] = round(time.monotonic() - started, 3)
+            self.current_phase = None
+            self.phase_deadline = None
+
+    def count_page(self, changed=True):
+        """记录抓取完成的列表页数（以及其中没有变化的页数）"""
+        self.pages += 1
+        if not changed:
+            self.unchanged_pages += 1
+
+    @property
+    def nothing_changed(self):
+        """抓取的列表页是否全部没有变化"""
+        return self.pages > 0 and self.unchanged_pages == self.pages
+
+    def record_error(self, message):
+        self.errors.append(message)
+
+
+class CrawlJobRunner:
+    """单飞（single-flight）爬取任务运行器"""
+
+    def __init__(
+        self,
+        db_manager,
+        budgets=CRAWL_PHASE_BUDGETS,
+        heartbeat_seconds=CRAWL_RUN_HEARTBEAT_SECONDS,
+        stale_seconds=CRAWL_RUN_STALE_SECONDS,
+    ):
+        """
+        Args:
+            db_manager: 文章数据库管理器（crawl_runs 表所在的库）
+            budgets: 各阶段的时间预算（秒）
+            heartbeat_seconds: 运行期间更新心跳的间隔（秒）
+            stale_seconds: 心跳超过该秒数未更新的运行中记录视为遗留记录
+        """
+        self.db_manager = db_manager
+        self.budgets = budgets
+        self.heartbeat_seconds = heartbeat_seconds
+        self.stale_seconds = stale_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._lock = threading.Lock()
+        self._cancel_event = threading.Event()
+        self.current_run_id = None
+        self.current_context = None
+        self._close_stale_runs()
+
+    def _close_stale_runs(self):
+        """
+        把心跳已过期的运行中记录标记为失败（执行它的进程已异常退出）
+
+        其他仍在运行的进程（如服务器与命令行同时爬取）会持续更新心跳，不受影响
+        """
+        cutoff = datetime.now() - timedelta(seconds=self.stale_seconds)
+        session = self.db_manager.get_session()
+        try:
+            stale = (
+                session.query(CrawlRun)
+                .filter(CrawlRun.status == "running")
+                .filter(
+                    or_(CrawlRun.heartbeat_at.is_(None), CrawlRun.heartbeat_at < cutoff)
+                )
+                .update(
+                    {"status": "failed", "errors": "进程退出时任务仍在运行"},
+                    synchronize_session=False,
+                )
+            )
+            session.commit()
+            if stale:
+                logging.warning(f"已将 {stale} 条未结束的爬取记录标记为失败")
+        except Exception as e:
+            session.rollback()
+            logging.error(f"清理爬取记录失败: {str(e)}")
+        finally:
+            session.close()
+
+    @property
+    def running(self):
+        return self._lock.locked()
+
+    def cancel(self):
+        """请求取消正在运行的爬取，返回是否有任务在运行"""
+        if not self.running:
+            return False
+        self._cancel_event.set()
+        logging.info("已请求取消正在运行的爬取任务")
+        return True
+
+    def run(self, job, trigger="scheduled"):
+        """
+        运行一次爬取任务
+
+        Args:
+            job: 任务函数，接收 CrawlRunContext，返回新文章URL列表
+            trigger: 触发来源（记录到 crawl_runs 表）
+
+        Returns:
+            list: 新文章URL列表；已有任务在运行时返回 None
+        """
+        if not self._lock.acquire(blocking=False):
+            logging.warning("上一次爬取尚未结束，跳过本次触发")
+            return None
+
+        self._close_stale_runs()
+        self._cancel_event.clear()
+        context = CrawlRunContext(self.budgets, self._cancel_event)
+        self.current_context = context
+        run_id = self._start_run(trigger)
+        heartbeat_stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(run_id, heartbeat_stop), daemon=True
+        )
+        heartbeat.start()
+        new_urls = []
+        status = "success"
+        try:
+            new_urls = job(context) or []
+        except Exception as e:
+            status = "failed"
+            context.record_error(str(e))
+            logging.error(f"爬取任务执行失败: {str(e)}")
+        finally:
+            heartbeat_stop.set()
+            heartbeat.join()
+            if status == "success":
+                if context.cancelled:
+                    status = "cancelled"
+                elif context.errors:
+                    status = "failed"
+                elif context.timed_out_phases:
+                    status = "timeout"
+            self._finish_run(run_id, context, status, len(new_urls))
+            self.current_run_id = None
+            self.current_context = None
+            self._lock.release()
+        return new_urls
+
+    def _heartbeat(self, run_id, stop_event):
+        """运行期间定期更新运行记录的心跳"""
+        while run_id is not None and not stop_event.wait(self.heartbeat_seconds):
+            session = self.db_manager.get_session()
+            try:
+                session.query(CrawlRun).filter(CrawlRun.id == run_id).update(
+                    {"heartbeat_at": datetime.now()}, synchronize_session=False
+                )
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                logging.warning(f"更新爬取心跳失败: {str(e)}")
+            finally:
+                session.close()
+
+    def _start_run(self, trigger):
+        session = self.db_manager.get_session()
+        try:
+            now = datetime.now()
+            run = CrawlRun(
+                started_at=now,
+                status="running",
+                trigger=trigger,
+                owner=self.owner,
+                heartbeat_at=now,
+            )
+            session.add(run)
+            session.commit()
+            self.current_run_id = run.id
+            return run.id
+        except Exception as e:
+            session.rollback()
+            logging.error(f"记录爬取开始失败: {str(e)}")
+            return None
+        finally:
+            session.close()
+
+    def _finish_run(self, run_id, context, status, new_articles):
+        if run_id is None:
+            return
+        errors = list(context.errors)
+        errors.extend(f"阶段 {name} 超时" for name in context.timed_out_phases)
+        session = self.db_manager.get_session()
+        try:
+            run = session.get(CrawlRun, run_id)
+            run.finished_at = datetime.now()
+            run.status = status
+            run.pages = context.pages
+            run.new_articles = new_articles
+            run.errors = "\n".join(errors) or None
+            run.phase_durations = json.dumps(context.phase_durations)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logging.error(f"记录爬取结果失败: {str(e)}")
+        finally:
+            session.close()
+
+    def recent_runs(self, limit=20):
+        """
+        最近的爬取记录
+
+        Returns:
+            list: 字典列表，按开始时间倒序
+        """
+        session = self.db_manager.get_session()
+        try:
+            runs = (
+                session.query(CrawlRun)
+                .order_by(CrawlRun.started_at.desc())
+                .limit(limit)
+                .all()
+            )
+            return [run.to_dict() for run in runs]
+        finally:
+            session.close()
+
+    def status(self, limit=20):
+        """当前运行状态、最近的运行记录以及各阶段的平均耗时"""
+        runs = self.recent_runs(limit)
+        totals = {}
+        for run in runs:
+            for name, seconds in (run["phase_durations"] or {}).items():
+                totals.setdefault(name, []).append(seconds)
+        context = self.current_context
+        return {
+            "running": self.running,
+            "current_run_id": self.current_run_id,
+            "current_phase": context.current_phase if context else None,
+            "avg_phase_durations": {
+                name: round(sum(values) / len(values), 3)
+                for name, values in totals.items()
+            },
+            "runs": runs,
+        }
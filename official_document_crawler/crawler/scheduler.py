@@ -0,0 +1,190 @@
+"""
+自适应爬取调度模块
+
+根据历史文章的发布时间统计每周各小时（共 168 个时段）的发布频率：
+发布频繁的时段缩短轮询间隔，冷清时段和连续没有变化时逐步拉长间隔，
+间隔限制在配置的最小值和最大值之间；每次轮询先用条件请求检查列表首页，
+只有首页内容相对上次爬取发生变化时才执行完整爬取
+"""
+
+import logging
+from datetime import datetime, timedelta
+
+from .database import Article
+from .fetcher import fetch_list_page
+from .config import (
+    CRAWL_MIN_INTERVAL_MINUTES,
+    CRAWL_MAX_INTERVAL_MINUTES,
+    CRAWL_TARGET_NEW_ARTICLES,
+    CRAWL_BACKOFF_FACTOR,
+    CRAWL_HISTORY_WEEKS,
+    CRAWL_FORCE_FULL_HOURS,
+)
+
+HOURS_PER_WEEK = 7 * 24
+
+
+def hour_of_week(moment):
+    """获取时间所在的周内小时序号（周一 0 点为 0）"""
+    return moment.weekday() * 24 + moment.hour
+
+
+def _parse_publish_time(date, detail_time):
+    """把文章的日期和详细时间合成发布时间，无法解析时返回 None"""
+    try:
+        hour, minute = detail_time.strip().split(":")[:2]
+        return datetime.strptime(date, "%Y-%m-%d").replace(
+            hour=int(hour), minute=int(minute)
+        )
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class AdaptiveCrawlScheduler:
+    """自适应爬取调度器（由调度线程单线程使用）"""
+
+    def __init__(self, db_manager, history_weeks=CRAWL_HISTORY_WEEKS):
+        """
+        Args:
+            db_manager: 文章数据库管理器
+            history_weeks: 统计发布频率使用的历史周数
+        """
+        self.db_manager = db_manager
+        self.history_weeks = history_weeks
+        self.rates = [0.0] * HOURS_PER_WEEK  # 各时段平均每小时发布的文章数
+        self.rates_updated_at = None  # 首次安排轮询时统计
+        self.unchanged_polls = 0
+        self.next_poll_at = datetime.now()  # 启动后立即轮询一次
+        self.last_full_crawl_at = None
+        self.stats = {"polls": 0, "full_crawls": 0, "skipped": 0}
+
+    def refresh_rates(self, now=None):
+        """从历史文章重新统计各时段的发布频率"""
+        now = now or datetime.now()
+        since = (now - timedelta(weeks=self.history_weeks)).strftime("%Y-%m-%d")
+        counts = [0] * HOURS_PER_WEEK
+        session = self.db_manager.get_session()
+        try:
+            rows = (
+                session.query(Article.date, Article.detail_time)
+                .filter(Article.date >= since)
+                .filter(Article.detail_time.isnot(None))
+                .all()
+            )
+        finally:
+            session.close()
+
+        for row in rows:
+            published = _parse_publish_time(row.date, row.detail_time)
+            if published is not None:
+                counts[hour_of_week(published)] += 1
+
+        self.rates = [count / self.history_weeks for count in counts]
+        self.rates_updated_at = now
+        logging.info(
+            f"已根据 {len(rows)} 篇历史文章更新发布频率，"
+            f"最繁忙时段每小时 {max(self.rates):.2f} 篇"
+        )
+
+    def next_interval(self, now):
+        """
+        计算下一次轮询的间隔
+
+        按当前和下一时段中较高的发布频率，使两次轮询之间预计新增的文章数接近
+        CRAWL_TARGET_NEW_ARTICLES；连续没有变化时按 CRAWL_BACKOFF_FACTOR 逐次拉长
+
+        Returns:
+            timedelta: 轮询间隔
+        """
+        slot = hour_of_week(now)
+        rate = max(self.rates[slot], self.rates[(slot + 1) % HOURS_PER_WEEK])
+        if rate > 0:
+            minutes = CRAWL_TARGET_NEW_ARTICLES / rate * 60
+        else:
+            minutes = CRAWL_MAX_INTERVAL_MINUTES
+        minutes *= CRAWL_BACKOFF_FACTOR**self.unchanged_polls
+        minutes = min(
+            max(minutes, CRAWL_MIN_INTERVAL_MINUTES), CRAWL_MAX_INTERVAL_MINUTES
+        )
+        return timedelta(minutes=minutes)
+
+    def is_due(self, now=None):
+        """是否到了下一次轮询的时间"""
+        return (now or datetime.now()) >= self.next_poll_at
+
+    def check_for_changes(self):
+        """
+        用条件请求抓取列表首页，并与上次爬取成功处理时记录的指纹比较
+
+        Returns:
+            bool: 首页是否有变化（没有记录或首页获取失败时视为有变化）
+        """
+        self.stats["polls"] += 1
+        status, _, _ = fetch_list_page(1, self.db_manager)
+        if status == "failed":
+            logging.warning("列表首页获取失败，按有变化处理")
+            return True
+        return status == "changed"
+
+    def crawl_overdue(self, now=None):
+        """距上次完整爬取是否已超过 CRAWL_FORCE_FULL_HOURS（保证解析等阶段定期执行）"""
+        if self.last_full_crawl_at is None:
+            return True
+        elapsed = (now or datetime.now()) - self.last_full_crawl_at
+        return elapsed >= timedelta(hours=CRAWL_FORCE_FULL_HOURS)
+
+    def record_poll(self, changed, crawled, now=None):
+        """
+        记录一次轮询的结果并安排下一次轮询
+
+        Args:
+            changed: 是否发现了新内容
+            crawled: 是否执行了完整爬取
+            now: 当前时间
+
+        Returns:
+            datetime: 下一次轮询的时间
+        """
+        now = now or datetime.now()
+        if crawled:
+            self.stats["full_crawls"] += 1
+            self.last_full_crawl_at = now
+        else:
+            self.stats["skipped"] += 1
+        if changed:
+            self.unchanged_polls = 0
+        else:
+            self.unchanged_polls += 1
+
+        # 每天重新统计一次发布频率
+        stale = self.rates_updated_at is None or (
+            now - self.rates_updated_at >= timedelta(days=1)
+        )
+        if stale:
+            try:
+                self.refresh_rates(now)
+            except Exception as e:
+                logging.error(f"统计发布频率失败: {str(e)}")
+
+        interval = self.next_interval(now)
+        self.next_poll_at = now + interval
+        logging.info(
+            f"下一次轮询: {self.next_poll_at:%Y-%m-%d %H:%M}"
+            f"（间隔 {interval.total_seconds() / 60:.0f} 分钟，"
+            f"连续无变化 {self.unchanged_polls} 次）"
+        )
+        return self.next_poll_at
+
+    def status(self):
+        """调度状态，供接口展示"""
+        return {
+            **self.stats,
+            "next_poll_at": self.next_poll_at.isoformat(timespec="seconds"),
+            "last_full_crawl_at": (
+                self.last_full_crawl_at.isoformat(timespec="seconds")
+                if self.last_full_crawl_at
+                else None
+            ),
+            "unchanged_polls": self.unchanged_polls,
+            "current_rate": self.rates[hour_of_week(datetime.now())],
+        }
@@ -1,15 +1,31 @@
 """
 访问统计模块
 
-处理点击数和下载数的统计功能
+处理点击数和下载数的统计功能。解析详情时只记录统计接口的参数，
+点击数和下载数由独立的刷新任务按文章新旧程度定期并发更新
 """
 
 import re
 import logging
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, update
+
 from .utils import http_get
-from .database import CustomError
-from .config import BASE_URL
+from .database import Article, CustomError
+from .trending import record_snapshots, update_trending_scores
+from .config import (
+    BASE_URL,
+    STATS_REFRESH_SCHEDULE,
+    STATS_MAX_WORKERS,
+    STATS_REFRESH_BATCH_LIMIT,
+)
+
+# 文章页中点击数、附件下载数统计脚本的参数
+CLICK_PARAMS_PATTERN = re.compile(r"_showDynClicks(.*?)</script></div>")
+DOWNLOAD_PARAMS_PATTERN = re.compile(r"getClickTimes(.*?)</script></span>")
 
 
 def is_all_digits(s):
@@ -19,11 +35,12 @@ def is_all_digits(s):
     return True
 
 
-def get_click_count(data_str):
+def get_click_count(data_str, default=0):
     """获取文章点击数
 
     Args:
         data_str: 包含点击数参数的字符串，格式为 '("wbnews", 1728834619, 45421)'
+        default: 请求失败时的返回值
 
     Returns:
         int: 点击数
@@ -37,7 +54,7 @@ def get_click_count(data_str):
 
         response = http_get(url)
         if not response:
-            return 0
+            return default
 
         resp_text = response.text
         logging.info(f"点击数：{resp_text}")
@@ -56,11 +73,12 @@ def get_click_count(data_str):
         raise CustomError("解析点击数参数错误")
 
 
-def get_download_count(data_str):
+def get_download_count(data_str, default=0):
     """获取附件下载数
 
     Args:
         data_str: 包含下载数参数的字符串，格式为 '(6582534,1728834619,"wbnewsfile","attach")'
+        default: 请求失败时的返回值
 
     Returns:
         int: 下载数
@@ -74,7 +92,7 @@ def get_download_count(data_str):
 
         response = http_get(url)
         if not response:
-            return 0
+            return default
 
         json_data = response.json()
         num = int(json_data["wbshowtimes"])
@@ -84,3 +102,203 @@ def get_download_count(data_str):
     except (IndexError, ValueError, KeyError) as e:
         logging.error(f"解析下载数失败: {str(e)}")
         raise CustomError("解析下载数参数错误")
+
+
+def extract_click_params(html_content):
+    """从文章HTML中提取点击数参数，如 '("wbnews", 1728834619, 45421)'，找不到返回 None"""
+    matches = CLICK_PARAMS_PATTERN.findall(html_content or "")
+    if matches and "(" in matches[0]:
+        return matches[0]
+    return None
+
+
+def extract_download_params(html_content):
+    """从文章HTML中提取附件下载数参数，找不到返回 None"""
+    matches = DOWNLOAD_PARAMS_PATTERN.findall(html_content or "")
+    if matches and "(" in matches[0]:
+        return matches[0]
+    return None
+
+
+def _article_age(article, now):
+    """按发布日期计算文章年龄，日期无法解析时返回 None"""
+    try:
+        published = datetime.strptime(article.date, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return None
+    return now - published
+
+
+def refresh_interval(age, schedule=STATS_REFRESH_SCHEDULE):
+    """
+    获取文章统计的刷新间隔
+
+    Args:
+        age: 文章年龄（timedelta）
+        schedule: [(文章年龄上限（小时）, 刷新间隔（小时）)]，按年龄从小到大排列
+
+    Returns:
+        timedelta: 刷新间隔；超出统计窗口（不再刷新）时返回 None
+    """
+    for max_age_hours, interval_hours in schedule:
+        if age <= timedelta(hours=max_age_hours):
+            return timedelta(hours=interval_hours)
+    return None
+
+
+def _find_due_articles(db_manager, now, limit):
+    """
+    查找统计窗口内到期需要刷新的文章
+
+    Returns:
+        list: [(文章ID, 点击数参数, 下载数参数)]
+    """
+    window = timedelta(hours=STATS_REFRESH_SCHEDULE[-1][0])
+    oldest_date = (now - window).strftime("%Y-%m-%d")
+    session = db_manager.get_session()
+    try:
+        candidates = (
+            session.query(
+                Article.id,
+                Article.date,
+                Article.click_params,
+                Article.download_params,
+                Article.stats_refreshed_at,
+            )
+            .filter(Article.detail_time.isnot(None))
+            .filter(Article.date >= oldest_date)
+            .filter(or_(Article.click_params.isnot(None), Article.raw_data.isnot(None)))
+            .order_by(Article.stats_refreshed_at.isnot(None), Article.date.desc())
+            .all()
+        )
+
+        due = []
+        for article in candidates:
+            age = _article_age(article, now)
+            interval = refresh_interval(age) if age is not None else None
+            if interval is None:
+                continue
+            refreshed_at = article.stats_refreshed_at
+            if refreshed_at and now - refreshed_at < interval:
+                continue
+            due.append([article.id, article.click_params, article.download_params])
+            if len(due) >= limit:
+                break
+
+        # 升级前解析的文章没有记录参数，从原始页面中补提取
+        missing = {item[0]: item for item in due if item[1] is None}
+        ids = list(missing)
+        for i in range(0, len(ids), 500):
+            rows = (
+                session.query(Article.id, Article.raw_data)
+                .filter(Article.id.in_(ids[i : i + 500]))
+                .all()
+            )
+            for row in rows:
+                missing[row.id][1] = extract_click_params(row.raw_data)
+                missing[row.id][2] = extract_download_params(row.raw_data)
+    finally:
+        session.close()
+
+    return [tuple(item) for item in due if item[1]]
+
+
+def _fetch_counts(click_params, download_params):
+    """
+    请求单篇文章的点击数和下载数
+
+    Returns:
+        dict: 需要更新的字段；请求失败的统计不包含在内，保留原值
+    """
+    counts = {}
+    click_num = get_click_count(click_params, default=None)
+    if click_num is not None:
+        counts["click_num"] = click_num
+    if download_params:
+        down_num = get_download_count(download_params, default=None)
+        if down_num is not None:
+            counts["fujian_down_num"] = down_num
+    return counts
+
+
+def refresh_article_stats(
+    db_manager,
+    max_workers=STATS_MAX_WORKERS,
+    limit=STATS_REFRESH_BATCH_LIMIT,
+    should_stop=None,
+):
+    """
+    并发刷新统计窗口内文章的点击数和附件下载数
+
+    新文章刷新频繁，越旧的文章间隔越长（见 config.STATS_REFRESH_SCHEDULE），
+    超出窗口的文章不再刷新；结果按主键批量写回
+
+    Args:
+        db_manager: 数据库管理器实例
+        max_workers: 同时请求统计接口的最大并发数
+        limit: 本次最多刷新的文章数量
+        should_stop: 返回 True 时取消尚未开始的请求（超时或取消），已完成的结果仍会写入
+
+    Returns:
+        int: 本次刷新的文章数量
+    """
+    now = datetime.now()
+    due = _find_due_articles(db_manager, now, limit)
+    if not due:
+        logging.info("没有需要刷新统计的文章")
+        return 0
+
+    logging.info(f"开始刷新 {len(due)} 篇文章的访问统计，并发数 {max_workers}")
+    rows = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_fetch_counts, click_params, download_params): (
+                article_id,
+                click_params,
+                download_params,
+            )
+            for article_id, click_params, download_params in due
+        }
+        for future, (article_id, click_params, download_params) in futures.items():
+            if should_stop and should_stop():
+                for pending in futures:
+                    pending.cancel()
+            if future.cancelled():
+                continue
+            try:
+                counts = future.result()
+            except Exception as e:
+                logging.error(f"刷新文章统计失败，ID: {article_id}: {str(e)}")
+                continue
+            if not counts:
+                continue  # 统计接口不可用，下次再试
+            counts.update(
+                id=article_id,
+                click_params=click_params,
+                download_params=download_params,
+                stats_refreshed_at=now,
+            )
+            rows.append(counts)
+
+    if not rows:
+        return 0
+
+    session = db_manager.get_session()
+    try:
+        # 按是否包含下载数分组，每组一次按主键批量更新（ORM 批量 UPDATE，需要 SQLAlchemy 2.0）
+        for keys in {tuple(sorted(row)) for row in rows}:
+            group = [row for row in rows if tuple(sorted(row)) == keys]
+            session.execute(update(Article), group)
+        # 同一事务中追加统计快照，供热度计算使用
+        record_snapshots(session, rows, now)
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        logging.error(f"保存文章统计失败: {str(e)}")
+        return 0
+    finally:
+        session.close()
+
+    scored = update_trending_scores(db_manager, [row["id"] for row in rows], now)
+    logging.info(f"文章访问统计刷新完成，更新 {len(rows)} 篇文章，重新计算 {scored} 篇热度")
+    return len(rows)
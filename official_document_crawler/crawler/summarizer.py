@@ -0,0 +1,186 @@
+"""
+AI 摘要模块
+
+在文章解析完成后，以有限并发调用摘要服务生成摘要和标题，
+结果按内容哈希持久化在文章记录上，供邮件推送和网页接口直接复用
+"""
+
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .database import Article
+from .config import SUMMARY_MAX_WORKERS, SUMMARY_BATCH_LIMIT
+from sidecar_client import get_sidecar_client
+
+# 提交给摘要服务的最大内容长度，避免 token 超限
+MAX_SUMMARY_INPUT = 2000
+
+
+def summary_source(article):
+    """获取用于生成摘要的文本（正文为空时退回标题）"""
+    return article.content if article.content else article.title or ""
+
+
+def compute_content_hash(content):
+    """计算内容哈希，用作摘要缓存的键"""
+    return hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
+
+def request_ai_summary(content):
+    """
+    调用 AI 摘要服务
+
+    Args:
+        content: 文章内容
+
+    Returns:
+        tuple: (摘要, 标题)；服务不可用时返回 None，以便下次重试
+    """
+    return get_sidecar_client().generate_summary(content[:MAX_SUMMARY_INPUT])
+
+
+def _find_pending_articles(db_manager, limit):
+    """
+    查找尚未生成摘要的文章，并复用已有相同内容哈希的摘要
+
+    Returns:
+        tuple: (待请求列表 [(内容哈希, 内容, [文章ID...])], 直接复用的文章数)
+    """
+    session = db_manager.get_session()
+    try:
+        candidates = (
+            session.query(Article.id, Article.content, Article.title)
+            .filter(Article.detail_time.isnot(None))
+            .filter(Article.summary_hash.is_(None))
+            .order_by(Article.date.desc(), Article.detail_time.desc())
+            .limit(limit)
+            .all()
+        )
+
+        pending = {}  # 内容哈希 -> (内容, [文章ID...])
+        for article in candidates:
+            content = summary_source(article)
+            if not content:
+                continue
+            content_hash = compute_content_hash(content)
+            pending.setdefault(content_hash, (content, []))[1].append(article.id)
+
+        if not pending:
+            return [], 0
+
+        # 相同内容已有摘要的文章直接复制，无需请求服务
+        cached = {}
+        hashes = list(pending.keys())
+        for i in range(0, len(hashes), 500):
+            rows = (
+                session.query(Article.summary_hash, Article.ai_summary, Article.ai_title)
+                .filter(Article.summary_hash.in_(hashes[i : i + 500]))
+                .all()
+            )
+            for row in rows:
+                cached[row.summary_hash] = (row.ai_summary or "", row.ai_title or "")
+
+        reused = 0
+        for content_hash, (summary, title) in cached.items():
+            _, article_ids = pending.pop(content_hash)
+            _store_summary(session, article_ids, content_hash, summary, title)
+            reused += len(article_ids)
+        session.commit()
+
+        return [
+            (content_hash, content, article_ids)
+            for content_hash, (content, article_ids) in pending.items()
+        ], reused
+    finally:
+        session.close()
+
+
+def _store_summary(session, article_ids, content_hash, summary, title):
+    """将摘要写入指定文章"""
+    session.query(Article).filter(Article.id.in_(article_ids)).update(
+        {
+            "ai_summary": summary,
+            "ai_title": title,
+            "summary_hash": content_hash,
+        },
+        synchronize_session=False,
+    )
+
+
+def generate_article_summaries(
+    db_manager,
+    max_workers=SUMMARY_MAX_WORKERS,
+    limit=SUMMARY_BATCH_LIMIT,
+    should_stop=None,
+):
+    """
+    为尚未生成摘要的文章生成 AI 摘要
+
+    Args:
+        db_manager: 数据库管理器实例
+        max_workers: 同时请求摘要服务的最大并发数
+        limit: 本次最多处理的文章数量
+        should_stop: 返回 True 时不再提交新的请求（超时或取消），可选
+
+    Returns:
+        int: 本次写入摘要的文章数量
+    """
+    pending, reused = _find_pending_articles(db_manager, limit)
+    if reused:
+        logging.info(f"复用已有摘要 {reused} 篇文章")
+    if not pending:
+        return reused
+
+    logging.info(f"开始生成 AI 摘要，共 {len(pending)} 条内容，并发数 {max_workers}")
+    stored = 0
+    consecutive_failures = 0
+    stopped = False
+    remaining = iter(pending)
+    in_flight = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+        def fill_window():
+            # 保持同时在途的请求数不超过 max_workers
+            while len(in_flight) < max_workers:
+                if should_stop and should_stop():
+                    return
+                item = next(remaining, None)
+                if item is None:
+                    return
+                in_flight[executor.submit(request_ai_summary, item[1])] = item
+
+        fill_window()
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                content_hash, _, article_ids = in_flight.pop(future)
+                result = future.result()
+                if result is None:
+                    consecutive_failures += 1
+                    continue
+
+                consecutive_failures = 0
+                summary, title = result
+                session = db_manager.get_session()
+                try:
+                    _store_summary(session, article_ids, content_hash, summary, title)
+                    session.commit()
+                    stored += len(article_ids)
+                except Exception as e:
+                    session.rollback()
+                    logging.error(f"保存 AI 摘要失败: {str(e)}")
+                finally:
+                    session.close()
+
+            # 摘要服务持续不可用时停止提交，剩余文章留待下次爬取
+            if consecutive_failures >= max_workers * 2:
+                if not stopped:
+                    logging.warning("摘要服务连续失败，本次停止生成摘要")
+                    stopped = True
+                continue
+            fill_window()
+
+    logging.info(f"AI 摘要生成完成，写入 {stored + reused} 篇文章")
+    return stored + reused
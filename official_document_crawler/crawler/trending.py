@@ -0,0 +1,219 @@
+"""
+热门文章模块
+
+统计刷新时把点击数、下载数追加到快照表，并按滚动窗口计算每篇文章的访问增量作为热度，
+结果写入 trending_scores 表；排行接口直接按索引读取预先算好的热度
+"""
+
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+
+from .database import Article, ArticleStatsSnapshot, TrendingScore
+from .config import (
+    TRENDING_WINDOW_HOURS,
+    TRENDING_DOWNLOAD_WEIGHT,
+    TRENDING_SNAPSHOT_RETENTION_DAYS,
+)
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def record_snapshots(session, rows, now):
+    """
+    追加统计快照（在调用方的事务中执行，不提交）
+
+    Args:
+        session: 数据库会话
+        rows: 统计刷新结果 [{"id", "click_num", "fujian_down_num"(可选)}]
+        now: 采集时间
+    """
+    ts = int(now.timestamp())
+    values = [
+        {
+            "article_id": row["id"],
+            "ts": ts,
+            "clicks": _to_int(row["click_num"]),
+            "downloads": _to_int(row.get("fujian_down_num")),
+        }
+        for row in rows
+        if _to_int(row.get("click_num")) is not None
+    ]
+    for i in range(0, len(values), 500):
+        session.execute(
+            insert(ArticleStatsSnapshot)
+            .values(values[i : i + 500])
+            .on_conflict_do_nothing()
+        )
+
+
+def _compute_scores(session, article_ids, window_start):
+    """
+    计算指定文章在窗口内的访问增量
+
+    基线为窗口开始前的最后一次快照；没有更早快照时，窗口内发布的文章以 0 为基线，
+    其余文章以窗口内最早的快照为基线
+
+    Returns:
+        dict: 文章ID -> (热度, 点击增量, 下载增量)
+    """
+    start_ts = int(window_start.timestamp())
+    start_date = window_start.strftime("%Y-%m-%d")
+    scores = {}
+    for i in range(0, len(article_ids), 500):
+        chunk = article_ids[i : i + 500]
+
+        in_window = {}  # 文章ID -> [最早快照, 最新快照]
+        rows = (
+            session.query(ArticleStatsSnapshot)
+            .filter(ArticleStatsSnapshot.article_id.in_(chunk))
+            .filter(ArticleStatsSnapshot.ts > start_ts)
+            .order_by(ArticleStatsSnapshot.ts)
+            .all()
+        )
+        for row in rows:
+            first_last = in_window.setdefault(row.article_id, [row, row])
+            first_last[1] = row
+
+        last_before = (
+            session.query(
+                ArticleStatsSnapshot.article_id,
+                func.max(ArticleStatsSnapshot.ts).label("ts"),
+            )
+            .filter(ArticleStatsSnapshot.article_id.in_(chunk))
+            .filter(ArticleStatsSnapshot.ts <= start_ts)
+            .group_by(ArticleStatsSnapshot.article_id)
+            .subquery()
+        )
+        baselines = {
+            row.article_id: row
+            for row in session.query(ArticleStatsSnapshot).join(
+                last_before,
+                (ArticleStatsSnapshot.article_id == last_before.c.article_id)
+                & (ArticleStatsSnapshot.ts == last_before.c.ts),
+            )
+        }
+        published_in_window = {
+            row.id
+            for row in session.query(Article.id)
+            .filter(Article.id.in_(chunk))
+            .filter(Article.date >= start_date)
+        }
+
+        for article_id in chunk:
+            if article_id not in in_window:
+                scores[article_id] = (0.0, 0, 0)
+                continue
+            first, latest = in_window[article_id]
+            if article_id in baselines:
+                base_clicks = baselines[article_id].clicks
+                base_downloads = baselines[article_id].downloads
+            elif article_id in published_in_window:
+                base_clicks, base_downloads = 0, 0
+            else:
+                base_clicks, base_downloads = first.clicks, first.downloads
+
+            clicks_delta = max((latest.clicks or 0) - (base_clicks or 0), 0)
+            downloads_delta = 0
+            if latest.downloads is not None and base_downloads is not None:
+                downloads_delta = max(latest.downloads - base_downloads, 0)
+            score = float(clicks_delta + TRENDING_DOWNLOAD_WEIGHT * downloads_delta)
+            scores[article_id] = (score, clicks_delta, downloads_delta)
+    return scores
+
+
+def update_trending_scores(db_manager, article_ids, now=None):
+    """
+    重新计算热度：本次刷新统计的文章，以及仍有热度、需要随窗口滑动衰减的文章
+
+    Args:
+        db_manager: 数据库管理器实例
+        article_ids: 本次刷新统计的文章ID
+        now: 计算时间，默认当前时间
+
+    Returns:
+        int: 更新热度的文章数量
+    """
+    now = now or datetime.now()
+    window_start = now - timedelta(hours=TRENDING_WINDOW_HOURS)
+    session = db_manager.get_session()
+    try:
+        ids = set(article_ids)
+        ids.update(
+            row.article_id
+            for row in session.query(TrendingScore.article_id).filter(
+                TrendingScore.score > 0
+            )
+        )
+        if not ids:
+            return 0
+
+        scores = _compute_scores(session, sorted(ids), window_start)
+        values = [
+            {
+                "article_id": article_id,
+                "score": score,
+                "clicks_delta": clicks_delta,
+                "downloads_delta": downloads_delta,
+                "updated_at": now,
+            }
+            for article_id, (score, clicks_delta, downloads_delta) in scores.items()
+        ]
+        for i in range(0, len(values), 500):
+            statement = insert(TrendingScore).values(values[i : i + 500])
+            session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[TrendingScore.article_id],
+                    set_={
+                        "score": statement.excluded.score,
+                        "clicks_delta": statement.excluded.clicks_delta,
+                        "downloads_delta": statement.excluded.downloads_delta,
+                        "updated_at": statement.excluded.updated_at,
+                    },
+                )
+            )
+
+        # 清理超过保留期的快照
+        retention_ts = int(
+            (now - timedelta(days=TRENDING_SNAPSHOT_RETENTION_DAYS)).timestamp()
+        )
+        session.query(ArticleStatsSnapshot).filter(
+            ArticleStatsSnapshot.ts < retention_ts
+        ).delete(synchronize_session=False)
+
+        session.commit()
+        return len(values)
+    except Exception as e:
+        session.rollback()
+        logging.error(f"更新文章热度失败: {str(e)}")
+        return 0
+    finally:
+        session.close()
+
+
+def get_trending_articles(session, limit=10):
+    """
+    读取热门文章排行
+
+    Args:
+        session: 数据库会话
+        limit: 返回的文章数量
+
+    Returns:
+        list: [(TrendingScore, Article)]，按热度从高到低
+    """
+    return (
+        session.query(TrendingScore, Article)
+        .join(Article, Article.id == TrendingScore.article_id)
+        .filter(TrendingScore.score > 0)
+        .order_by(TrendingScore.score.desc())
+        .limit(limit)
+        .all()
+    )
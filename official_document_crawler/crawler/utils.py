@@ -8,19 +8,45 @@ import os
 import time
 import requests
 import logging
+
+from rate_limiter import RateLimiter
+
 from .config import HEADERS, PAYLOAD, MAX_RETRIES, REQUEST_TIMEOUT
 
 
+_logging_configured = False
+
+
 def setup_logging():
-    """设置日志配置"""
+    """设置日志配置（只在第一次调用时生效，重复调用直接返回）"""
+    global _logging_configured
+    if _logging_configured:
+        return
     logging.basicConfig(
         level=logging.INFO,
         format="%(asctime)s - %(levelname)s - %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S",
     )
+    _logging_configured = True
+
+
+# 进程内全局限速器，设置后所有 http_get 请求共享同一速率上限
+_rate_limiter = None
+
+
+def set_rate_limit(rate, burst=1):
+    """
+    设置全局请求速率上限
+
+    Args:
+        rate: 每秒允许的请求数，为 None 或 0 时取消限速
+        burst: 允许的突发请求数
+    """
+    global _rate_limiter
+    _rate_limiter = RateLimiter(rate, burst) if rate else None
 
 
-def http_get(url, retry=MAX_RETRIES, timeout=REQUEST_TIMEOUT):
+def http_get(url, retry=MAX_RETRIES, timeout=REQUEST_TIMEOUT, headers=None):
     """
     发送HTTP GET请求并处理重试逻辑
 
@@ -28,14 +54,22 @@ def http_get(url, retry=MAX_RETRIES, timeout=REQUEST_TIMEOUT):
         url: 请求的URL
         retry: 重试次数
         timeout: 请求超时时间
+        headers: 额外的请求头（如条件请求的 If-None-Match），可选
 
     Returns:
-        响应文本，失败返回None
+        响应文本，失败返回None；条件请求命中时返回状态码为 304 的响应
     """
+    request_headers = {**HEADERS, **headers} if headers else HEADERS
     for i in range(1, retry + 1):
+        if _rate_limiter is not None:
+            _rate_limiter.acquire()
         try:
             response = requests.get(
-                url=url, headers=HEADERS, data=PAYLOAD, proxies=None, timeout=timeout
+                url=url,
+                headers=request_headers,
+                data=PAYLOAD,
+                proxies=None,
+                timeout=timeout,
             )
             response.raise_for_status()  # 检查HTTP错误
             return response
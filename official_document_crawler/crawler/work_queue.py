@@ -0,0 +1,440 @@
+"""
+爬取工作队列模块
+
+列表页和文章任务保存在文章数据库的 crawl_tasks 表中，同一台机器上任意数量的
+工作进程通过条件更新原子地领取任务（租约），处理期间定期续约；
+进程崩溃后租约到期，任务重新可见。失败的任务按指数退避重试，
+超过最大尝试次数后进入死信（status=dead），可手动重新入队
+
+工作进程入库的文章不经过服务器的爬取流程，也不需要通知服务器：服务器的推送任务
+（每次爬取后以及每 DIGEST_DISPATCH_INTERVAL_MINUTES 分钟）会领取发布日期在
+NOTIFY_LOOKBACK_DAYS 天内、已解析且尚未推送（notified_at 为空）的文章写入待推送账本；
+更早的文章视为历史回填，不推送
+
+用法:
+    python -m official_document_crawler.crawler.work_queue enqueue --start 1 --end 2
+    python -m official_document_crawler.crawler.work_queue worker --idle-exit 60
+    python -m official_document_crawler.crawler.work_queue stats
+    python -m official_document_crawler.crawler.work_queue requeue-dead
+"""
+
+import argparse
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func, update
+from sqlalchemy.dialects.sqlite import insert
+
+from .database import Article, CrawlTask, CustomError, DatabaseManager
+from .dlp_cache import DLPCache
+from .fetcher import fetch_article_list, fetch_article_content
+from .parser import parse_article_details
+from .utils import setup_logging
+from .config import (
+    WORK_QUEUE_LEASE_SECONDS,
+    WORK_QUEUE_MAX_ATTEMPTS,
+    WORK_QUEUE_RETRY_BASE_SECONDS,
+    WORK_QUEUE_POLL_INTERVAL,
+)
+
+
+def default_worker_id():
+    """工作进程标识：主机名:进程号:线程号"""
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+class WorkQueue:
+    """基于 SQLite 的租约式工作队列"""
+
+    def __init__(
+        self,
+        db_manager,
+        worker_id=None,
+        lease_seconds=WORK_QUEUE_LEASE_SECONDS,
+        max_attempts=WORK_QUEUE_MAX_ATTEMPTS,
+        retry_base_seconds=WORK_QUEUE_RETRY_BASE_SECONDS,
+    ):
+        """
+        Args:
+            db_manager: 文章数据库管理器
+            worker_id: 工作进程标识，默认由主机名、进程号和线程号组成
+            lease_seconds: 租约时长（秒）
+            max_attempts: 最多尝试次数
+            retry_base_seconds: 失败重试的退避基数（秒）
+        """
+        self.db_manager = db_manager
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+
+    def enqueue(self, kind, key, payload=None, reset=False):
+        """
+        添加任务；同类同键的任务已存在时不重复添加
+
+        Args:
+            kind: 任务类型
+            key: 任务键
+            payload: 任务参数（可 JSON 序列化）
+            reset: 已存在的任务处于 done / dead 状态时重新置为待处理（如定期重爬的列表页）
+
+        Returns:
+            bool: 是否新增或重置了任务
+        """
+        now = datetime.now()
+        values = {
+            "kind": kind,
+            "key": str(key),
+            "payload": json.dumps(payload, ensure_ascii=False),
+            "status": "pending",
+            "attempts": 0,
+            "available_at": now,
+            "created_at": now,
+            "updated_at": now,
+        }
+        statement = insert(CrawlTask).values(values)
+        if reset:
+            statement = statement.on_conflict_do_update(
+                index_elements=[CrawlTask.kind, CrawlTask.key],
+                set_={
+                    "payload": statement.excluded.payload,
+                    "status": "pending",
+                    "attempts": 0,
+                    "available_at": now,
+                    "last_error": None,
+                    "updated_at": now,
+                },
+                where=CrawlTask.status.in_(["done", "dead"]),
+            )
+        else:
+            statement = statement.on_conflict_do_nothing()
+
+        session = self.db_manager.get_session()
+        try:
+            result = session.execute(statement)
+            session.commit()
+            return result.rowcount > 0
+        finally:
+            session.close()
+
+    def _expire_leases(self, session, now):
+        """租约到期的任务重新可见；已达最大尝试次数的进入死信"""
+        expired = and_(CrawlTask.status == "leased", CrawlTask.lease_expires_at < now)
+        session.execute(
+            update(CrawlTask)
+            .where(expired, CrawlTask.attempts >= self.max_attempts)
+            .values(status="dead", last_error="租约到期且已达最大尝试次数", updated_at=now)
+        )
+        session.execute(
+            update(CrawlTask)
+            .where(expired)
+            .values(status="pending", lease_owner=None, updated_at=now)
+        )
+
+    def claim(self, kinds=None):
+        """
+        原子地领取一个可处理的任务
+
+        先选出候选任务，再用带状态条件的 UPDATE 领取；
+        其他进程抢先领取时条件不成立（影响 0 行），换下一个候选
+
+        Args:
+            kinds: 只领取这些类型的任务，默认不限
+
+        Returns:
+            CrawlTask: 领取到的任务（已脱离会话）；没有可处理的任务时返回 None
+        """
+        session = self.db_manager.get_session()
+        try:
+            now = datetime.now()
+            self._expire_leases(session, now)
+            session.commit()
+
+            query = session.query(CrawlTask.id).filter(
+                CrawlTask.status == "pending", CrawlTask.available_at <= now
+            )
+            if kinds:
+                query = query.filter(CrawlTask.kind.in_(kinds))
+            candidates = [
+                row.id for row in query.order_by(CrawlTask.available_at).limit(10)
+            ]
+
+            for task_id in candidates:
+                result = session.execute(
+                    update(CrawlTask)
+                    .where(CrawlTask.id == task_id, CrawlTask.status == "pending")
+                    .values(
+                        status="leased",
+                        lease_owner=self.worker_id,
+                        lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                        attempts=CrawlTask.attempts + 1,
+                        updated_at=now,
+                    )
+                )
+                session.commit()
+                if result.rowcount == 1:
+                    task = session.get(CrawlTask, task_id)
+                    session.expunge(task)
+                    return task
+            return None
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def _update_owned(self, task_id, **values):
+        """更新本进程持有租约的任务，返回是否成功（租约已被他人接管时失败）"""
+        values["updated_at"] = datetime.now()
+        session = self.db_manager.get_session()
+        try:
+            result = session.execute(
+                update(CrawlTask)
+                .where(
+                    CrawlTask.id == task_id,
+                    CrawlTask.status == "leased",
+                    CrawlTask.lease_owner == self.worker_id,
+                )
+                .values(**values)
+            )
+            session.commit()
+            return result.rowcount == 1
+        finally:
+            session.close()
+
+    def heartbeat(self, task_id):
+        """续约"""
+        expires_at = datetime.now() + timedelta(seconds=self.lease_seconds)
+        return self._update_owned(task_id, lease_expires_at=expires_at)
+
+    def complete(self, task_id):
+        """标记任务完成"""
+        return self._update_owned(task_id, status="done", lease_owner=None)
+
+    def fail(self, task, error):
+        """
+        标记任务失败：未达最大尝试次数时按指数退避重新入队，否则进入死信
+
+        Args:
+            task: claim() 返回的任务
+            error: 错误信息
+        """
+        if task.attempts >= self.max_attempts:
+            logging.error(f"任务 {task.kind}:{task.key} 多次失败，进入死信: {error}")
+            return self._update_owned(
+                task.id, status="dead", lease_owner=None, last_error=error
+            )
+        delay = self.retry_base_seconds * 2 ** (task.attempts - 1)
+        return self._update_owned(
+            task.id,
+            status="pending",
+            lease_owner=None,
+            last_error=error,
+            available_at=datetime.now() + timedelta(seconds=delay),
+        )
+
+    def requeue_dead(self, kinds=None):
+        """把死信任务重新置为待处理，返回数量"""
+        session = self.db_manager.get_session()
+        try:
+            statement = update(CrawlTask).where(CrawlTask.status == "dead")
+            if kinds:
+                statement = statement.where(CrawlTask.kind.in_(kinds))
+            result = session.execute(
+                statement.values(
+                    status="pending",
+                    attempts=0,
+                    available_at=datetime.now(),
+                    updated_at=datetime.now(),
+                )
+            )
+            session.commit()
+            return result.rowcount
+        finally:
+            session.close()
+
+    def stats(self):
+        """各类型任务按状态的数量"""
+        session = self.db_manager.get_session()
+        try:
+            rows = (
+                session.query(CrawlTask.kind, CrawlTask.status, func.count())
+                .group_by(CrawlTask.kind, CrawlTask.status)
+                .all()
+            )
+        finally:
+            session.close()
+        stats = {}
+        for kind, status, count in rows:
+            stats.setdefault(kind, {})[status] = count
+        return stats
+
+
+class _Heartbeat:
+    """处理任务期间在后台线程中定期续约"""
+
+    def __init__(self, queue, task_id):
+        self.queue = queue
+        self.task_id = task_id
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        interval = max(self.queue.lease_seconds / 3, 1)
+        while not self._stop.wait(interval):
+            try:
+                if not self.queue.heartbeat(self.task_id):
+                    logging.warning(f"任务 {self.task_id} 的租约已失效")
+                    return
+            except Exception as e:
+                logging.warning(f"任务 {self.task_id} 续约失败: {str(e)}")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+
+
+def enqueue_list_pages(queue, start_page, end_page):
+    """把列表页加入队列（已完成的页面重新置为待处理），返回加入的数量"""
+    return sum(
+        queue.enqueue("list_page", page, {"page": page}, reset=True)
+        for page in range(start_page, end_page + 1)
+    )
+
+
+def handle_list_page(queue, db_manager, payload, dlp_cache=None):
+    """处理列表页任务：把尚未入库的文章加入队列"""
+    articles = fetch_article_list(payload["page"])
+    if not articles:
+        raise CustomError("列表页抓取失败")
+    existing = db_manager.get_existing_urls(article["url"] for article in articles)
+    added = sum(
+        queue.enqueue("article", article["url"], article)
+        for article in articles
+        if article["url"] not in existing
+    )
+    logging.info(f"页面 {payload['page']} 加入 {added} 篇文章任务")
+
+
+def handle_article(queue, db_manager, payload, dlp_cache=None):
+    """处理文章任务：抓取内容、入库并解析详情"""
+    raw_data = fetch_article_content(payload["url"])
+    if not raw_data:
+        raise CustomError("文章内容抓取失败")
+    db_manager.add_article({**payload, "raw_data": raw_data})
+
+    session = db_manager.get_session()
+    try:
+        article = session.query(Article.id).filter(Article.url == payload["url"]).first()
+    finally:
+        session.close()
+    if article is None:
+        raise CustomError("文章入库失败")
+
+    details = parse_article_details(raw_data, dlp_cache)
+    if not db_manager.update_article_details(article.id, details):
+        raise CustomError("保存文章详情失败")
+
+
+HANDLERS = {
+    "list_page": handle_list_page,
+    "article": handle_article,
+}
+
+
+def run_worker(db_manager, kinds=None, idle_exit=None, stop_event=None):
+    """
+    工作进程主循环：领取任务、续约、处理并确认
+
+    Args:
+        db_manager: 数据库管理器实例
+        kinds: 只处理这些类型的任务，默认全部
+        idle_exit: 队列持续为空超过该秒数后退出，默认一直运行
+        stop_event: 设置后处理完当前任务即退出（threading.Event），可选
+
+    Returns:
+        dict: 完成和失败的任务数
+    """
+    queue = WorkQueue(db_manager)
+    dlp_cache = DLPCache(db_manager)
+    result = {"done": 0, "failed": 0}
+    idle_since = time.monotonic()
+    logging.info(f"工作进程 {queue.worker_id} 启动")
+
+    while not (stop_event and stop_event.is_set()):
+        task = queue.claim(kinds)
+        if task is None:
+            if idle_exit is not None and time.monotonic() - idle_since >= idle_exit:
+                break
+            time.sleep(WORK_QUEUE_POLL_INTERVAL)
+            continue
+
+        payload = json.loads(task.payload) if task.payload else {}
+        try:
+            with _Heartbeat(queue, task.id):
+                HANDLERS[task.kind](queue, db_manager, payload, dlp_cache)
+            queue.complete(task.id)
+            result["done"] += 1
+        except Exception as e:
+            logging.error(f"任务 {task.kind}:{task.key} 失败: {str(e)}")
+            queue.fail(task, str(e))
+            result["failed"] += 1
+        idle_since = time.monotonic()
+
+    dlp_cache.flush()
+    logging.info(
+        f"工作进程 {queue.worker_id} 退出，完成 {result['done']} 个任务，"
+        f"失败 {result['failed']} 个"
+    )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多进程爬取工作队列")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enqueue_parser = subparsers.add_parser("enqueue", help="把列表页加入队列")
+    enqueue_parser.add_argument("--start", type=int, default=1, help="起始页码（含）")
+    enqueue_parser.add_argument("--end", type=int, default=2, help="结束页码（含）")
+
+    worker_parser = subparsers.add_parser("worker", help="启动工作进程")
+    worker_parser.add_argument(
+        "--kinds", nargs="+", choices=list(HANDLERS), help="只处理这些类型的任务"
+    )
+    worker_parser.add_argument(
+        "--idle-exit", type=float, default=None, help="队列空闲多少秒后退出"
+    )
+
+    subparsers.add_parser("stats", help="查看队列状态")
+    subparsers.add_parser("requeue-dead", help="把死信任务重新入队")
+    args = parser.parse_args()
+
+    setup_logging()
+    db_manager = DatabaseManager()
+    queue = WorkQueue(db_manager)
+
+    if args.command == "enqueue":
+        count = enqueue_list_pages(queue, args.start, args.end)
+        print(f"📥 已加入 {count} 个列表页任务")
+    elif args.command == "worker":
+        try:
+            run_worker(db_manager, args.kinds, args.idle_exit)
+        except KeyboardInterrupt:
+            print("⏹️ 工作进程已停止，未完成的任务将在租约到期后由其他进程处理")
+    elif args.command == "stats":
+        print(json.dumps(queue.stats(), ensure_ascii=False, indent=2))
+    elif args.command == "requeue-dead":
+        print(f"♻️ 已重新入队 {queue.requeue_dead()} 个死信任务")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,50 +4,112 @@
 该程序实现了对深圳技术大学公文通系统的文章抓取、解析和存储功能。
 """
 import logging
-import time
 
 from .crawler.utils import setup_logging
-from .crawler.database import DatabaseManager
+from .crawler.database import get_database_manager
 from .crawler.fetcher import fetch_articles_batch
 from .crawler.parser import process_article_details
+from .crawler.summarizer import generate_article_summaries
+from .crawler.stats import refresh_article_stats
+from .crawler.runner import CrawlRunContext
 
 
-def main_crawler(start_page=0, end_page=10, mode="all"):
-    """主程序入口"""
+def main_crawler(
+    start_page=0, end_page=10, mode="all", context=None, db_manager=None, force=False
+):
+    """
+    主程序入口
+
+    Args:
+        start_page: 起始页码
+        end_page: 结束页码
+        mode: fetch / parse / stats / summarize / all
+        context: 运行上下文（阶段时间预算、取消信号和耗时统计），默认不限时
+        db_manager: 数据库管理器，默认使用进程内共享的实例（表结构检查只在首次创建时执行）
+        force: 强制执行解析和摘要阶段（调度器定期的完整爬取），不论列表页是否变化
+
+    Returns:
+        list: 新文章URL列表
+    """
+    context = context or CrawlRunContext()
     # 设置日志
     setup_logging()
     logging.info("深圳技术大学公文通爬虫启动")
 
-    # 初始化数据库
-    db_manager = DatabaseManager()
-    logging.info("数据库初始化完成")
+    # 复用已初始化的数据库管理器，不再每次爬取都重建连接池和检查表结构
+    db_manager = db_manager or get_database_manager()
 
     new_urls = []  # 初始化新文章URL列表
 
     try:
         # 根据模式执行不同操作
-        if mode in ["fetch", "all"]:
+        if mode in ["fetch", "all"] and not context.cancelled:
             logging.info(f"开始抓取文章 (页码范围: {start_page} - {end_page})")
-            start_time = time.time()
-            new_urls = fetch_articles_batch(start_page, end_page, db_manager)
-            elapsed = time.time() - start_time
-            logging.info(f"耗时: {elapsed:.2f} 秒，获取新文章URLs数量: {len(new_urls)}")
+            with context.phase("fetch"):
+                new_urls = fetch_articles_batch(
+                    start_page,
+                    end_page,
+                    db_manager,
+                    should_stop=context.should_stop,
+                    on_page=context.count_page,
+                )
+            logging.info(
+                f"耗时: {context.phase_durations['fetch']:.2f} 秒，"
+                f"获取新文章URLs数量: {len(new_urls)}"
+            )
+
+        # 列表页全部没有变化时只跳过文章抓取；仍有未解析或未生成摘要的文章
+        # （上次被中断或摘要服务不可用）时照常执行，强制爬取时总是执行
+        skip_parse = skip_summarize = False
+        if mode == "all" and context.nothing_changed and not force:
+            skip_parse = not db_manager.has_unparsed_articles()
+            skip_summarize = not db_manager.has_unsummarized_articles()
+            if skip_parse and skip_summarize:
+                logging.info("列表页没有变化且没有待处理的文章，跳过解析和摘要生成")
 
-        if mode in ["parse", "all"]:
+        if mode in ["parse", "all"] and not (context.cancelled or skip_parse):
             logging.info("开始解析文章详情")
-            start_time = time.time()
-            success_count = process_article_details(db_manager)
-            elapsed = time.time() - start_time
+            with context.phase("parse"):
+                success_count = process_article_details(
+                    db_manager, should_stop=context.should_stop
+                )
+            logging.info(
+                f"文章详情解析完成，成功处理 {success_count} 篇文章，"
+                f"耗时: {context.phase_durations['parse']:.2f} 秒"
+            )
+
+        if mode in ["stats", "all"] and not context.cancelled:
+            # 访问统计不在解析阶段获取，由刷新任务按文章新旧程度并发更新
+            logging.info("开始刷新文章访问统计")
+            with context.phase("stats"):
+                refreshed_count = refresh_article_stats(
+                    db_manager, should_stop=context.should_stop
+                )
+            logging.info(
+                f"文章访问统计刷新完成，更新 {refreshed_count} 篇文章，"
+                f"耗时: {context.phase_durations['stats']:.2f} 秒"
+            )
+
+        if mode in ["summarize", "all"] and not (context.cancelled or skip_summarize):
+            # 在后台阶段生成并持久化 AI 摘要，邮件推送时无需等待摘要服务
+            logging.info("开始生成 AI 摘要")
+            with context.phase("summarize"):
+                summary_count = generate_article_summaries(
+                    db_manager, should_stop=context.should_stop
+                )
             logging.info(
-                f"文章详情解析完成，成功处理 {success_count} 篇文章，耗时: {elapsed:.2f} 秒"
+                f"AI 摘要生成完成，写入 {summary_count} 篇文章，"
+                f"耗时: {context.phase_durations['summarize']:.2f} 秒"
             )
 
         logging.info("爬虫任务完成")
 
     except KeyboardInterrupt:
         logging.info("用户中断，程序退出")
+        context.cancel_event.set()
     except Exception as e:
         logging.error(f"程序执行过程中发生错误: {str(e)}")
+        context.record_error(str(e))
 
     # 返回新文章URL列表，用于推送或其他处理
     return new_urls
@@ -0,0 +1,41 @@
+"""
+令牌桶速率限制器
+
+爬虫的全局请求限速（历史回填）和群发邮件的发送限速共用同一个实现
+"""
+
+import threading
+import time
+
+
+class RateLimiter:
+    """令牌桶速率限制器（线程安全），多个线程共享同一个速率上限"""
+
+    def __init__(self, rate, burst=1):
+        """
+        Args:
+            rate: 每秒允许的次数，<=0 表示不限速
+            burst: 允许的突发次数
+        """
+        self.rate = float(rate)
+        self.capacity = max(float(burst), 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """获取一个令牌，必要时阻塞等待"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
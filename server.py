@@ -1,4 +1,5 @@
 from flask import Flask, jsonify, request
+import asyncio
 import pathlib
 import threading
 import time
@@ -6,241 +7,258 @@ import schedule
 from datetime import datetime, date, timedelta
 
 # 使用新的统一配置
-from config import ARTICLES_DATABASE_URI as DATABASE_URI, OFFICAL_URL
+from config import (
+    ARTICLES_DATABASE_URI as DATABASE_URI,
+    DIGEST_DISPATCH_INTERVAL_MINUTES,
+    STATS_REFRESH_INTERVAL_MINUTES,
+    TRENDING_WINDOW_HOURS,
+    CRAWL_MIN_INTERVAL_MINUTES,
+    CRAWL_MAX_INTERVAL_MINUTES,
+)
 
 # 直接引用official_document_crawler中的模块
-from official_document_crawler.crawler.database import Base, Article, DatabaseManager
+from official_document_crawler.crawler.database import (
+    Base,
+    Article,
+    get_database_manager,
+)
 from official_document_crawler.main_crawler import main_crawler
+from official_document_crawler.crawler.dlp_cache import dlp_cache_stats
+from official_document_crawler.crawler.local_dlp import local_dlp_engine
+from official_document_crawler.crawler.stats import refresh_article_stats
+from official_document_crawler.crawler.trending import get_trending_articles
+from official_document_crawler.crawler.scheduler import AdaptiveCrawlScheduler
+from official_document_crawler.crawler.runner import CrawlJobRunner
+from official_document_crawler.crawler.utils import setup_logging
 
 # 导入邮件订阅相关模块
 from email_subscriber.subscriber_manager import SubscriberService
+from email_subscriber.templates import DigestRenderer, render_subscription_confirmation
+
+# 安全服务客户端（共享连接池、超时和熔断）
+from sidecar_client import get_sidecar_client
+from sql_firewall import get_sql_firewall
+
+# 后台任务执行器（订阅确认邮件等副作用）
+from background_tasks import get_background_executor
 
 ROOT_PATH = pathlib.Path(__file__).parent.resolve()
 STATIC_FOLDER = str(ROOT_PATH / "static")
 
 app = Flask(__name__, static_folder=STATIC_FOLDER, static_url_path="")
 
-# 使用DatabaseManager而非直接创建引擎和会话
-db_manager = DatabaseManager()
+# 日志和数据库（含表结构检查）只在启动时初始化一次，之后每次爬取都复用
+setup_logging()
+db_manager = get_database_manager()
 # print(db_manager.url)
 
+# 自适应爬取调度器（按发布规律调整轮询间隔，首页无变化时跳过完整爬取）
+crawl_scheduler = AdaptiveCrawlScheduler(db_manager)
+
+# 爬取任务运行器（防止重叠运行，记录运行历史）
+crawl_runner = CrawlJobRunner(db_manager)
+
 # 初始化邮件订阅服务
 subscriber_service = SubscriberService()
 
-# 简化的全局变量，只保存已发送的URL集合
-last_sent_urls = set()
 
-
-# 重构邮件发送逻辑，使用个性化推送频率
+# 新文章入库时写入待推送账本，随后检查一次到期订阅者
 def send_new_articles_email_by_individual_frequency(new_urls):
-    global last_sent_urls
-
     try:
-        # 过滤掉已经发送过的URL
-        truly_new_urls = [url for url in new_urls if url not in last_sent_urls]
+        # 领取尚未推送的URL（推送状态持久化在文章表中，重启和多进程下都不会重复）；
+        # 之前领取后未能写入账本的文章超时后、工作队列进程入库的近期文章也会在这里被领取
+        truly_new_urls = db_manager.claim_unnotified_urls(new_urls)
 
         if not truly_new_urls:
-            print(f"[{datetime.now()}] 📭 没有新文章需要发送")
+            if new_urls:
+                print(f"[{datetime.now()}] 📭 没有新文章需要发送")
+            start_digest_dispatch()
             return
 
         print(
-            f"[{datetime.now()}] 📧 发现 {len(truly_new_urls)} 条新文章，开始个性化推送"
+            f"[{datetime.now()}] 📧 发现 {len(truly_new_urls)} 条新文章，写入待推送账本"
         )
 
-        # 查询新文章的详细信息
+        # 只需文章ID和来源平台
         session = db_manager.get_session()
-        new_articles = (
-            session.query(Article).filter(Article.url.in_(truly_new_urls)).all()
-        )
+        try:
+            new_articles = (
+                session.query(Article.id, Article.source)
+                .filter(Article.url.in_(truly_new_urls))
+                .all()
+            )
+        finally:
+            session.close()
 
-        if not new_articles:
+        if new_articles:
+            entries = subscriber_service.enqueue_new_articles(
+                [(article.id, article.source) for article in new_articles]
+            )
+            print(f"[{datetime.now()}] 📒 待推送账本新增 {entries} 条记录")
+        else:
             print("❌ 没有找到对应的文章详情")
-            session.close()
+
+        # 账本写入成功后才标记为已推送；写入失败时领取超时后重试（账本写入幂等）
+        db_manager.mark_notified(truly_new_urls)
+
+        # 频率较高的订阅者此时可能已到期，立即推送
+        start_digest_dispatch()
+
+    except Exception as e:
+        print(f"[{datetime.now()}] ❌ 发送新文章邮件失败: {str(e)}")
+
+
+# 取出到期订阅者的分组并渲染汇总邮件（文章已删除的分组直接清理账本）
+def prepare_due_digests():
+    groups = subscriber_service.get_due_digest_groups()
+    if not groups:
+        return 0, []
+
+    # 一次查询取出所有分组涉及的文章
+    article_ids = set()
+    for ids, _ in groups:
+        article_ids.update(ids)
+
+    session = db_manager.get_session()
+    try:
+        articles = (
+            session.query(Article)
+            .filter(Article.id.in_(article_ids))
+            .order_by(Article.date.desc(), Article.detail_time.desc())
+            .all()
+        )
+    finally:
+        session.close()
+    order = {article.id: i for i, article in enumerate(articles)}
+    articles_by_id = {article.id: article for article in articles}
+
+    # 同一次推送内文章卡片只渲染一次
+    renderer = DigestRenderer()
+    digests = []
+    for ids, subscribers in groups:
+        group_articles = sorted(
+            (articles_by_id[i] for i in ids if i in articles_by_id),
+            key=lambda article: order[article.id],
+        )
+        if not group_articles:
+            # 文章已被删除，直接清理账本
+            subscriber_service.discard_pending_articles(subscribers, ids)
+            continue
+
+        # AI 摘要已在爬取阶段生成并保存，这里直接读取
+        summaries = {
+            article.url: article.ai_summary or "" for article in group_articles
+        }
+        email_subject, html_content = renderer.render_digest(group_articles, summaries)
+        digests.append((ids, subscribers, email_subject, html_content))
+    return len(groups), digests
+
+
+def finish_digest_dispatch(group_count, results):
+    # 本次推送结束，写入缓冲的邮件统计
+    subscriber_service.flush_stats()
+    total_success = sum(success for success, _ in results)
+    total_due = sum(total for _, total in results)
+    print(
+        f"[{datetime.now()}] ✅ 汇总推送完成（{group_count} 组），成功: {total_success}/{total_due}"
+    )
+
+
+# 定时检查到期订阅者，将其账本中累积的文章汇总为一封邮件发送（阻塞发送）
+def dispatch_due_digests():
+    try:
+        group_count, digests = prepare_due_digests()
+        if not group_count:
             return
 
-        # 按平台分组文章
-        articles_by_platform = {}
-        for article in new_articles:
-            platform = article.source
-            if platform not in articles_by_platform:
-                articles_by_platform[platform] = []
-            articles_by_platform[platform].append(article)
-
-        # 为每个平台的文章发送个性化推送
-        total_sent = 0
-        for platform, platform_articles in articles_by_platform.items():
-            print(
-                f"[{datetime.now()}] 📤 处理平台: {platform}, 文章数: {len(platform_articles)}"
-            )
+        results = [
+            subscriber_service.send_digest_group(subject, content, subscribers, ids)
+            for ids, subscribers, subject, content in digests
+        ]
+        finish_digest_dispatch(group_count, results)
 
-            # 构建邮件主题
-            email_subject = (
-                f"【GM】{len(platform_articles)}条新公文通"
-            )
+    except Exception as e:
+        print(f"[{datetime.now()}] ❌ 汇总推送失败: {str(e)}")
 
-            # 构建HTML邮件内容
-            html_content = f"""
-            <html>
-            <head>
-                <style>
-                    body {{
-                        font-family: 'PingFang SC', 'Helvetica Neue', Helvetica, Arial, sans-serif;
-                        background-color: #f5f5f5;
-                        color: #333;
-                        padding: 20px;
-                        max-width: 600px;
-                        margin: 0 auto;
-                    }}
-                    .header {{
-                        text-align: center;
-                        margin-bottom: 20px;
-                        padding-bottom: 15px;
-                        border-bottom: 2px solid #007bff;
-                    }}
-                    .summary {{
-                        background-color: #e7f3ff;
-                        padding: 15px;
-                        border-radius: 8px;
-                        margin-bottom: 20px;
-                        text-align: center;
-                    }}
-                    .article-card {{
-                        background-color: white;
-                        border-radius: 8px;
-                        box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-                        padding: 15px;
-                        margin-bottom: 15px;
-                        border-left: 4px solid #007bff;
-                    }}
-                    .title {{
-                        font-size: 18px;
-                        font-weight: bold;
-                        margin-bottom: 8px;
-                        color: #003366;
-                    }}
-                    .title a {{
-                        color: #003366;
-                        text-decoration: none;
-                    }}
-                    .title a:hover {{
-                        text-decoration: underline;
-                    }}
-                    .meta {{
-                        display: flex;
-                        justify-content: space-between;
-                        color: #666;
-                        font-size: 14px;
-                        margin-top: 5px;
-                    }}
-                    .platform {{
-                        font-weight: bold;
-                        color: #0055a4;
-                    }}
-                    .date {{
-                        color: #777;
-                    }}
-                    .footer {{
-                        text-align: center;
-                        margin-top: 25px;
-                        font-size: 12px;
-                        color: #888;
-                        padding-top: 15px;
-                        border-top: 1px solid #eee;
-                    }}
-                </style>
-            </head>
-            <body>
-                <div class="header">
-                    <h2>📝 深圳技术大学公文通更新</h2>
-                </div>
-                <div class="summary">
-                    <h3>📊 本次推送汇总</h3>
-                    <p><strong>{platform}</strong> 平台有 <strong>{len(platform_articles)}</strong> 条新通知</p>
-                    <p>推送模式：个性化频率推送</p>
-                </div>
-            """
-
-            for i, article in enumerate(platform_articles, 1):
-                date_display = (
-                    f"{article.date} {article.detail_time}"
-                    if article.detail_time
-                    else article.date
-                )
 
-                # [Security] 获取 AI 摘要
-                ai_summary, ai_title = subscriber_service._get_ai_summary(
-                    article.content if article.content else article.title
-                )
-                summary_html = ""
-                if ai_summary:
-                    summary_html = f"""
-                    <div style="background-color: #fcebd1; padding: 10px; margin-top: 5px; border-radius: 4px; font-size: 13px; color: #8a6d3b;">
-                        <strong>🤖 AI 摘要:</strong> {ai_summary}
-                    </div>
-                    """
-
-                html_content += f"""
-                <div class="article-card">
-                    <div class="title">
-                        <span style="color: #999; font-size: 14px;">#{i}</span>
-                        <a href="{article.url}" target="_blank">{article.title}</a>
-                        {summary_html}
-                    </div>
-                    <div class="meta">
-                        <span class="platform">📣 {article.source}</span>
-                        <span class="date">🕒 {date_display}</span>
-                    </div>
-                </div>
-                """
-
-            html_content += f"""
-                <div class="footer">
-                    <p>您的邮件根据个人设置的推送频率发送</p>
-                    <p>感谢您的订阅！如需调整订阅设置，请访问 <a href="http://{OFFICAL_URL}/subscribe">订阅页面</a>。</p>
-                    <p>© 2023 深圳技术大学GoldenMouse - 让校园信息触手可及 🐭</p>
-                </div>
-            </body>
-            </html>
-            """
-
-            # 使用新的个性化推送方法
-            success, total = (
-                subscriber_service.send_email_to_subscribers_by_individual_frequency(
-                    subject=email_subject,
-                    content=html_content,
-                    html=True,
-                    source_platform=platform,
+# dispatch_due_digests 的协程版本：在 async 发送后端的事件循环中执行，
+# 各组邮件并发发送，数据库操作和渲染在线程池中执行
+async def dispatch_due_digests_async():
+    loop = asyncio.get_running_loop()
+    try:
+        group_count, digests = await loop.run_in_executor(None, prepare_due_digests)
+        if not group_count:
+            return
+
+        results = await asyncio.gather(
+            *(
+                subscriber_service.send_digest_group_async(
+                    subject, content, subscribers, ids
                 )
+                for ids, subscribers, subject, content in digests
             )
+        )
+        await loop.run_in_executor(None, finish_digest_dispatch, group_count, results)
 
-            total_sent += total
-            if total > 0:
-                print(
-                    f"[{datetime.now()}] ✅ 发送 {platform} 平台邮件完成（个性化推送），成功: {success}/{total}"
-                )
+    except Exception as e:
+        print(f"[{datetime.now()}] ❌ 汇总推送失败: {str(e)}")
 
-        # 更新已发送URL集合
-        last_sent_urls.update(truly_new_urls)
-        # 限制集合大小，避免内存无限增长
-        if len(last_sent_urls) > 200:
-            last_sent_urls = set(list(last_sent_urls)[-200:])
 
-        session.close()
+# 正在 async 发送后端中执行的汇总推送（同一时间只允许一次，避免重复发送）
+digest_dispatch_future = None
+digest_dispatch_lock = threading.Lock()
 
+
+# 开始一次汇总推送：EMAIL_TRANSPORT = "async" 时提交到发送后端的事件循环后立即返回，
+# 调度线程继续执行爬取；否则在当前线程中阻塞发送
+def start_digest_dispatch():
+    global digest_dispatch_future
+    transport = subscriber_service.async_transport
+    if transport is None:
+        dispatch_due_digests()
+        return
+
+    with digest_dispatch_lock:
+        if digest_dispatch_future is not None and not digest_dispatch_future.done():
+            print(f"[{datetime.now()}] ⏳ 上一次汇总推送尚未结束，跳过本次检查")
+            return
+        digest_dispatch_future = transport.submit(dispatch_due_digests_async())
+
+
+# 自适应爬取：先比较列表首页指纹，有变化（或长时间未完整爬取）时才执行爬取
+def adaptive_crawl_task():
+    try:
+        changed = crawl_scheduler.check_for_changes()
+        crawled = changed or crawl_scheduler.crawl_overdue()
+        if crawled:
+            # 首页无变化但已超过 CRAWL_FORCE_FULL_HOURS：强制执行解析和摘要阶段
+            crawl_task(force=not changed)
+        else:
+            print(f"[{datetime.now()}] 💤 列表首页没有变化，跳过本次爬取")
     except Exception as e:
-        print(f"[{datetime.now()}] ❌ 发送新文章邮件失败: {str(e)}")
+        print(f"[{datetime.now()}] ❌ 自适应爬取失败: {str(e)}")
+        changed, crawled = False, False
+    crawl_scheduler.record_poll(changed, crawled)
+
+
+# 定时推送：领取其他进程（工作队列）入库的新文章写入账本，再汇总推送到期订阅者
+def notify_tick():
+    send_new_articles_email_by_individual_frequency([])
 
 
 # 定时任务线程函数
 def run_scheduler():
-    # 创建定时任务，每小时执行一次
-    schedule.every(0.5).hours.do(crawl_task)
+    # 到期订阅者的汇总推送与爬取解耦
+    schedule.every(DIGEST_DISPATCH_INTERVAL_MINUTES).minutes.do(notify_tick)
+    # 点击数、下载数按文章新旧程度定期刷新
+    schedule.every(STATS_REFRESH_INTERVAL_MINUTES).minutes.do(stats_refresh_task)
 
-    # 服务启动时先执行一次爬取
+    # 爬取由自适应调度器安排，服务启动时首次轮询会执行一次完整爬取
     print("🚀 服务启动，执行首次爬取...")
-    crawl_task()
 
     while True:
+        if crawl_scheduler.is_due():
+            adaptive_crawl_task()
         schedule.run_pending()
         time.sleep(1)
 
@@ -277,25 +295,9 @@ def get_subscriber_platforms():
         return jsonify({"success": False, "message": f"服务器错误: {str(e)}"}), 500
 
 
-import requests
-
-
-# [Security] 数据库防火墙检测
+# [Security] 数据库防火墙检测（白名单格式直接放行，判定结果缓存；服务不可用或熔断时放行）
 def check_sql_injection(content):
-    try:
-        resp = requests.post(
-            "http://localhost:58080/api/v1/firewall/detect",
-            json={"sql": content},
-            timeout=30,
-        )
-        if resp.status_code == 200:
-            data = resp.json().get("data", {})
-            if not data.get("is_safe"):
-                return False, data.get("reason", "检测到潜在的 SQL 注入风险")
-        return True, ""
-    except Exception as e:
-        print(f"防火墙服务连接异常: {e}")
-        return True, ""  # 服务不可用时默认放行，或选择阻断
+    return get_sql_firewall().check(content)
 
 
 # 邮箱订阅相关API
@@ -353,30 +355,16 @@ def subscribe():
         )
 
         if success:
-            # 获取平台名称列表（用于发送订阅确认邮件）
-            platform_names = []
-            if not all_platforms and platform_ids:
-                # 查询平台名称
-                platform_objects = []
-                db_session = subscriber_service.db_manager.get_session()
-                try:
-                    from email_subscriber.subscriberDB import Platform
-
-                    platform_objects = (
-                        db_session.query(Platform)
-                        .filter(Platform.id.in_(platform_ids))
-                        .all()
-                    )
-                    platform_names = [p.name for p in platform_objects]
-                except Exception as e:
-                    print(f"❌ 获取平台名称失败: {str(e)}")
-                finally:
-                    db_session.close()
-
-            # 只有新订阅者才发送确认邮件
+            # 只有新订阅者才发送确认邮件；平台名称查询和 SMTP 发送都交给后台任务，
+            # 订阅记录提交后立即返回
             if is_new_subscriber:
-                send_subscription_confirmation(
-                    email, all_platforms, platform_names, send_frequency
+                get_background_executor().submit(
+                    "订阅确认邮件",
+                    confirm_new_subscription,
+                    email,
+                    all_platforms,
+                    platform_ids,
+                    send_frequency,
                 )
                 print(f"✅ 新用户 {email} 订阅成功")
             else:
@@ -448,6 +436,8 @@ def get_data():
                 "url": article.url,
                 "fujians": article.fujians,
                 "content": article.content,  # 添加内容字段
+                "ai_summary": article.ai_summary or "",
+                "ai_title": article.ai_title or "",
             }
             result.append(item)
 
@@ -529,6 +519,8 @@ def get_today_data():
                 "url": article.url,
                 "fujians": article.fujians,
                 "content": article.content,
+                "ai_summary": article.ai_summary or "",
+                "ai_title": article.ai_title or "",
             }
             result.append(item)
 
@@ -540,6 +532,39 @@ def get_today_data():
         return jsonify({"error": str(e)}), 500
 
 
+# 热门文章排行（读取统计刷新时预先计算的热度）
+@app.route("/api/trending")
+def get_trending():
+    try:
+        limit = min(max(request.args.get("limit", 10, type=int), 1), 50)
+
+        session = db_manager.get_session()
+        try:
+            rows = get_trending_articles(session, limit)
+            result = [
+                {
+                    "title": article.title,
+                    "source": article.source,
+                    "date": article.date,
+                    "url": article.url,
+                    "click_num": article.click_num,
+                    "clicks_delta": trending.clicks_delta,
+                    "downloads_delta": trending.downloads_delta,
+                    "score": trending.score,
+                    "ai_title": article.ai_title or "",
+                }
+                for trending, article in rows
+            ]
+        finally:
+            session.close()
+
+        return jsonify({"data": result, "window_hours": TRENDING_WINDOW_HOURS})
+
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route("/")
 def index():
     return app.send_static_file("today.html")  # 将今日页面作为首页
@@ -566,6 +591,72 @@ def get_stats():
         return jsonify({"success": False, "message": f"服务器错误: {str(e)}"}), 500
 
 
+# 安全服务调用统计
+@app.route("/api/sidecar_stats", methods=["GET"])
+def get_sidecar_stats():
+    try:
+        stats = get_sidecar_client().stats()
+        stats["dlp_cache"] = dlp_cache_stats()
+        stats["local_dlp"] = local_dlp_engine.stats()
+        stats["firewall_guard"] = get_sql_firewall().stats()
+        return jsonify({"success": True, "stats": stats})
+    except Exception as e:
+        print(f"❌ 获取安全服务统计错误: {str(e)}")
+        return jsonify({"success": False, "message": f"服务器错误: {str(e)}"}), 500
+
+
+# 查询订阅平台名称并发送确认邮件（在后台任务中执行）
+def confirm_new_subscription(email, all_platforms, platform_ids, send_frequency):
+    platform_names = []
+    if not all_platforms and platform_ids:
+        db_session = subscriber_service.db_manager.get_session()
+        try:
+            from email_subscriber.subscriberDB import Platform
+
+            platform_objects = (
+                db_session.query(Platform).filter(Platform.id.in_(platform_ids)).all()
+            )
+            platform_names = [p.name for p in platform_objects]
+        except Exception as e:
+            print(f"❌ 获取平台名称失败: {str(e)}")
+        finally:
+            db_session.close()
+
+    send_subscription_confirmation(email, all_platforms, platform_names, send_frequency)
+
+
+# 后台任务执行统计
+@app.route("/api/task_stats", methods=["GET"])
+def get_task_stats():
+    try:
+        stats = get_background_executor().stats()
+        return jsonify({"success": True, "stats": stats})
+    except Exception as e:
+        print(f"❌ 获取后台任务统计错误: {str(e)}")
+        return jsonify({"success": False, "message": f"服务器错误: {str(e)}"}), 500
+
+
+# 爬取运行状态：当前是否在运行、最近的运行记录、各阶段平均耗时和调度信息
+@app.route("/api/crawl_status", methods=["GET"])
+def get_crawl_status():
+    try:
+        limit = min(max(request.args.get("limit", 20, type=int), 1), 100)
+        status = crawl_runner.status(limit)
+        status["scheduler"] = crawl_scheduler.status()
+        return jsonify({"success": True, "status": status})
+    except Exception as e:
+        print(f"❌ 获取爬取状态错误: {str(e)}")
+        return jsonify({"success": False, "message": f"服务器错误: {str(e)}"}), 500
+
+
+# 取消正在运行的爬取（各阶段在处理下一页/下一篇文章前结束）
+@app.route("/api/crawl_cancel", methods=["POST"])
+def cancel_crawl():
+    cancelled = crawl_runner.cancel()
+    message = "已请求取消爬取任务" if cancelled else "当前没有正在运行的爬取任务"
+    return jsonify({"success": cancelled, "message": message})
+
+
 # 发送订阅成功确认邮件
 def send_subscription_confirmation(
     email, all_platforms, platform_names=None, send_frequency=1
@@ -582,74 +673,9 @@ def send_subscription_confirmation(
             )
 
         # 构建HTML邮件内容
-        html_content = f"""
-        <html>
-        <head>
-            <style>
-                body {{
-                    font-family: 'PingFang SC', 'Helvetica Neue', Helvetica, Arial, sans-serif;
-                    background-color: #f5f5f5;
-                    color: #333;
-                    padding: 20px;
-                    max-width: 600px;
-                    margin: 0 auto;
-                }}
-                .container {{
-                    background-color: white;
-                    border-radius: 10px;
-                    box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-                    padding: 25px;
-                }}
-                .header {{
-                    text-align: center;
-                    margin-bottom: 20px;
-                    padding-bottom: 15px;
-                    border-bottom: 1px solid #eee;
-                }}
-                .content {{
-                    line-height: 1.6;
-                    margin-bottom: 20px;
-                }}
-                .highlight {{
-                    background-color: #f0f7ff;
-                    padding: 10px;
-                    border-radius: 5px;
-                    margin: 15px 0;
-                }}
-                .footer {{
-                    text-align: center;
-                    margin-top: 20px;
-                    font-size: 12px;
-                    color: #888;
-                    padding-top: 15px;
-                    border-top: 1px solid #eee;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h2>🎉 订阅成功 🎉</h2>
-                </div>
-                <div class="content">
-                    <p>您好！</p>
-                    <p>感谢您订阅深圳技术大学公文通更新通知。您已成功订阅来自<b>{platform_description}</b>的最新公告。</p>
-                    
-                    <div class="highlight">
-                        <p>📧 订阅邮箱：{email}</p>
-                        <p>🔄 推送频率：每{send_frequency}小时推送一次</p>
-                    </div>
-                    
-                    <p>从现在开始，您将按照设定的频率收到所有符合您订阅要求的最新公文通通知。</p>
-                    <p>如需调整订阅设置或取消订阅，请随时访问我们的 <a href="http://{OFFICAL_URL}/subscribe">订阅管理页面</a>。</p>
-                </div>
-                <div class="footer">
-                    <p>© 2023 深圳技术大学GoldenMouse - 让校园信息触手可及 🐭</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
+        html_content = render_subscription_confirmation(
+            email, platform_description, send_frequency
+        )
 
         # 发送确认邮件
         subscriber_service._send_batch_email(
@@ -666,21 +692,40 @@ def send_subscription_confirmation(
         return False
 
 
-# 更新爬虫任务函数，使用新的推送方法
-def crawl_task():
+# 爬虫任务：由任务运行器保证同一时间只有一次爬取，并记录各阶段耗时
+def crawl_task(trigger="scheduled", force=False):
     print(f"[{datetime.now()}] ⏰ 开始执行定时爬取任务...")
-    try:
-        new_urls = main_crawler(start_page=0, end_page=2, mode="all")
-        print(
-            f"[{datetime.now()}] ✅ 爬取完成，发现 {len(new_urls) if new_urls else 0} 条新内容"
+
+    def job(context):
+        new_urls = main_crawler(
+            start_page=0,
+            end_page=2,
+            mode="all",
+            context=context,
+            db_manager=db_manager,
+            force=force,
         )
-        # 如果有新内容，使用个性化推送
-        if new_urls and len(new_urls) > 0:
-            send_new_articles_email_by_individual_frequency(new_urls)
+        # 推送新内容，并重试之前未能写入账本的文章
+        if not context.cancelled:
+            with context.phase("notify"):
+                send_new_articles_email_by_individual_frequency(new_urls)
         return new_urls
-    except Exception as e:
-        print(f"[{datetime.now()}] ❌ 爬取任务执行失败: {str(e)}")
+
+    new_urls = crawl_runner.run(job, trigger)
+    if new_urls is None:
+        print(f"[{datetime.now()}] ⏳ 上一次爬取尚未结束，跳过本次爬取")
         return []
+    print(f"[{datetime.now()}] ✅ 爬取完成，发现 {len(new_urls)} 条新内容")
+    return new_urls
+
+
+# 文章访问统计刷新任务
+def stats_refresh_task():
+    try:
+        refreshed = refresh_article_stats(db_manager)
+        print(f"[{datetime.now()}] 📊 文章访问统计刷新完成，更新 {refreshed} 篇文章")
+    except Exception as e:
+        print(f"[{datetime.now()}] ❌ 文章访问统计刷新失败: {str(e)}")
 
 
 # 保留旧的函数名以保持兼容性
@@ -702,8 +747,13 @@ def main():
     # 启动定时任务线程
     scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
     scheduler_thread.start()
-    print("🕒 定时爬取任务已启动，每半小时执行一次")
+    print(
+        f"🕒 自适应爬取任务已启动，轮询间隔 {CRAWL_MIN_INTERVAL_MINUTES}-"
+        f"{CRAWL_MAX_INTERVAL_MINUTES} 分钟"
+    )
     print("📧 邮件推送已升级为个性化频率推送，兼容版本升级前的用户")
+    print(f"📒 每 {DIGEST_DISPATCH_INTERVAL_MINUTES} 分钟检查一次到期订阅者的待推送文章")
+    print(f"📊 每 {STATS_REFRESH_INTERVAL_MINUTES} 分钟刷新一次文章访问统计")
 
     app.run(debug=True, host="0.0.0.0", port=5000)
 
@@ -0,0 +1,252 @@
+"""
+安全服务（Secure Utils）客户端
+
+DLP 脱敏、SQL 注入检测和 AI 摘要共用一个带 keep-alive 连接池的 HTTP 会话；
+每个接口有独立的超时和熔断器，服务不可用时快速失败并返回降级结果：
+
+- mask_text: 返回原文（不脱敏）
+- detect_sql_injection: 放行（与原有行为一致）
+- generate_summary: 返回 None，由调用方稍后重试
+"""
+
+import logging
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import (
+    SIDECAR_BASE_URL,
+    SIDECAR_TIMEOUTS,
+    SIDECAR_POOL_SIZE,
+    SIDECAR_FAILURE_THRESHOLD,
+    SIDECAR_RECOVERY_TIMEOUT,
+)
+
+# 接口名称 -> 路径
+ENDPOINTS = {
+    "dlp": "/api/v1/dlp/mask",
+    "firewall": "/api/v1/firewall/detect",
+    "summarizer": "/api/v1/summarizer/generate",
+}
+
+
+class CircuitBreaker:
+    """
+    熔断器（线程安全）
+
+    连续失败 failure_threshold 次后断开；断开 recovery_timeout 秒后放行一次试探请求，
+    试探成功则恢复，失败则继续断开
+    """
+
+    def __init__(self, failure_threshold=5, recovery_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """closed / open / half-open"""
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            elapsed = time.monotonic() - self._opened_at
+            if self._probing or elapsed >= self.recovery_timeout:
+                return "half-open"
+            return "open"
+
+    def allow_request(self):
+        """是否允许发出请求（断开期间每个恢复周期只放行一个试探请求）"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing:
+                return False
+            if time.monotonic() - self._opened_at >= self.recovery_timeout:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        """记录成功，恢复闭合状态"""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        """记录失败，返回是否因此进入断开状态"""
+        with self._lock:
+            self._failures += 1
+            if self._probing or (
+                self._opened_at is None and self._failures >= self.failure_threshold
+            ):
+                tripped = not self._probing
+                self._opened_at = time.monotonic()
+                self._probing = False
+                return tripped
+            return False
+
+
+class SidecarClient:
+    """安全服务 HTTP 客户端（线程安全，进程内共享一个实例）"""
+
+    def __init__(
+        self,
+        base_url=SIDECAR_BASE_URL,
+        timeouts=None,
+        pool_size=SIDECAR_POOL_SIZE,
+        failure_threshold=SIDECAR_FAILURE_THRESHOLD,
+        recovery_timeout=SIDECAR_RECOVERY_TIMEOUT,
+    ):
+        """
+        Args:
+            base_url: 安全服务地址
+            timeouts: 接口名称 -> 超时（秒），默认使用 SIDECAR_TIMEOUTS
+            pool_size: keep-alive 连接池大小
+            failure_threshold: 连续失败多少次后熔断
+            recovery_timeout: 熔断后多久放行试探请求（秒）
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeouts = dict(SIDECAR_TIMEOUTS)
+        self.timeouts.update(timeouts or {})
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._breakers = {
+            name: CircuitBreaker(failure_threshold, recovery_timeout)
+            for name in ENDPOINTS
+        }
+        self._lock = threading.Lock()
+        self._stats = {
+            name: {
+                "calls": 0,
+                "errors": 0,
+                "short_circuited": 0,
+                "total_latency": 0.0,
+                "max_latency": 0.0,
+            }
+            for name in ENDPOINTS
+        }
+
+    def call(self, endpoint, payload):
+        """
+        调用安全服务接口
+
+        Args:
+            endpoint: 接口名称（dlp / firewall / summarizer）
+            payload: 请求 JSON
+
+        Returns:
+            dict: 响应中的 data 字段；失败或熔断时返回 None
+        """
+        breaker = self._breakers[endpoint]
+        if not breaker.allow_request():
+            self._count(endpoint, "short_circuited")
+            return None
+
+        start = time.monotonic()
+        data = None
+        error = None
+        try:
+            resp = self.session.post(
+                self.base_url + ENDPOINTS[endpoint],
+                json=payload,
+                timeout=self.timeouts.get(endpoint, 5),
+            )
+            if resp.status_code == 200:
+                data = resp.json().get("data", {})
+            else:
+                error = f"HTTP {resp.status_code}"
+        except Exception as e:
+            error = str(e)
+
+        latency = time.monotonic() - start
+        with self._lock:
+            stats = self._stats[endpoint]
+            stats["calls"] += 1
+            stats["total_latency"] += latency
+            stats["max_latency"] = max(stats["max_latency"], latency)
+            if error is not None:
+                stats["errors"] += 1
+
+        if error is not None:
+            logging.warning(f"安全服务 {endpoint} 调用失败: {error}")
+            if breaker.record_failure():
+                logging.warning(
+                    f"安全服务 {endpoint} 连续失败，熔断 {breaker.recovery_timeout} 秒"
+                )
+            return None
+
+        breaker.record_success()
+        return data
+
+    def _count(self, endpoint, key):
+        with self._lock:
+            self._stats[endpoint][key] += 1
+
+    def mask_text(self, text):
+        """DLP 脱敏，服务不可用时返回原文"""
+        masked = self.try_mask_text(text)
+        return text if masked is None else masked
+
+    def try_mask_text(self, text):
+        """DLP 脱敏，服务不可用时返回 None（便于调用方区分降级结果，避免缓存原文）"""
+        data = self.call("dlp", {"text": text})
+        if data is None:
+            return None
+        return data.get("masked_text", text)
+
+    def detect_sql_injection(self, sql):
+        """
+        SQL 注入检测
+
+        Returns:
+            tuple: (是否安全, 原因)；服务不可用时放行
+        """
+        data = self.call("firewall", {"sql": sql})
+        if data is None or data.get("is_safe"):
+            return True, ""
+        return False, data.get("reason", "检测到潜在的 SQL 注入风险")
+
+    def generate_summary(self, content):
+        """
+        生成 AI 摘要
+
+        Returns:
+            tuple: (摘要, 标题)；服务不可用时返回 None
+        """
+        data = self.call("summarizer", {"content": content})
+        if data is None:
+            return None
+        return data.get("summary", ""), data.get("title", "")
+
+    def stats(self):
+        """各接口的调用次数、错误数、熔断次数、延迟和熔断器状态"""
+        with self._lock:
+            snapshot = {name: dict(values) for name, values in self._stats.items()}
+        for name, values in snapshot.items():
+            calls = values["calls"]
+            values["avg_latency"] = values["total_latency"] / calls if calls else 0.0
+            values["circuit"] = self._breakers[name].state
+        return snapshot
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_sidecar_client():
+    """获取进程内共享的安全服务客户端"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = SidecarClient()
+        return _client
@@ -0,0 +1,119 @@
+"""
+SQL 注入检测（防火墙）前置筛查
+
+请求先经过本地白名单：完全匹配严格格式（如订阅邮箱 SUBSCRIBER_MASK）的输入
+不可能包含注入语句，直接放行，不访问安全服务；
+其余输入交给安全服务检测，判定结果写入有容量上限和过期时间的缓存，
+重复或批量的相同输入不再等待防火墙。服务不可用时放行且不缓存
+"""
+
+import collections
+import re
+import threading
+import time
+
+from config import (
+    FIREWALL_ALLOWLIST_PATTERNS,
+    FIREWALL_VERDICT_CACHE_SIZE,
+    FIREWALL_VERDICT_CACHE_TTL,
+)
+from sidecar_client import get_sidecar_client
+
+
+class SQLFirewall:
+    """带本地白名单和判定缓存的 SQL 注入检测（线程安全）"""
+
+    def __init__(
+        self,
+        client=None,
+        allowlist_patterns=FIREWALL_ALLOWLIST_PATTERNS,
+        cache_size=FIREWALL_VERDICT_CACHE_SIZE,
+        cache_ttl=FIREWALL_VERDICT_CACHE_TTL,
+    ):
+        """
+        Args:
+            client: 安全服务客户端，默认使用进程内共享实例
+            allowlist_patterns: 白名单正则列表，完全匹配任意一条即放行
+            cache_size: 判定缓存最多保存的条目数
+            cache_ttl: 判定缓存的有效期（秒）
+        """
+        self.client = client
+        self.allowlist = [re.compile(pattern) for pattern in allowlist_patterns]
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._cache = collections.OrderedDict()  # 输入 -> (过期时间, 是否安全, 原因)
+        self._lock = threading.Lock()
+        self._stats = {"prescreened": 0, "cache_hits": 0, "remote": 0, "blocked": 0}
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def is_allowlisted(self, content):
+        """输入是否完全匹配白名单格式"""
+        return any(pattern.fullmatch(content) for pattern in self.allowlist)
+
+    def check(self, content):
+        """
+        检测输入是否存在 SQL 注入风险
+
+        Args:
+            content: 待检测文本
+
+        Returns:
+            tuple: (是否安全, 原因)
+        """
+        if self.is_allowlisted(content):
+            self._count("prescreened")
+            return True, ""
+
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(content)
+            if cached is not None:
+                if cached[0] > now:
+                    self._cache.move_to_end(content)
+                    self._stats["cache_hits"] += 1
+                    if not cached[1]:
+                        self._stats["blocked"] += 1
+                    return cached[1], cached[2]
+                del self._cache[content]
+
+        self._count("remote")
+        client = self.client or get_sidecar_client()
+        data = client.call("firewall", {"sql": content})
+        if data is None:
+            # 服务不可用时放行（与原有行为一致），不缓存降级结果
+            return True, ""
+
+        is_safe = bool(data.get("is_safe"))
+        reason = "" if is_safe else data.get("reason", "检测到潜在的 SQL 注入风险")
+        with self._lock:
+            self._cache[content] = (now + self.cache_ttl, is_safe, reason)
+            self._cache.move_to_end(content)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            if not is_safe:
+                self._stats["blocked"] += 1
+        return is_safe, reason
+
+    def stats(self):
+        """白名单放行、缓存命中、远程检测和拦截次数"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cache_entries"] = len(self._cache)
+        return stats
+
+
+_firewall = None
+_firewall_lock = threading.Lock()
+
+
+def get_sql_firewall():
+    """获取进程内共享的防火墙检测实例"""
+    global _firewall
+    if _firewall is None:
+        with _firewall_lock:
+            if _firewall is None:
+                _firewall = SQLFirewall()
+    return _firewall
@@ -0,0 +1,24 @@
+"""
+测试公共配置
+
+根目录 config.py 在发件账号未配置时拒绝导入，测试使用占位账号；
+数据库相关的测试使用临时目录中的文章数据库，不触碰 database/ 下的正式数据
+"""
+
+import os
+
+os.environ.setdefault("SMTP_SERVER", "localhost")
+os.environ.setdefault("SMTP_PASSWORD", "")
+os.environ.setdefault("MY_EMAIL", "sender@example.com")
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def db_manager(tmp_path):
+    """临时文章数据库"""
+    from official_document_crawler.crawler.database import DatabaseManager
+
+    manager = DatabaseManager(f"sqlite:///{tmp_path}/articles.sqlite3")
+    yield manager
+    manager.engine.dispose()
@@ -0,0 +1,24 @@
+import pytest
+
+from email_subscriber.async_transport import async_transport_available
+from email_subscriber.benchmark import run_benchmark
+
+
+@pytest.mark.parametrize(
+    "transport",
+    [
+        "smtp",
+        pytest.param(
+            "async",
+            marks=pytest.mark.skipif(
+                not async_transport_available(), reason="需要安装 aiosmtplib"
+            ),
+        ),
+    ],
+)
+def test_benchmark_drives_the_pending_article_ledger(transport):
+    result = run_benchmark(subscribers=30, articles=2, platforms=2, transport=transport)
+
+    assert result["transport"] == transport
+    assert result["due"] > 0
+    assert result["sent"] == result["due"] == result["sink_messages"]
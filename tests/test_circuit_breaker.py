@@ -0,0 +1,147 @@
+import threading
+
+import pytest
+import requests
+
+import sidecar_client
+from sidecar_client import CircuitBreaker, SidecarClient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(sidecar_client, "time", fake)
+    return fake
+
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=30)
+
+    assert not breaker.record_failure()
+    assert not breaker.record_failure()
+    assert breaker.state == "closed"
+    assert breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=30)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+
+    assert breaker.state == "closed"
+    assert breaker.allow_request()
+
+
+def test_half_open_lets_exactly_one_probe_through(clock):
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=30)
+    trip(breaker)
+
+    clock.now += 29
+    assert not breaker.allow_request()
+    clock.now += 1
+    assert breaker.state == "half-open"
+
+    allowed = []
+    threads = [
+        threading.Thread(target=lambda: allowed.append(breaker.allow_request()))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert allowed.count(True) == 1
+
+
+def test_successful_probe_closes_the_circuit(clock):
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=30)
+    trip(breaker)
+    clock.now += 30
+
+    assert breaker.allow_request()
+    breaker.record_success()
+
+    assert breaker.state == "closed"
+    assert breaker.allow_request()
+    assert breaker.allow_request()
+
+
+def test_failed_probe_reopens_for_another_recovery_period(clock):
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=30)
+    trip(breaker)
+    clock.now += 30
+
+    assert breaker.allow_request()
+    # 试探失败时重新计时，但不算作又一次“熔断”
+    assert not breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+
+    clock.now += 30
+    assert breaker.allow_request()
+
+
+class FakeResponse:
+    def __init__(self, status_code, data=None):
+        self.status_code = status_code
+        self._data = data
+
+    def json(self):
+        return {"data": self._data}
+
+
+def test_client_short_circuits_per_endpoint(clock):
+    client = SidecarClient(failure_threshold=2, recovery_timeout=30)
+    calls = []
+
+    def post(url, json, timeout):
+        calls.append(url)
+        if url.endswith("/dlp/mask"):
+            raise requests.ConnectionError("refused")
+        return FakeResponse(200, {"is_safe": True})
+
+    client.session.post = post
+
+    assert client.try_mask_text("a") is None
+    assert client.mask_text("b") == "b"
+    assert client.try_mask_text("c") is None
+    assert client.detect_sql_injection("select 1") == (True, "")
+
+    stats = client.stats()
+    assert len(calls) == 3
+    assert stats["dlp"]["calls"] == 2
+    assert stats["dlp"]["errors"] == 2
+    assert stats["dlp"]["short_circuited"] == 1
+    assert stats["dlp"]["circuit"] == "open"
+    assert stats["firewall"]["circuit"] == "closed"
+
+
+def test_client_recovers_after_successful_probe(clock):
+    client = SidecarClient(failure_threshold=1, recovery_timeout=30)
+    responses = [FakeResponse(500), FakeResponse(200, {"masked_text": "[MASKED]"})]
+    client.session.post = lambda url, json, timeout: responses.pop(0)
+
+    assert client.try_mask_text("secret") is None
+    assert client.try_mask_text("secret") is None
+    clock.now += 30
+    assert client.try_mask_text("secret") == "[MASKED]"
+    assert client.stats()["dlp"]["circuit"] == "closed"
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from email_subscriber.async_transport import async_transport_available
+from email_subscriber.smtp_sink import SMTPSink
+from email_subscriber.subscriberDB import EmailSubscriberManager
+from email_subscriber.subscriber_manager import SubscriberService
+
+TRANSPORTS = [
+    "smtp",
+    pytest.param(
+        "async",
+        marks=pytest.mark.skipif(
+            not async_transport_available(), reason="需要安装 aiosmtplib"
+        ),
+    ),
+]
+
+
+@pytest.fixture
+def sink():
+    sink = SMTPSink(port=0)
+    sink.start()
+    yield sink
+    sink.stop()
+
+
+@pytest.fixture
+def make_service(tmp_path, sink):
+    services = []
+
+    def make(transport):
+        manager = EmailSubscriberManager(f"sqlite:///{tmp_path}/subscribers.sqlite3")
+        service = SubscriberService(
+            manager, "127.0.0.1", sink.port, "none", transport=transport
+        )
+        services.append(service)
+        return service
+
+    yield make
+    for service in services:
+        if service.async_transport is not None:
+            service.async_transport.close()
+        service.db_manager.engine.dispose()
+
+
+def seed_ledger(service, count):
+    for i in range(count):
+        service.add_subscriber(f"{20260000000 + i}@stumail.sztu.edu.cn")
+    _, platform = service.get_all_platforms()[0]
+    service.enqueue_new_articles([(1, platform), (2, platform)])
+
+
+@pytest.mark.parametrize("transport", TRANSPORTS)
+def test_async_digest_group_delivers_and_clears_ledger(make_service, sink, transport):
+    service = make_service(transport)
+    seed_ledger(service, 6)
+
+    [(article_ids, subscribers)] = service.get_due_digest_groups()
+    assert article_ids == (1, 2)
+
+    result = asyncio.run(
+        service.send_digest_group_async("汇总", "<p>正文</p>", subscribers, article_ids)
+    )
+
+    assert result == (6, 6)
+    assert sink.snapshot()["messages"] == 6
+    assert service.get_due_digest_groups() == []
+    assert service.db_manager.stats_counter.total == 6
+
+
+@pytest.mark.parametrize("transport", TRANSPORTS)
+def test_async_digest_group_keeps_ledger_for_failed_recipients(
+    make_service, sink, transport
+):
+    service = make_service(transport)
+    seed_ledger(service, 4)
+    [(article_ids, subscribers)] = service.get_due_digest_groups()
+
+    sink.failure_rate = 1.0
+    result = asyncio.run(
+        service.send_digest_group_async("汇总", "<p>正文</p>", subscribers, article_ids)
+    )
+
+    assert result == (0, 4)
+    [(retry_ids, retry_subscribers)] = service.get_due_digest_groups()
+    assert retry_ids == article_ids
+    assert len(retry_subscribers) == 4
@@ -0,0 +1,87 @@
+import pytest
+
+from official_document_crawler.crawler.local_dlp import LocalDLPEngine, _luhn_valid
+
+
+@pytest.fixture
+def engine():
+    return LocalDLPEngine()
+
+
+@pytest.mark.parametrize(
+    "number, valid",
+    [
+        ("79927398713", True),
+        ("79927398710", False),
+        ("4111 1111 1111 1111", True),
+        ("4111-1111-1111-1112", False),
+        ("6222 0212 3456 7894", True),
+    ],
+)
+def test_luhn_check(number, valid):
+    assert _luhn_valid(number) is valid
+
+
+@pytest.mark.parametrize(
+    "text, masked",
+    [
+        ("身份证号：110101199003071234", "身份证号：[MASKED: 身份证号]"),
+        ("卡号 4111 1111 1111 1111", "卡号 [MASKED: 银行卡号]"),
+        ("电话 13800138000", "电话 [MASKED: 手机号]"),
+        ("学号 202100201234", "学号 [MASKED: 学号]"),
+        ("邮箱 a.b@stumail.sztu.edu.cn", "邮箱 [MASKED: 邮箱]"),
+        ("服务器 192.168.1.100", "服务器 [MASKED: IP地址]"),
+        ("密码：P@ssw0rd!，请修改", "密码：[MASKED: 密码]，请修改"),
+        ("key sk-abcdef1234567890abcd", "key [MASKED: API Key]"),
+    ],
+)
+def test_rules_mask_structured_values_without_escalation(engine, text, masked):
+    assert engine.mask(text) == (masked, False)
+
+
+def test_card_number_failing_luhn_is_left_for_the_sidecar(engine):
+    assert engine.mask("卡 4111111111111112") == ("卡 4111111111111112", True)
+
+
+def test_invalid_birth_date_is_not_an_id_card(engine):
+    text, ambiguous = engine.mask("证件 110101199013071234")
+    assert "[MASKED" not in text
+    assert ambiguous
+
+
+def test_landline_and_short_numbers_do_not_escalate(engine):
+    text = "咨询电话 0755-23256789，2024 年 3 月 15 日截止"
+    assert engine.mask(text) == (text, False)
+
+
+@pytest.mark.parametrize("text", ["联系人：张三", "家庭地址：某某小区", "编号 12345678"])
+def test_semantic_candidates_escalate(engine, text):
+    assert engine.mask(text) == (text, True)
+
+
+def test_keywords_in_masked_spans_do_not_escalate(engine):
+    text, ambiguous = engine.mask("身份证号：110101199003071234，卡号为 4111111111111111")
+    assert text == "身份证号：[MASKED: 身份证号]，卡号为 [MASKED: 银行卡号]"
+    assert not ambiguous
+
+
+def test_unmasked_keyword_next_to_masked_span_still_escalates(engine):
+    _, ambiguous = engine.mask("身份证号：110101199003071234，联系人：张三")
+    assert ambiguous
+
+
+def test_empty_text(engine):
+    assert engine.mask("") == ("", False)
+    assert engine.mask(None) == (None, False)
+
+
+def test_stats_count_texts_matches_and_escalations(engine):
+    engine.mask("电话 13800138000，邮箱 a@b.cn")
+    engine.mask("联系人：张三")
+    engine.mask("")
+
+    stats = engine.stats()
+    assert stats["texts"] == 2
+    assert stats["matches"] == 2
+    assert stats["escalated"] == 1
+    assert stats["escalation_rate"] == 0.5
@@ -0,0 +1,42 @@
+from datetime import date, timedelta
+
+from official_document_crawler.crawler.database import Article
+
+
+def add_article(db_manager, url, days_ago=0, parsed=True):
+    published = (date.today() - timedelta(days=days_ago)).isoformat()
+    db_manager.add_article({"url": url, "title": url, "date": published})
+    if parsed:
+        session = db_manager.get_session()
+        try:
+            article_id = session.query(Article.id).filter(Article.url == url).scalar()
+        finally:
+            session.close()
+        db_manager.update_article_details(article_id, {"detail_time": "09:00"})
+
+
+def test_claims_recent_articles_inserted_by_other_processes(db_manager):
+    add_article(db_manager, "worker-recent", days_ago=1)
+    add_article(db_manager, "worker-unparsed", parsed=False)
+    add_article(db_manager, "backfill-old", days_ago=30)
+
+    assert db_manager.claim_unnotified_urls([], lookback_days=3) == ["worker-recent"]
+    db_manager.mark_notified(["worker-recent"])
+    assert db_manager.claim_unnotified_urls([], lookback_days=3) == []
+
+
+def test_crawled_urls_come_first_and_are_claimed_once(db_manager):
+    add_article(db_manager, "crawled", parsed=False)
+    add_article(db_manager, "worker")
+
+    claimed = db_manager.claim_unnotified_urls(["crawled", "crawled"])
+    assert claimed == ["crawled", "worker"]
+    # 未确认的领取在超时前不会被其他推送再次领取
+    assert db_manager.claim_unnotified_urls(["crawled"]) == []
+
+
+def test_unconfirmed_claims_are_retried_after_timeout(db_manager):
+    add_article(db_manager, "a", days_ago=30)
+
+    assert db_manager.claim_unnotified_urls(["a"]) == ["a"]
+    assert db_manager.claim_unnotified_urls([], claim_timeout=0) == ["a"]
@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+import rate_limiter
+from rate_limiter import RateLimiter
+
+
+class FakeClock:
+    """替代 time 模块：sleep 只推进时间，不真正等待"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", fake)
+    return fake
+
+
+def test_burst_is_available_immediately_then_paced(clock):
+    limiter = RateLimiter(rate=2, burst=3)
+
+    for _ in range(3):
+        limiter.acquire()
+    assert clock.slept == []
+
+    limiter.acquire()
+    assert clock.slept == [pytest.approx(0.5)]
+
+
+def test_tokens_refill_with_elapsed_time_up_to_capacity(clock):
+    limiter = RateLimiter(rate=1, burst=2)
+    limiter.acquire()
+    limiter.acquire()
+
+    clock.now += 60
+    limiter.acquire()
+    limiter.acquire()
+    assert clock.slept == []
+
+    limiter.acquire()
+    assert clock.slept == [pytest.approx(1.0)]
+
+
+def test_fractional_tokens_shorten_the_wait(clock):
+    limiter = RateLimiter(rate=4)
+    limiter.acquire()
+
+    clock.now += 0.1
+    limiter.acquire()
+    assert clock.slept == [pytest.approx(0.15)]
+
+
+@pytest.mark.parametrize("rate", [0, -1])
+def test_non_positive_rate_is_unlimited(clock, rate):
+    limiter = RateLimiter(rate=rate)
+    for _ in range(100):
+        limiter.acquire()
+    assert clock.slept == []
+
+
+def test_burst_below_one_still_allows_one_token(clock):
+    limiter = RateLimiter(rate=10, burst=0)
+    limiter.acquire()
+    assert clock.slept == []
+
+
+def test_threads_share_one_rate():
+    limiter = RateLimiter(rate=50, burst=1)
+    started = time.monotonic()
+
+    threads = [
+        threading.Thread(target=lambda: [limiter.acquire() for _ in range(5)])
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 20 个令牌中第 1 个立即可用，其余 19 个按每秒 50 个发放
+    assert time.monotonic() - started >= 19 / 50 * 0.9
@@ -0,0 +1,57 @@
+from email_subscriber.routing_index import SubscriberRoutingIndex
+
+
+def build_index():
+    index = SubscriberRoutingIndex()
+    index.load(
+        platform_rows=[(1, "教务处"), (2, "图书馆"), (3, "后勤处")],
+        subscriber_rows=[(10, False), (11, False), (12, True)],
+        # 12 是全平台订阅者，遗留的关联记录不参与路由；99 已不存在
+        link_rows=[(10, 1), (11, 1), (11, 2), (12, 3), (99, 1)],
+    )
+    return index
+
+
+def test_load_routes_platform_and_all_platform_subscribers():
+    index = build_index()
+
+    assert index.get_platform_id("图书馆") == 2
+    assert index.get_platform_name(1) == "教务处"
+    assert index.subscribers_for_platform_id(1) == {10, 11, 12}
+    assert index.subscribers_for_platform_id(3) == {12}
+    assert index.subscriber_count == 3
+
+
+def test_subscribers_for_platforms_unions_known_platforms():
+    index = build_index()
+
+    assert index.subscribers_for_platforms(["图书馆", "后勤处"]) == {11, 12}
+    assert index.subscribers_for_platforms(["不存在的平台"]) == set()
+    assert index.subscribers_for_platforms([]) == set()
+
+
+def test_set_subscription_replaces_previous_platforms():
+    index = build_index()
+
+    index.set_subscription(10, False, [2])
+    assert index.subscribers_for_platform_id(1) == {11, 12}
+    assert index.subscribers_for_platform_id(2) == {10, 11, 12}
+
+    index.set_subscription(11, True)
+    assert index.subscribers_for_platform_id(3) == {11, 12}
+    assert 11 not in index.subscribers_for_platforms(["不存在的平台"])
+
+    index.set_subscription(12, False, [1])
+    assert index.subscribers_for_platform_id(3) == {11}
+
+
+def test_remove_subscriber_detaches_everywhere():
+    index = build_index()
+
+    index.remove_subscriber(11)
+    index.remove_subscriber(12)
+    index.remove_subscriber(404)
+
+    assert index.subscribers_for_platform_id(1) == {10}
+    assert index.subscribers_for_platforms(["图书馆"]) == set()
+    assert index.subscriber_count == 1
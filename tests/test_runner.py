@@ -0,0 +1,129 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from official_document_crawler.crawler.database import CrawlRun
+from official_document_crawler.crawler.runner import CrawlJobRunner
+
+
+def add_run(db_manager, heartbeat_at):
+    session = db_manager.get_session()
+    try:
+        run = CrawlRun(
+            started_at=datetime.now() - timedelta(hours=1),
+            status="running",
+            owner="other-host:1",
+            heartbeat_at=heartbeat_at,
+        )
+        session.add(run)
+        session.commit()
+        return run.id
+    finally:
+        session.close()
+
+
+def get_run(db_manager, run_id):
+    session = db_manager.get_session()
+    try:
+        run = session.get(CrawlRun, run_id)
+        session.expunge(run)
+        return run
+    finally:
+        session.close()
+
+
+def test_closes_only_runs_whose_heartbeat_expired(db_manager):
+    legacy = add_run(db_manager, None)
+    expired = add_run(db_manager, datetime.now() - timedelta(seconds=600))
+    alive = add_run(db_manager, datetime.now() - timedelta(seconds=10))
+
+    CrawlJobRunner(db_manager, stale_seconds=300)
+
+    assert get_run(db_manager, legacy).status == "failed"
+    assert get_run(db_manager, expired).status == "failed"
+    assert get_run(db_manager, alive).status == "running"
+
+
+def test_heartbeat_keeps_a_long_run_alive(db_manager):
+    runner = CrawlJobRunner(db_manager, heartbeat_seconds=0.05, stale_seconds=0.5)
+    other = CrawlJobRunner(db_manager, heartbeat_seconds=0.05, stale_seconds=0.5)
+    release = threading.Event()
+    started = threading.Event()
+
+    def job(context):
+        started.set()
+        release.wait(5)
+        return ["u1"]
+
+    thread = threading.Thread(target=runner.run, args=(job,))
+    thread.start()
+    started.wait(5)
+    time.sleep(0.8)
+    # 另一个进程启动时不会把仍在更新心跳的运行记录当作遗留记录关闭
+    other._close_stale_runs()
+    assert get_run(db_manager, runner.current_run_id).status == "running"
+
+    release.set()
+    thread.join()
+    run = runner.recent_runs()[0]
+    assert run["status"] == "success"
+    assert run["new_articles"] == 1
+
+
+def test_second_trigger_is_skipped_while_running(db_manager):
+    runner = CrawlJobRunner(db_manager)
+    results = []
+
+    def job(context):
+        results.append(runner.run(lambda ctx: ["nested"], trigger="manual"))
+        return ["u1", "u2"]
+
+    assert runner.run(job) == ["u1", "u2"]
+    assert results == [None]
+    assert not runner.running
+    assert len(runner.recent_runs()) == 1
+
+
+def test_run_status_reflects_errors_timeouts_and_cancellation(db_manager):
+    runner = CrawlJobRunner(db_manager, budgets={"fetch": 0.01})
+
+    def failing(context):
+        raise RuntimeError("boom")
+
+    def recorded_error(context):
+        context.record_error("page 3 failed")
+        return []
+
+    def slow(context):
+        with context.phase("fetch"):
+            while not context.should_stop():
+                time.sleep(0.005)
+        return []
+
+    def cancelled(context):
+        runner.cancel()
+        return []
+
+    for job in (failing, recorded_error, slow, cancelled):
+        runner.run(job)
+
+    runs = runner.recent_runs()
+    statuses = [run["status"] for run in sorted(runs, key=lambda run: run["id"])]
+    assert statuses == ["failed", "failed", "timeout", "cancelled"]
+    assert not runner.cancel()
+
+
+def test_status_averages_phase_durations(db_manager):
+    runner = CrawlJobRunner(db_manager)
+
+    def job(context):
+        with context.phase("fetch"):
+            context.count_page(changed=False)
+        return []
+
+    runner.run(job)
+    status = runner.status()
+
+    assert status["running"] is False
+    assert set(status["avg_phase_durations"]) == {"fetch"}
+    assert status["runs"][0]["pages"] == 1
@@ -0,0 +1,71 @@
+import pytest
+
+from email_subscriber import stats_counter
+from email_subscriber.stats_counter import SubscriberCounter
+from email_subscriber.subscriberDB import EmailSubscriberManager
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(stats_counter, "time", fake)
+    return fake
+
+
+def test_subscriber_counter_reloads_only_after_interval(clock):
+    counts = [10, 25]
+    loads = []
+
+    def load():
+        loads.append(clock.now)
+        return counts.pop(0)
+
+    counter = SubscriberCounter(load, refresh_interval=60)
+    assert counter.value == 10
+    counter.add(1)
+    counter.add(-3)
+    assert counter.value == 8
+    assert len(loads) == 1
+
+    clock.now += 60
+    assert counter.value == 25
+    assert len(loads) == 2
+
+
+def test_subscriber_counter_keeps_value_when_reload_fails(clock):
+    results = [5, None]
+    counter = SubscriberCounter(lambda: results.pop(0), refresh_interval=60)
+    counter.refresh()
+
+    clock.now += 60
+    assert counter.value == 5
+    # 失败后同样等待一个间隔再重试
+    counter.add(1)
+    assert counter.value == 6
+
+
+def test_manager_maintains_subscriber_count_without_querying(tmp_path, monkeypatch):
+    manager = EmailSubscriberManager(f"sqlite:///{tmp_path}/subscribers.sqlite3")
+    try:
+        manager.add_subscriber("1@stumail.sztu.edu.cn")
+        manager.add_subscriber("2@stumail.sztu.edu.cn")
+        # 更新已有订阅者不改变数量
+        manager.add_subscriber("2@stumail.sztu.edu.cn", send_frequency=6)
+        manager.delete_subscriber("1@stumail.sztu.edu.cn")
+        manager.delete_subscriber("404@stumail.sztu.edu.cn")
+
+        def fail():
+            raise AssertionError("get_stats 不应按请求统计订阅者")
+
+        monkeypatch.setattr(manager.subscriber_counter, "_load", fail)
+        assert manager.get_stats()["subscriber_count"] == 1
+    finally:
+        manager.engine.dispose()
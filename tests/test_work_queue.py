@@ -0,0 +1,184 @@
+import threading
+from datetime import datetime, timedelta
+
+from official_document_crawler.crawler.database import CrawlTask
+from official_document_crawler.crawler.work_queue import WorkQueue
+
+
+def make_queue(db_manager, worker_id, **kwargs):
+    kwargs.setdefault("lease_seconds", 60)
+    kwargs.setdefault("max_attempts", 3)
+    kwargs.setdefault("retry_base_seconds", 0)
+    return WorkQueue(db_manager, worker_id=worker_id, **kwargs)
+
+
+def get_task(db_manager, task_id):
+    session = db_manager.get_session()
+    try:
+        task = session.get(CrawlTask, task_id)
+        session.expunge(task)
+        return task
+    finally:
+        session.close()
+
+
+def expire_lease(db_manager, task_id):
+    """模拟持有租约的进程崩溃：租约时间回拨到过去"""
+    session = db_manager.get_session()
+    try:
+        task = session.get(CrawlTask, task_id)
+        task.lease_expires_at = datetime.now() - timedelta(seconds=1)
+        session.commit()
+    finally:
+        session.close()
+
+
+def test_enqueue_deduplicates_and_reset_reopens_finished_tasks(db_manager):
+    queue = make_queue(db_manager, "a")
+
+    assert queue.enqueue("list_page", 1, {"page": 1})
+    assert not queue.enqueue("list_page", 1, {"page": 1})
+    # 未完成的任务不会被 reset 打断
+    assert not queue.enqueue("list_page", 1, {"page": 1}, reset=True)
+
+    task = queue.claim()
+    assert queue.complete(task.id)
+    assert queue.enqueue("list_page", 1, {"page": 1}, reset=True)
+    assert queue.stats() == {"list_page": {"pending": 1}}
+
+
+def test_claimed_task_is_invisible_to_other_workers(db_manager):
+    first = make_queue(db_manager, "a")
+    second = make_queue(db_manager, "b")
+    first.enqueue("article", "u1")
+
+    task = first.claim()
+    assert task.status == "leased"
+    assert task.lease_owner == "a"
+    assert task.attempts == 1
+    assert second.claim() is None
+
+
+def test_claim_filters_by_kind(db_manager):
+    queue = make_queue(db_manager, "a")
+    queue.enqueue("list_page", 1)
+
+    assert queue.claim(kinds=["article"]) is None
+    assert queue.claim(kinds=["list_page"]).key == "1"
+
+
+def test_expired_lease_is_taken_over_and_old_owner_loses_it(db_manager):
+    first = make_queue(db_manager, "a")
+    second = make_queue(db_manager, "b")
+    first.enqueue("article", "u1")
+    task = first.claim()
+
+    expire_lease(db_manager, task.id)
+    taken = second.claim()
+
+    assert taken.id == task.id
+    assert taken.lease_owner == "b"
+    assert taken.attempts == 2
+    assert not first.heartbeat(task.id)
+    assert not first.complete(task.id)
+    assert second.complete(task.id)
+    assert get_task(db_manager, task.id).status == "done"
+
+
+def test_heartbeat_extends_own_lease(db_manager):
+    queue = make_queue(db_manager, "a", lease_seconds=600)
+    queue.enqueue("article", "u1")
+    task = queue.claim()
+
+    expire_lease(db_manager, task.id)
+    assert queue.heartbeat(task.id)
+    assert get_task(db_manager, task.id).lease_expires_at > datetime.now()
+    assert make_queue(db_manager, "b").claim() is None
+
+
+def test_failure_backs_off_before_retry(db_manager):
+    queue = make_queue(db_manager, "a", retry_base_seconds=60)
+    queue.enqueue("article", "u1")
+    task = queue.claim()
+
+    assert queue.fail(task, "timeout")
+    stored = get_task(db_manager, task.id)
+    assert stored.status == "pending"
+    assert stored.last_error == "timeout"
+    assert stored.available_at > datetime.now() + timedelta(seconds=50)
+    assert queue.claim() is None
+
+
+def test_failures_past_max_attempts_go_to_dead_letter(db_manager):
+    queue = make_queue(db_manager, "a", max_attempts=2)
+    queue.enqueue("article", "u1")
+
+    queue.fail(queue.claim(), "first")
+    task = queue.claim()
+    assert task.attempts == 2
+    queue.fail(task, "second")
+
+    stored = get_task(db_manager, task.id)
+    assert stored.status == "dead"
+    assert stored.last_error == "second"
+    assert queue.claim() is None
+
+
+def test_expired_lease_at_max_attempts_goes_to_dead_letter(db_manager):
+    queue = make_queue(db_manager, "a", max_attempts=1)
+    queue.enqueue("article", "u1")
+    task = queue.claim()
+
+    expire_lease(db_manager, task.id)
+    assert queue.claim() is None
+    assert get_task(db_manager, task.id).status == "dead"
+
+
+def test_requeue_dead_resets_attempts(db_manager):
+    queue = make_queue(db_manager, "a", max_attempts=1)
+    queue.enqueue("article", "u1")
+    queue.enqueue("list_page", 1)
+    for _ in range(2):
+        queue.fail(queue.claim(), "boom")
+
+    assert queue.requeue_dead(kinds=["article"]) == 1
+    assert queue.stats() == {
+        "article": {"pending": 1},
+        "list_page": {"dead": 1},
+    }
+    task = queue.claim()
+    assert task.key == "u1"
+    assert task.attempts == 1
+
+
+def test_concurrent_workers_claim_each_task_once(db_manager):
+    setup = make_queue(db_manager, "setup")
+    for i in range(40):
+        setup.enqueue("article", f"u{i}")
+
+    claimed = []
+    claimed_lock = threading.Lock()
+    errors = []
+
+    def work(worker_id):
+        queue = make_queue(db_manager, worker_id)
+        try:
+            while True:
+                task = queue.claim()
+                if task is None:
+                    return
+                with claimed_lock:
+                    claimed.append(task.key)
+                assert queue.complete(task.id)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(f"w{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sorted(claimed) == sorted(f"u{i}" for i in range(40))
+    assert setup.stats() == {"article": {"done": 40}}